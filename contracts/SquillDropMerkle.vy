@@ -0,0 +1,238 @@
+# @version 0.4.0
+
+"""
+@title Squid Pro Quo: Independence, Life & Liberty ($SQUILL) Airdrop
+@notice Merkle root airdrop, claims are proven against a root fixed at deploy
+@license MIT
+@author Open Stable Index
+@dev Forked from https://curve.substack.com/p/big-crypto-poll-results,
+     details at https://github.com/open-stablecoin-index/squill-drop 
+
+                                                                     -++++-
+                                                                     #####+
+                                                                     #####+
+                                                        -+++++-      #####+
+                                                        +######-     #####+
+                                                        +######+     #####+
+                                                        +#######-    #####+
+                                                        +#######+    #####+
+                                      +#############+   +########-   #####+
+                                      +#############+   +########+   #####+
+                                      +##############-  +#########   #####+
+                                      +#####-           +#########+  #####+
+                     +##########-     +#####-           +##########  #####+
+                     +############+   +#####-           +#####+####+ #####+
+                     +#############+  +#####-           +#####-#####-#####+
+                     +####-   +####+  +#####-           +##### #####++####+
+                     +####-   -#####  +############+    +##### -#####+####+
+        -#######+    +####-   -#####  +############+    +#####  +#########+
+       +##########-  +####-   +#####  +############+    +#####  -#########+
+      +####   +###+  +####+--+#####+  +#####-           +#####   +########+
+      +###+   -###+  +############+   +#####-           +#####   +########+
+      +###+    ###+  +###########+    +#####-           +#####    +#######+
+      +###+    ###+  +####----        +#####-           +#####    +#######+
+      +###+   -###+  +####-           +#####-           +#####     +######+
+      +###+   +###+  +####-           +##############-  +#####      ######+
+       +##########   +####-           +##############-  +#####      +#####+
+        -#######-    +####-           +##############-  +#####       #####+
+
+"""
+
+from ethereum.ercs import IERC20
+
+import ownable_2step as ownable
+import pausable
+
+
+# ================================================================== #
+# ⚙️ Modules
+# ================================================================== #
+
+initializes: ownable
+exports: (
+    ownable.owner,
+    ownable.pending_owner,
+    ownable.transfer_ownership,
+    ownable.accept_ownership,
+)
+
+initializes: pausable[ownable := ownable]
+exports: (
+    pausable.paused,
+    pausable.pause,
+    pausable.unpause,
+)
+
+
+# ================================================================== #
+# 📣 Events
+# ================================================================== #
+
+event Claim:
+    user: address
+    value: uint256
+
+
+# ================================================================== #
+# 💾 Storage
+# ================================================================== #
+
+MAX_PROOF_LENGTH: constant(uint256) = 32
+
+reward_token: public(IERC20)
+merkle_root: public(immutable(bytes32))
+
+# Bit `index % 256` of word `index / 256` is set once leaf `index` is claimed
+claimed_bitmap: HashMap[uint256, uint256]
+
+
+# ================================================================== #
+# 🚧 Constructor
+# ================================================================== #
+
+@deploy
+def __init__(reward_token: IERC20, root: bytes32):
+    ownable.__init__()
+    pausable.__init__()
+    self.reward_token = reward_token
+    merkle_root = root
+
+
+# ================================================================== #
+# 👀 View Functions
+# ================================================================== #
+
+@external
+@view
+def is_claimed(index: uint256) -> bool:
+    """
+    @notice Check whether a leaf has been claimed
+    @param index Leaf index in the Merkle tree
+    @return True if the leaf was already claimed
+    """
+    return self._is_claimed(index)
+
+
+@external
+@view
+def verify(
+    index: uint256,
+    addr: address,
+    amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+) -> bool:
+    """
+    @notice Check a proof without claiming
+    @param index Leaf index in the Merkle tree
+    @param addr Eligible address
+    @param amount Claim amount
+    @param proof Sibling hashes from the leaf up to the root
+    @return True if the leaf is part of the tree
+    """
+    return self._verify(proof, self._leaf(index, addr, amount))
+
+
+# ================================================================== #
+# ✍️ Write Functions
+# ================================================================== #
+
+@external
+def claim(
+    index: uint256, amount: uint256, proof: DynArray[bytes32, MAX_PROOF_LENGTH]
+):
+    """
+    @notice Allows addresses in the tree to withdraw tokens
+    @param index Leaf index in the Merkle tree
+    @param amount Claim amount
+    @param proof Sibling hashes from the leaf up to the root
+    """
+    self._claim(msg.sender, index, amount, proof)
+
+
+@external
+def claim_for(
+    addr: address,
+    index: uint256,
+    amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+):
+    """
+    @notice Allows addresses in the tree to withdraw tokens
+    @param addr Eligible address for claim
+    @param index Leaf index in the Merkle tree
+    @param amount Claim amount
+    @param proof Sibling hashes from the leaf up to the root
+    """
+    ownable._check_owner()
+    self._claim(addr, index, amount, proof)
+
+
+# ================================================================== #
+# 👑 Admin Functions
+# ================================================================== #
+
+@external
+def withdraw_remaining(_token: IERC20):
+    """
+    @notice Allows owner to withdraw any remaining tokens
+    @param _token Token address to withdraw
+    """
+    ownable._check_owner()
+    amount: uint256 = staticcall _token.balanceOf(self)
+    assert amount > 0, "!balance"
+    assert extcall _token.transfer(msg.sender, amount), "!transfer"
+
+
+# ================================================================== #
+# 🏠 Internal Functions
+# ================================================================== #
+
+@internal
+@pure
+def _leaf(index: uint256, _user: address, _amount: uint256) -> bytes32:
+    # 96-byte preimage, so a leaf can never pass for a 64-byte inner node
+    return keccak256(abi_encode(index, _user, _amount))
+
+
+@internal
+@view
+def _verify(proof: DynArray[bytes32, MAX_PROOF_LENGTH], leaf: bytes32) -> bool:
+    computed: bytes32 = leaf
+    for node: bytes32 in proof:
+        # Pairs are hashed in sorted order, so proofs carry no left/right bits
+        if convert(computed, uint256) < convert(node, uint256):
+            computed = keccak256(concat(computed, node))
+        else:
+            computed = keccak256(concat(node, computed))
+    return computed == merkle_root
+
+
+@internal
+@view
+def _is_claimed(index: uint256) -> bool:
+    word: uint256 = self.claimed_bitmap[index >> 8]
+    return (word >> (index & 255)) & 1 == 1
+
+
+@internal
+def _claim(
+    _user: address,
+    index: uint256,
+    _amount: uint256,
+    proof: DynArray[bytes32, MAX_PROOF_LENGTH],
+):
+    pausable._check_unpaused()
+    assert not self._is_claimed(index), "claimed"
+    assert self._verify(proof, self._leaf(index, _user, _amount)), "!proof"
+
+    _balance: uint256 = staticcall self.reward_token.balanceOf(self)
+    assert _balance >= _amount, "!balance"
+
+    # Update state before transfer
+    word: uint256 = index >> 8
+    self.claimed_bitmap[word] = self.claimed_bitmap[word] | (1 << (index & 255))
+
+    # Transfer tokens to the caller
+    assert extcall self.reward_token.transfer(_user, _amount), "!transfer"
+
+    log Claim(_user, _amount)
@@ -0,0 +1,283 @@
+# @version 0.4.0
+
+"""
+@title Squid Pro Quo: Independence, Life & Liberty ($SQUILL) Airdrop
+@notice Airdrop reading its allocations from the bytecode of data contracts
+@license MIT
+@author Open Stable Index
+@dev Forked from https://curve.substack.com/p/big-crypto-poll-results,
+     details at https://github.com/open-stablecoin-index/squill-drop 
+
+                                                                     -++++-
+                                                                     #####+
+                                                                     #####+
+                                                        -+++++-      #####+
+                                                        +######-     #####+
+                                                        +######+     #####+
+                                                        +#######-    #####+
+                                                        +#######+    #####+
+                                      +#############+   +########-   #####+
+                                      +#############+   +########+   #####+
+                                      +##############-  +#########   #####+
+                                      +#####-           +#########+  #####+
+                     +##########-     +#####-           +##########  #####+
+                     +############+   +#####-           +#####+####+ #####+
+                     +#############+  +#####-           +#####-#####-#####+
+                     +####-   +####+  +#####-           +##### #####++####+
+                     +####-   -#####  +############+    +##### -#####+####+
+        -#######+    +####-   -#####  +############+    +#####  +#########+
+       +##########-  +####-   +#####  +############+    +#####  -#########+
+      +####   +###+  +####+--+#####+  +#####-           +#####   +########+
+      +###+   -###+  +############+   +#####-           +#####   +########+
+      +###+    ###+  +###########+    +#####-           +#####    +#######+
+      +###+    ###+  +####----        +#####-           +#####    +#######+
+      +###+   -###+  +####-           +#####-           +#####     +######+
+      +###+   +###+  +####-           +##############-  +#####      ######+
+       +##########   +####-           +##############-  +#####      +#####+
+        -#######-    +####-           +##############-  +#####       #####+
+
+"""
+
+from ethereum.ercs import IERC20
+
+import ownable_2step as ownable
+import pausable
+
+
+# ================================================================== #
+# ⚙️ Modules
+# ================================================================== #
+
+initializes: ownable
+exports: (
+    ownable.owner,
+    ownable.pending_owner,
+    ownable.transfer_ownership,
+    ownable.accept_ownership,
+)
+
+initializes: pausable[ownable := ownable]
+exports: (
+    pausable.paused,
+    pausable.pause,
+    pausable.unpause,
+)
+
+
+# ================================================================== #
+# 📣 Events
+# ================================================================== #
+
+event Claim:
+    user: address
+    value: uint256
+
+
+# ================================================================== #
+# 💾 Storage
+# ================================================================== #
+
+# Each data contract holds a STOP byte, then sorted 32-byte records of
+# 20-byte address and 12-byte amount (see scripts/packing.py)
+MAX_TABLES: constant(uint256) = 64
+RECORD_SIZE: constant(uint256) = 32
+AMOUNT_MASK: constant(uint256) = 2**96 - 1
+
+# log2 of the most records a table can hold (767), rounded up
+MAX_SEARCH_STEPS: constant(uint256) = 10
+
+reward_token: public(IERC20)
+
+TABLES: immutable(DynArray[address, MAX_TABLES])
+# First address of each table, to pick the table without reading code
+TABLE_FIRST: immutable(DynArray[uint256, MAX_TABLES])
+# Records per table, and the global index of each table's first record
+TABLE_SIZE: immutable(DynArray[uint256, MAX_TABLES])
+TABLE_OFFSET: immutable(DynArray[uint256, MAX_TABLES])
+
+# Bit `index % 256` of word `index / 256` is set once record `index` is claimed
+claimed_bitmap: HashMap[uint256, uint256]
+
+
+# ================================================================== #
+# 🚧 Constructor
+# ================================================================== #
+
+@deploy
+def __init__(reward_token: IERC20, tables: DynArray[address, MAX_TABLES]):
+    ownable.__init__()
+    pausable.__init__()
+    self.reward_token = reward_token
+
+    firsts: DynArray[uint256, MAX_TABLES] = []
+    sizes: DynArray[uint256, MAX_TABLES] = []
+    offsets: DynArray[uint256, MAX_TABLES] = []
+    total: uint256 = 0
+    last: uint256 = 0
+
+    for table: address in tables:
+        size: uint256 = (table.codesize - 1) // RECORD_SIZE
+        assert size > 0, "!table"
+
+        first: uint256 = self._record(table, 0) >> 96
+        assert first > last or total == 0, "!sorted"
+        last = self._record(table, size - 1) >> 96
+
+        firsts.append(first)
+        sizes.append(size)
+        offsets.append(total)
+        total += size
+
+    TABLES = tables
+    TABLE_FIRST = firsts
+    TABLE_SIZE = sizes
+    TABLE_OFFSET = offsets
+
+
+# ================================================================== #
+# 👀 View Functions
+# ================================================================== #
+
+@external
+@view
+def pending_claim_amount(addr: address) -> uint256:
+    """
+    @notice Pending claim amount
+    @param addr Address to check
+    @return Amount of tokens received on claim
+    """
+    found: bool = False
+    index: uint256 = 0
+    amount: uint256 = 0
+    found, index, amount = self._find(addr)
+    if not found or self._is_claimed(index):
+        return 0
+    return amount
+
+
+@external
+@view
+def tables() -> DynArray[address, MAX_TABLES]:
+    """
+    @notice Data contracts holding the allocation table
+    @return Table addresses in ascending address order
+    """
+    return TABLES
+
+
+# ================================================================== #
+# ✍️ Write Functions
+# ================================================================== #
+
+@external
+def claim():
+    """
+    @notice Allows whitelisted addresses to withdraw tokens
+    """
+    self._claim(msg.sender)
+
+
+@external
+def claim_for(addr: address):
+    """
+    @notice Allows whitelisted addresses to withdraw tokens
+    @param addr Eligible address for claim
+    """
+    ownable._check_owner()
+    self._claim(addr)
+
+
+# ================================================================== #
+# 👑 Admin Functions
+# ================================================================== #
+
+@external
+def withdraw_remaining(_token: IERC20):
+    """
+    @notice Allows owner to withdraw any remaining tokens
+    @param _token Token address to withdraw
+    """
+    ownable._check_owner()
+    amount: uint256 = staticcall _token.balanceOf(self)
+    assert amount > 0, "!balance"
+    assert extcall _token.transfer(msg.sender, amount), "!transfer"
+
+
+# ================================================================== #
+# 🏠 Internal Functions
+# ================================================================== #
+
+@internal
+@view
+def _record(table: address, i: uint256) -> uint256:
+    # Skip the leading STOP byte of the data contract
+    return convert(slice(table.code, 1 + i * RECORD_SIZE, 32), uint256)
+
+
+@internal
+@view
+def _find(_user: address) -> (bool, uint256, uint256):
+    """
+    @dev Binary search for `_user`, returning (found, record index, amount)
+    """
+    key: uint256 = convert(_user, uint256)
+
+    # Last table starting at or below the key
+    table_id: uint256 = 0
+    found: bool = False
+    for first: uint256 in TABLE_FIRST:
+        if first > key:
+            break
+        found = True
+        table_id += 1
+    if not found:
+        return False, 0, 0
+    table_id -= 1
+
+    table: address = TABLES[table_id]
+    lo: uint256 = 0
+    hi: uint256 = TABLE_SIZE[table_id]
+    for _: uint256 in range(MAX_SEARCH_STEPS + 1):
+        if lo >= hi:
+            break
+        mid: uint256 = unsafe_div(lo + hi, 2)
+        record: uint256 = self._record(table, mid)
+        record_key: uint256 = record >> 96
+        if record_key == key:
+            return True, TABLE_OFFSET[table_id] + mid, record & AMOUNT_MASK
+        if record_key < key:
+            lo = mid + 1
+        else:
+            hi = mid
+    return False, 0, 0
+
+
+@internal
+@view
+def _is_claimed(index: uint256) -> bool:
+    word: uint256 = self.claimed_bitmap[index >> 8]
+    return (word >> (index & 255)) & 1 == 1
+
+
+@internal
+def _claim(_user: address):
+    pausable._check_unpaused()
+
+    found: bool = False
+    index: uint256 = 0
+    _amount: uint256 = 0
+    found, index, _amount = self._find(_user)
+    assert found and _amount > 0, "!address"
+    assert not self._is_claimed(index), "claimed"
+
+    _balance: uint256 = staticcall self.reward_token.balanceOf(self)
+    assert _balance >= _amount, "!balance"
+
+    # Update state before transfer
+    word: uint256 = index >> 8
+    self.claimed_bitmap[word] = self.claimed_bitmap[word] | (1 << (index & 255))
+
+    # Transfer tokens to the caller
+    assert extcall self.reward_token.transfer(_user, _amount), "!transfer"
+
+    log Claim(_user, _amount)
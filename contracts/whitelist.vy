@@ -0,0 +1,116 @@
+# @version 0.4.0
+
+"""
+@title Whitelist
+@license MIT
+@author Open Stable Index
+@notice whitelist.vy holds the claim amounts of an airdrop, with packed bulk loading and batched push payouts
+"""
+
+from ethereum.ercs import IERC20
+
+import ownable_2step as ownable
+import pausable
+
+
+# ============================================================================================
+# Modules
+# ============================================================================================
+
+
+uses: ownable
+uses: pausable
+
+
+# ============================================================================================
+# Constants
+# ============================================================================================
+
+
+# Most recipients one claim_for_many call pays out
+MAX_BATCH: constant(uint256) = 1000
+
+# Most 32-byte records one add_bulk_packed call loads
+MAX_RECORDS: constant(uint256) = 10000
+
+
+# ============================================================================================
+# Events
+# ============================================================================================
+
+
+event Claim:
+    user: address
+    value: uint256
+
+
+# ============================================================================================
+# Storage
+# ============================================================================================
+
+
+# One slot per recipient; zeroed on claim, which also earns a gas refund
+eligible_addresses: public(HashMap[address, uint256])
+
+
+# ============================================================================================
+# Owner functions
+# ============================================================================================
+
+
+@external
+def add_bulk_packed():
+    """
+    @notice Bulk-add up to 10000 addresses from packed 32-byte records
+    @dev Each record is a 20-byte address followed by a 12-byte claim value,
+         half the calldata of the ABI-encoded arrays of add_bulk_addresses.
+         The records follow the selector directly and are read from
+         calldata one at a time; a `Bytes[320000]` argument would reserve
+         10000 words of memory, about 225k gas, on every call.
+    """
+    ownable._check_owner()
+    size: uint256 = len(msg.data) - 4
+    assert size % 32 == 0 and size <= MAX_RECORDS * 32, "!length"
+
+    for i: uint256 in range(MAX_RECORDS):
+        if i * 32 >= size:
+            break
+        record: uint256 = convert(
+            convert(slice(msg.data, 4 + i * 32, 32), bytes32), uint256
+        )
+        self.eligible_addresses[convert(record >> 96, address)] = record & (
+            2**96 - 1
+        )
+
+
+# ============================================================================================
+# Internal functions
+# ============================================================================================
+
+
+@internal
+def _claim_for_many(token: IERC20, addrs: DynArray[address, MAX_BATCH]):
+    """
+    @dev Pays `token` out to many whitelisted addresses as the owner.
+         Ownership, pause state and balance are checked once per batch.
+         Addresses with nothing to claim are skipped, so a batch does not
+         fail on recipients who claimed after it was built.
+    """
+    ownable._check_owner()
+    pausable._check_unpaused()
+
+    _balance: uint256 = staticcall token.balanceOf(self)
+
+    for _user: address in addrs:
+        _amount: uint256 = self.eligible_addresses[_user]
+        if _amount == 0:
+            continue
+        assert _balance >= _amount, "!balance"
+        _balance = unsafe_sub(_balance, _amount)
+
+        # Update state before transfer
+        self.eligible_addresses[_user] = 0
+
+        assert extcall token.transfer(_user, _amount), "!transfer"
+
+        log Claim(_user, _amount)
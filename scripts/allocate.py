@@ -0,0 +1,462 @@
+import json
+import math
+import re
+from bisect import bisect_left
+from fractions import Fraction
+from itertools import accumulate
+
+import numpy as np
+from eth_abi import decode
+from rpc import JsonRpcClient
+
+RPC_URL = "https://rpc.frax.com"
+
+block = 18922260
+balance_file = f"balance_data_{block}.json"
+output_json = "airdrop_balances.json"
+output_md = "../airdrop_round.md"
+
+# Total SQUILL handed out this round, in wei
+ROUND_BUDGET = 1_776_000 * 10**18
+
+# Holders below this many SQUID-equivalent wei get nothing
+MIN_SQUID = 0
+
+# Per-address bounds on the allocation in wei, None for no cap. The excess
+# above the cap goes to the holders below it, the floor is topped up from
+# everyone above it.
+ALLOCATION_CAP = None
+ALLOCATION_FLOOR = 0
+
+# Multipliers on each component's SQUID-equivalent value in the split, None
+# to count every component at face value. Eligibility always uses the face
+# value. sweep.py varies these per scenario.
+COMPONENT_WEIGHTS = None
+
+SQUID = "0x6e58089d8E8f664823d26454f49A5A0f2fF697Fe"
+# The SQUID/ETH pool is its own LP token
+POOL = "0x277FA53c8a53C880E0625c92C92a62a9F60f3f04"
+
+# Contracts holding the tokens other holders are credited for, so counting
+# them as holders would count those positions twice
+EXCLUDED = {
+    "0x277fa53c8a53c880e0625c92c92a62a9f60f3f04",  # Pool, holds the SQUID behind the LP
+    "0xe5e5ed1b50ae33e66ca69df17aa6381fde4e9c7e",  # Gauge, holds the staked LP
+    "0x989aeb4d175e16225e39e87d0d97a3360524ad80",  # Convex voter proxy
+    "0x29ff8f9acb27727d8a2a52d16091c12ea56e9e4d",  # Convex
+}
+
+# Wrapped positions and the component their backing tokens are held in:
+# gauge deposits are LP held by the gauge, Convex deposits are gauge tokens
+# held by the voter proxy
+WRAPPED = {"gauge": "lp", "convex": "gauge"}
+
+COMPONENTS = ["squid", "lp", "gauge", "convex"]
+
+
+def load_balances(path):
+    """
+    Load a balance_data_<block>.json snapshot into arrays.
+
+    Balances exceed 64 bits, so they are kept as exact Python integers in
+    object arrays; numpy still runs the arithmetic over whole columns.
+
+    Returns:
+        tuple: (list of addresses, {component: object array of balances})
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+    addresses = list(data)
+    columns = {
+        name: np.array([data[addr][name] for addr in addresses], dtype=object)
+        for name in COMPONENTS
+    }
+    return addresses, columns
+
+
+def get_pool_state(client, block, pool=POOL, squid=SQUID):
+    """
+    Read how much SQUID backs the LP supply at `block`.
+
+    Returns:
+        tuple: (SQUID held by the pool, LP total supply)
+    """
+    selectors = {
+        "coins0": "0xc6610657" + "0" * 64,
+        "coins1": "0xc6610657" + "0" * 63 + "1",
+        "balances0": "0x4903b0d1" + "0" * 64,
+        "balances1": "0x4903b0d1" + "0" * 63 + "1",
+        "totalSupply": "0x18160ddd",
+    }
+    results = dict(
+        zip(
+            selectors,
+            client.batch(
+                [
+                    ("eth_call", [{"to": pool, "data": data}, hex(block)])
+                    for data in selectors.values()
+                ]
+            ),
+        )
+    )
+    coins = [
+        decode(["address"], bytes.fromhex(results[f"coins{i}"][2:]))[0].lower()
+        for i in range(2)
+    ]
+    i = coins.index(squid.lower())
+    squid_balance = int(results[f"balances{i}"], 16)
+    lp_supply = int(results["totalSupply"], 16)
+    return squid_balance, lp_supply
+
+
+def squid_weights(columns, pool_squid, lp_supply, component_weights=None):
+    """
+    SQUID-equivalent holdings of every address, scaled by the LP supply.
+
+    LP, gauge and Convex positions are all 1:1 claims on pool LP tokens, each
+    worth pool_squid / lp_supply SQUID. Multiplying through by lp_supply keeps
+    the weights exact integers without changing their proportions.
+
+    `component_weights` maps component names to multipliers, 1 if missing.
+    They are read as exact decimals and every component is scaled by their
+    common denominator, so the weights stay integers.
+    """
+    if component_weights is None:
+        lp_total = columns["lp"] + columns["gauge"] + columns["convex"]
+        return columns["squid"] * lp_supply + lp_total * pool_squid
+
+    multipliers = {
+        name: Fraction(str(component_weights.get(name, 1))) for name in COMPONENTS
+    }
+    if any(m < 0 for m in multipliers.values()):
+        raise ValueError(f"Negative component weight in {component_weights}")
+    scale = math.lcm(*(m.denominator for m in multipliers.values()))
+    prices = {name: pool_squid for name in COMPONENTS}
+    prices["squid"] = lp_supply
+
+    weights = 0
+    for name, m in multipliers.items():
+        weights = weights + columns[name] * (
+            prices[name] * m.numerator * (scale // m.denominator)
+        )
+    return weights
+
+
+def find_wrappers(addresses, columns, wrapped=WRAPPED):
+    """
+    Holders whose balance backs a whole wrapped component.
+
+    A wrapper holds exactly the tokens its depositors are credited for, so
+    its balance in the backing component equals the wrapped component's
+    total. Catches wrappers missing from EXCLUDED.
+
+    Returns:
+        set: Lowercase addresses
+    """
+    found = set()
+    for name, backing in wrapped.items():
+        total = columns[name].sum()
+        if total == 0:
+            continue
+        for i in np.flatnonzero((columns[backing] == total).astype(bool)):
+            found.add(addresses[i].lower())
+    return found
+
+
+def excluded_addresses(addresses, columns, excluded=EXCLUDED):
+    """EXCLUDED plus every wrapper found in the snapshot."""
+    return set(excluded) | find_wrappers(addresses, columns)
+
+
+def argsort_exact(values, descending=False):
+    """
+    Stable argsort of exact integers (object dtype), sorted as floats.
+
+    Rounding to float keeps order, so the float sort can only misplace
+    distinct values that round to the same float. The result is checked
+    against the exact values and Python's sort is used if that happened.
+
+    Returns:
+        np.ndarray: Indices that sort `values`, ties in input order
+    """
+    keys = values.astype(float)
+    order = np.argsort(-keys if descending else keys, kind="stable")
+    # Only neighbours with equal floats can be out of order
+    sorted_keys = keys[order]
+    ties = np.flatnonzero(sorted_keys[1:] == sorted_keys[:-1])
+    first, second = values[order[ties]], values[order[ties + 1]]
+    if not (first < second if descending else first > second).any():
+        return order
+    exact_values = values.tolist()
+    return np.array(
+        sorted(
+            range(len(exact_values)),
+            key=exact_values.__getitem__,
+            reverse=descending,
+        ),
+        dtype=np.intp,
+    )
+
+
+def largest_remainder(weights, budget):
+    """
+    Split `budget` proportionally to `weights` in whole wei.
+
+    Every share is rounded down, then the wei left over go one each to the
+    largest remainders, so the amounts sum to exactly `budget`.
+
+    Args:
+        weights (np.ndarray): Non-negative integer weights (object dtype)
+        budget (int): Amount to distribute
+
+    Returns:
+        np.ndarray: Integer amounts (object dtype), summing to `budget`
+    """
+    total = weights.sum()
+    if total == 0:
+        raise ValueError("Cannot allocate over zero total weight")
+
+    scaled = weights * budget
+    amounts = scaled // total
+    remainders = scaled - amounts * total
+
+    shortfall = budget - amounts.sum()
+    if shortfall:
+        # Stable, so tied remainders keep their input order
+        order = argsort_exact(remainders, descending=True)
+        amounts[order[:shortfall]] += 1
+    return amounts
+
+
+def _count_below(weights, num, den, level):
+    """Number of sorted `weights` w with w * num / den < level."""
+    if num == 0:
+        return len(weights) if level > 0 else 0
+    # w * num < level * den  <=>  w < ceil(level * den / num) for integer w
+    return bisect_left(weights, -(-level * den // num))
+
+
+def _level_total(weights, prefix, num, den, cap, floor):
+    """den * sum of clamp(w * num / den, floor, cap) over sorted `weights`."""
+    n = len(weights)
+    lo = _count_below(weights, num, den, floor)
+    hi = n if cap is None else max(lo, _count_below(weights, num, den, cap))
+    return (
+        lo * floor * den + (n - hi) * (cap or 0) * den + (prefix[hi] - prefix[lo]) * num
+    )
+
+
+def water_fill(weights, budget, cap=None, floor=0):
+    """
+    Split `budget` in proportion to `weights`, clamped to [floor, cap] each.
+
+    Finds the level L where sum(clamp(L * w, floor, cap)) == budget: holders
+    whose share would pass the cap get the cap, those under the floor get the
+    floor, and the rest share what is left in proportion to their weights.
+    The sum is monotone in L and only changes slope at the breakpoints
+    floor / w and cap / w, so after one sort of the weights the level is
+    found by binary search over those breakpoints, with prefix sums giving
+    each evaluation in O(log n). All arithmetic is exact; the proportional
+    band is rounded with largest_remainder.
+
+    Args:
+        weights (np.ndarray): Non-negative integer weights (object dtype)
+        budget (int): Amount to distribute
+        cap (int, optional): Maximum amount per holder
+        floor (int): Minimum amount per holder
+
+    Returns:
+        np.ndarray: Integer amounts (object dtype), summing to `budget`
+    """
+    n = len(weights)
+    if cap is not None and cap < floor:
+        raise ValueError(f"Cap {cap} is below floor {floor}")
+    if budget < n * floor:
+        raise ValueError(f"Budget {budget} cannot pay the floor to {n} holders")
+
+    order = argsort_exact(weights)
+    sorted_weights = weights[order].tolist()
+    prefix = [0, *accumulate(sorted_weights)]
+
+    # Zero-weight holders never rise above the floor
+    zeros = bisect_left(sorted_weights, 1)
+    if cap is not None and budget > zeros * floor + (n - zeros) * cap:
+        raise ValueError(f"Budget {budget} exceeds the cap for {n} holders")
+    if zeros == n and budget > n * floor:
+        raise ValueError("Cannot allocate over zero total weight")
+
+    def total(level):
+        return _level_total(sorted_weights, prefix, *level, cap, floor)
+
+    # Breakpoints are the fractions bound / w for each nonzero weight w.
+    # Ascending weights make them descending in level, so the sum falls
+    # along them and the highest level with sum <= budget is the first such
+    # index.
+    bounds = [floor] if cap is None else [floor, cap]
+
+    level = (0, 1)
+    for bound in bounds:
+        lo, hi = zeros, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if total((bound, sorted_weights[mid])) <= budget * sorted_weights[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        if lo < n:
+            num, den = bound, sorted_weights[lo]
+            if num * level[1] > level[0] * den:
+                level = (num, den)
+
+    # Just above `level` the clamped sets are fixed: w * level < floor gets
+    # the floor, w * level >= cap gets the cap. Zero weights always get the
+    # floor, even when it is zero, so the proportional band has weight.
+    num, den = level
+    lo = max(zeros, _count_below(sorted_weights, num, den, floor))
+    hi = n if cap is None else max(lo, _count_below(sorted_weights, num, den, cap))
+    remaining = budget - lo * floor - (n - hi) * (cap or 0)
+
+    amounts = np.empty(n, dtype=object)
+    amounts[order[:lo]] = floor
+    amounts[order[hi:]] = cap
+    if hi > lo:
+        amounts[order[lo:hi]] = largest_remainder(
+            np.array(sorted_weights[lo:hi], dtype=object), remaining
+        )
+    elif remaining:
+        raise ValueError(f"{remaining} left over with every holder clamped")
+    return amounts
+
+
+def eligible_mask(addresses, weights, min_weight=0, excluded=EXCLUDED):
+    """Boolean mask of holders that take part in the split."""
+    excluded_mask = np.fromiter(
+        (addr.lower() in excluded for addr in addresses), bool, len(addresses)
+    )
+    return (weights > min_weight).astype(bool) & ~excluded_mask
+
+
+def write_airdrop_json(path, allocations):
+    """
+    Write [address, amount] rows in the airdrop_balances.json layout.
+
+    Like the hand-edited file, every row ends in a comma so single rows can
+    be commented out with //; whitelist.read_json_table reads it back.
+    """
+    with open(path, "w") as f:
+        f.write("[\n")
+        for addr, amount in allocations:
+            f.write(f'["{addr}", "{amount}"],\n')
+        f.write("]\n")
+
+
+def read_airdrop_json(path):
+    """
+    Read [address, amount] rows back from an airdrop_balances.json file.
+
+    Rows commented out with // are skipped, the same way
+    whitelist.read_json_table treats them.
+
+    Returns:
+        list: [address, amount] pairs in file order, amounts as int
+    """
+    row = re.compile(r'^\s*(//)?\s*\["(0x[0-9a-fA-F]{40})", "(\d+)"\]')
+    allocations = []
+    with open(path, "r") as f:
+        for line in f:
+            match = row.match(line)
+            if match and not match.group(1):
+                allocations.append([match.group(2), int(match.group(3))])
+    return allocations
+
+
+def write_airdrop_md(path, allocations):
+    """Write the allocation as an airdrop*.md table, amounts to 0.1 SQUILL."""
+    with open(path, "w") as f:
+        f.write("| address | value |\n| --- | --- |\n")
+        for addr, amount in allocations:
+            tenths = (amount + 5 * 10**16) // 10**17
+            f.write(f"| {addr} | {tenths // 10:,}.{tenths % 10} |\n")
+
+
+def allocate(
+    addresses,
+    columns,
+    pool_squid,
+    lp_supply,
+    budget,
+    min_squid=0,
+    cap=None,
+    floor=0,
+    component_weights=None,
+):
+    """
+    Compute the round's allocation from a balance snapshot.
+
+    Args:
+        addresses (list): Holder addresses
+        columns (dict): Component balance arrays from load_balances
+        pool_squid (int): SQUID held by the pool at the snapshot block
+        lp_supply (int): LP total supply at the snapshot block
+        budget (int): Round budget in wei
+        min_squid (int): Minimum SQUID-equivalent holding to qualify
+        cap (int, optional): Maximum allocation per address
+        floor (int): Minimum allocation per address
+        component_weights (dict, optional): Multiplier of each component in
+            the split, see squid_weights
+
+    Returns:
+        list: [address, amount] pairs sorted by amount, largest first
+    """
+    weights = squid_weights(columns, pool_squid, lp_supply)
+    mask = eligible_mask(
+        addresses,
+        weights,
+        min_squid * lp_supply,
+        excluded_addresses(addresses, columns),
+    )
+    if component_weights is not None:
+        weights = squid_weights(columns, pool_squid, lp_supply, component_weights)
+
+    amounts = water_fill(weights[mask], budget, cap, floor)
+    eligible = np.asarray(addresses, dtype=object)[mask]
+
+    order = argsort_exact(amounts, descending=True)
+    return [
+        [addr, amount]
+        for addr, amount in zip(eligible[order].tolist(), amounts[order].tolist())
+    ]
+
+
+def main():
+    addresses, columns = load_balances(balance_file)
+    pool_squid, lp_supply = get_pool_state(JsonRpcClient(RPC_URL), block)
+    print(
+        f"Pool holds {pool_squid / 10**18:,.2f} SQUID "
+        f"for {lp_supply / 10**18:,.2f} LP at block {block}"
+    )
+
+    allocations = allocate(
+        addresses,
+        columns,
+        pool_squid,
+        lp_supply,
+        ROUND_BUDGET,
+        MIN_SQUID,
+        ALLOCATION_CAP,
+        ALLOCATION_FLOOR,
+        COMPONENT_WEIGHTS,
+    )
+    total = sum(amount for _, amount in allocations)
+    assert total == ROUND_BUDGET, f"allocated {total}, budget {ROUND_BUDGET}"
+
+    write_airdrop_json(output_json, allocations)
+    write_airdrop_md(output_md, allocations)
+    print(
+        f"Allocated {total / 10**18:,.2f} to {len(allocations)} addresses, "
+        f"saved to {output_json} and {output_md}"
+    )
+
+
+if __name__ == "__main__":
+    main()
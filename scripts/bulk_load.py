@@ -0,0 +1,492 @@
+import math
+import os
+import time
+
+import boa
+from allocate import read_airdrop_json
+from compile_cache import load_partial
+from dotenv import load_dotenv
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import keccak
+from gas import commit, fresh_env
+from packing import encode_add_bulk_packed, pack_record
+from rpc import JsonRpcClient, RPCError
+from transfer_logs import iter_logs
+
+# Configuration
+FORK = True
+
+# Load through add_bulk_packed, half the calldata of add_bulk_addresses.
+# Only SquillDropBatch deployments have it, not the round 3 contract below.
+PACKED = False
+
+load_dotenv()
+RPC_URL = os.getenv(
+    "RPC_URL", f"https://eth-mainnet.g.alchemy.com/v2/{os.getenv('ALCHEMY_KEY')}"
+)
+PRIVATE_KEY = os.getenv("PRIVATE_KEY")
+
+AIRDROP = "0x812e75dc969369C23Eff643C38ecfe43e48E2c36"
+input_file = "scripts/airdrop_balances.json"
+
+# Gas each transaction is packed up to, well below the block gas limit
+TARGET_GAS = 15_000_000
+MAX_ENTRIES = 10_000  # DynArray bound of add_bulk_addresses
+GAS_HEADROOM = 1.2
+
+MAX_IN_FLIGHT = 8
+POLL_INTERVAL = 2.0
+
+# A transaction without a receipt this long after broadcast is sent again,
+# and given up on after MAX_REBROADCASTS resends
+RECEIPT_TIMEOUT = 180.0
+MAX_REBROADCASTS = 3
+
+# Fee caps of a resent transaction are raised by at least this factor, above
+# the 10% nodes require to replace a pending transaction
+FEE_BUMP = 1.125
+
+TX_BASE_GAS = 21_000
+ADD_BULK_SELECTOR = keccak(text="add_bulk_addresses(address[],uint256[])")[:4]
+ELIGIBLE_SELECTOR = keccak(text="eligible_addresses(address)")[:4]
+# Logged on every claim, user and amount unindexed
+CLAIM_TOPIC = "0x" + keccak(text="Claim(address,uint256)").hex()
+
+
+def calldata_gas(data):
+    """Intrinsic calldata cost: 4 gas per zero byte, 16 per non-zero byte."""
+    zeros = data.count(0)
+    return 4 * zeros + 16 * (len(data) - zeros)
+
+
+def encode_add_bulk(entries, packed=PACKED):
+    """Calldata of add_bulk_packed or add_bulk_addresses for [address, amount] entries."""
+    if packed:
+        return encode_add_bulk_packed(entries)
+    return ADD_BULK_SELECTOR + encode(
+        ["address[]", "uint256[]"],
+        [[addr for addr, _ in entries], [amount for _, amount in entries]],
+    )
+
+
+def entry_calldata_gas(addr, amount, packed=PACKED):
+    """Calldata cost one entry adds: a packed record, or an address and an amount word."""
+    if packed:
+        return calldata_gas(pack_record(addr, amount))
+    return calldata_gas(encode(["address", "uint256"], [addr, amount]))
+
+
+def airdrop_contract(packed=PACKED):
+    """SquillDropBatch for packed loading, the deployed round 3 contract otherwise."""
+    if packed:
+        return load_partial("contracts/SquillDropBatch.vy")
+    return load_partial("contracts/SquillDrop3.vy")
+
+
+def add_bulk(drop, entries, packed=PACKED):
+    """
+    Call the bulk loading function of a SquillDrop3 or SquillDropBatch contract.
+
+    add_bulk_packed reads its records from raw calldata, which the contract
+    ABI cannot express, so it is sent as a raw call from the pranked sender.
+
+    Returns:
+        int: Execution gas of the call
+    """
+    if packed:
+        return boa.env.raw_call(
+            drop.address, sender=boa.env.eoa, data=encode_add_bulk_packed(entries)
+        ).get_gas_used()
+    drop.add_bulk_addresses(
+        [addr for addr, _ in entries], [amount for _, amount in entries]
+    )
+    return drop._computation.get_gas_used()
+
+
+def measure_entry_gas(sample_size=100, packed=PACKED):
+    """
+    Measure the execution gas of bulk loading on a scratch deployment.
+
+    Loads two batches of fresh addresses and fits a line through the gas
+    used, so the fixed part of a call and the cost per entry are separated.
+    Calldata is left out and costed per entry by the planner. Every entry
+    writes a fresh slot and every call starts from committed state, so the
+    numbers match a real load.
+
+    Returns:
+        tuple: (fixed gas per call, gas per entry)
+    """
+    with fresh_env():
+        drop = airdrop_contract(packed).deploy(boa.env.generate_address())
+        used = []
+        for size in (sample_size, 2 * sample_size):
+            commit()
+            used.append(
+                add_bulk(
+                    drop,
+                    [[boa.env.generate_address(), 10**18] for _ in range(size)],
+                    packed,
+                )
+            )
+
+    per_entry = -(-(used[1] - used[0]) // sample_size)
+    return used[0] - per_entry * sample_size, per_entry
+
+
+def plan_chunks(
+    entries,
+    fixed_gas,
+    entry_gas,
+    target_gas=TARGET_GAS,
+    max_entries=MAX_ENTRIES,
+    packed=PACKED,
+):
+    """
+    Split entries into bulk loading calls that stay under `target_gas`.
+
+    Args:
+        entries (list): [address, amount] pairs
+        fixed_gas (int): Execution gas of a call, from measure_entry_gas
+        entry_gas (int): Execution gas per entry, from measure_entry_gas
+        target_gas (int): Gas budget per transaction
+        max_entries (int): Most entries a single call accepts
+        packed (bool): Plan for add_bulk_packed instead of add_bulk_addresses
+
+    Returns:
+        list: (entries, estimated gas) per transaction
+    """
+    overhead = TX_BASE_GAS + fixed_gas + calldata_gas(encode_add_bulk([], packed))
+    chunks = []
+    current, gas = [], overhead
+    for addr, amount in entries:
+        cost = entry_gas + entry_calldata_gas(addr, amount, packed)
+        if current and (gas + cost > target_gas or len(current) == max_entries):
+            chunks.append((current, gas))
+            current, gas = [], overhead
+        current.append([addr, amount])
+        gas += cost
+    if current:
+        chunks.append((current, gas))
+    return chunks
+
+
+def eligible_amounts(client, airdrop, addrs, batch_size=500):
+    """Read eligible_addresses of every address in batched eth_calls."""
+    values = client.batched(
+        [
+            (
+                "eth_call",
+                [
+                    {
+                        "to": airdrop,
+                        "data": "0x"
+                        + (ELIGIBLE_SELECTOR + encode(["address"], [addr])).hex(),
+                    },
+                    "latest",
+                ],
+            )
+            for addr in addrs
+        ],
+        batch_size=batch_size,
+    )
+    return [int(value, 16) for value in values]
+
+
+def deployment_block(client, address):
+    """First block with code at `address`, by binary search. Needs an archive node."""
+    lo, hi = 0, client.block_number()
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if client.call("eth_getCode", [address, hex(mid)]) in ("0x", ""):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def claimed_addresses(client, airdrop, from_block=None, to_block=None):
+    """Lowercase addresses that have a Claim event on `airdrop`."""
+    if from_block is None:
+        from_block = deployment_block(client, airdrop)
+    if to_block is None:
+        to_block = client.block_number()
+    return {
+        "0x" + log["data"][26:66].lower()
+        for log in iter_logs(client, [airdrop], [CLAIM_TOPIC], from_block, to_block)
+    }
+
+
+def pending_entries(client, airdrop, entries, batch_size=500):
+    """
+    Entries that were never loaded.
+
+    Reads eligible_addresses of every entry in bulk, so an interrupted load
+    picks up where it stopped. A claimed entry reads zero again, so addresses
+    with a Claim event are skipped; loading them again would let them claim
+    twice. Entries stored with another amount are reported, not overwritten.
+    """
+    stored = eligible_amounts(
+        client, airdrop, [addr for addr, _ in entries], batch_size
+    )
+    claimed = claimed_addresses(client, airdrop)
+
+    pending, conflicts = [], []
+    for (addr, amount), value in zip(entries, stored):
+        if value == 0 and addr.lower() not in claimed:
+            pending.append([addr, amount])
+        elif value not in (0, amount):
+            conflicts.append(addr)
+
+    print(f"{len(claimed)} addresses already claimed")
+    if conflicts:
+        print(
+            f"{len(conflicts)} entries are stored with a different amount and "
+            f"left as they are, e.g. {conflicts[:5]}"
+        )
+    return pending
+
+
+def suggest_fees(client):
+    """EIP-1559 fee caps allowing the base fee to double before inclusion."""
+    base_fee, priority_fee = client.batch(
+        [("eth_getBlockByNumber", ["latest", False]), ("eth_maxPriorityFeePerGas", [])]
+    )
+    priority_fee = int(priority_fee, 16)
+    return 2 * int(base_fee["baseFeePerGas"], 16) + priority_fee, priority_fee
+
+
+def send_transactions(
+    client,
+    account,
+    to,
+    transactions,
+    max_in_flight=MAX_IN_FLIGHT,
+    poll_interval=POLL_INTERVAL,
+    receipt_timeout=RECEIPT_TIMEOUT,
+    max_rebroadcasts=MAX_REBROADCASTS,
+):
+    """
+    Send transactions with consecutive nonces and wait for their receipts.
+
+    Up to `max_in_flight` transactions are signed locally and submitted in one
+    batch, without waiting for earlier ones to be mined. Receipts of all
+    pending transactions are polled in one batched request per interval.
+
+    Args:
+        client (JsonRpcClient): Node to send to
+        account (LocalAccount): Owner account signing the transactions
+        to (str): Contract called by every transaction
+        transactions (list): (calldata, estimated gas) per transaction
+        max_in_flight (int): Unconfirmed transactions allowed at once
+        poll_interval (float): Seconds between receipt polls
+        receipt_timeout (float): Seconds without a receipt before a
+            transaction is broadcast again with higher fees, e.g. after a
+            node dropped it or the base fee rose above its cap
+        max_rebroadcasts (int): Resends before giving up with TimeoutError
+    """
+    chain_id, nonce = client.batch(
+        [("eth_chainId", []), ("eth_getTransactionCount", [account.address, "pending"])]
+    )
+    chain_id, nonce = int(chain_id, 16), int(nonce, 16)
+    max_fee, priority_fee = suggest_fees(client)
+
+    # tx_id -> [transaction, hashes of every broadcast, last broadcast time, resends]
+    pending = {}
+    next_tx = 0
+    while next_tx < len(transactions) or pending:
+        signed = []
+        while (
+            next_tx < len(transactions) and len(pending) + len(signed) < max_in_flight
+        ):
+            data, gas = transactions[next_tx]
+            tx = {
+                "type": 2,
+                "chainId": chain_id,
+                "nonce": nonce,
+                "to": to,
+                "value": 0,
+                "data": data,
+                "gas": int(gas * GAS_HEADROOM),
+                "maxFeePerGas": max_fee,
+                "maxPriorityFeePerGas": priority_fee,
+            }
+            signed.append((next_tx, tx, sign(account, tx)))
+            nonce += 1
+            next_tx += 1
+
+        if signed:
+            hashes = client.batch(
+                [("eth_sendRawTransaction", [raw]) for _, _, raw in signed]
+            )
+            for (tx_id, tx, _), tx_hash in zip(signed, hashes):
+                pending[tx_id] = [tx, [tx_hash], time.monotonic(), 0]
+                print(f"Sent transaction {tx_id + 1}/{len(transactions)} in {tx_hash}")
+
+        time.sleep(poll_interval)
+        for tx_id, (tx_hash, receipt) in poll_receipts(client, pending).items():
+            if receipt is None:
+                tx_hash, receipt = rebroadcast(
+                    client,
+                    account,
+                    tx_id,
+                    pending[tx_id],
+                    receipt_timeout,
+                    max_rebroadcasts,
+                )
+                if receipt is None:
+                    continue
+            del pending[tx_id]
+            if int(receipt["status"], 16) != 1:
+                raise RuntimeError(f"Transaction {tx_id + 1} reverted in {tx_hash}")
+            print(
+                f"Transaction {tx_id + 1} mined in block {int(receipt['blockNumber'], 16)}, "
+                f"{int(receipt['gasUsed'], 16):,} gas"
+            )
+
+
+def sign(account, tx):
+    """Sign `tx` and return the raw transaction as hex."""
+    return "0x" + bytes(account.sign_transaction(tx).raw_transaction).hex()
+
+
+def poll_receipts(client, pending):
+    """
+    Look up the receipts of every broadcast of each pending transaction.
+
+    Any of a transaction's broadcasts may be the one mined, so all of their
+    hashes are asked for in one batched request.
+
+    Returns:
+        dict: tx_id -> (hash, receipt), (None, None) if none is mined yet
+    """
+    queries = [
+        (tx_id, tx_hash)
+        for tx_id, (_, hashes, _, _) in pending.items()
+        for tx_hash in hashes
+    ]
+    receipts = client.batch(
+        [("eth_getTransactionReceipt", [tx_hash]) for _, tx_hash in queries]
+    )
+    found = {tx_id: (None, None) for tx_id in pending}
+    for (tx_id, tx_hash), receipt in zip(queries, receipts):
+        if receipt is not None:
+            found[tx_id] = (tx_hash, receipt)
+    return found
+
+
+def rebroadcast(client, account, tx_id, state, receipt_timeout, max_rebroadcasts):
+    """
+    Resend a transaction whose receipt is overdue, with higher fee caps.
+
+    Nodes drop transactions from their mempool without notice, and one
+    whose fee cap fell below a rising base fee is never mined, so waiting
+    for the receipt alone could last forever. The fees are raised to the
+    current suggestion, and at least by FEE_BUMP so the node accepts the
+    replacement. `state` is the pending entry [transaction, hashes, last
+    broadcast time, resends so far] and is updated in place.
+
+    A node answers "nonce too low" when one of the broadcasts was mined
+    since the last poll, so the receipts are looked up again before that
+    is treated as an error.
+
+    Returns:
+        tuple: (hash, receipt) of a broadcast found mined, else (None, None)
+    """
+    tx, hashes, sent_at, resends = state
+    if time.monotonic() - sent_at < receipt_timeout:
+        return None, None
+    if resends >= max_rebroadcasts:
+        raise TimeoutError(
+            f"Transaction {tx_id + 1} not mined after {resends} resends: {hashes[-1]}"
+        )
+
+    max_fee, priority_fee = suggest_fees(client)
+    tx = {
+        **tx,
+        "maxFeePerGas": max(max_fee, math.ceil(tx["maxFeePerGas"] * FEE_BUMP)),
+        "maxPriorityFeePerGas": max(
+            priority_fee, math.ceil(tx["maxPriorityFeePerGas"] * FEE_BUMP)
+        ),
+    }
+    print(
+        f"Transaction {tx_id + 1} not mined yet, broadcasting it again with a "
+        f"{tx['maxFeePerGas'] / 10**9:.2f} gwei fee cap"
+    )
+    try:
+        tx_hash = client.call("eth_sendRawTransaction", [sign(account, tx)])
+    except RPCError as e:
+        message = e.message.lower()
+        if "nonce too low" in message:
+            tx_hash, receipt = poll_receipts(client, {tx_id: state})[tx_id]
+            if receipt is None:
+                raise RuntimeError(
+                    f"Nonce {tx['nonce']} of transaction {tx_id + 1} was used by "
+                    f"a transaction other than {hashes}"
+                ) from e
+            return tx_hash, receipt
+        # The replacement is already in the node's mempool
+        if "known" not in message:
+            raise
+        tx_hash = None
+
+    state[0] = tx
+    if tx_hash is not None and tx_hash not in hashes:
+        hashes.append(tx_hash)
+    state[2:] = [time.monotonic(), resends + 1]
+    return None, None
+
+
+def send_chunks(client, account, airdrop, chunks, packed=PACKED, **kwargs):
+    """Send the output of plan_chunks with send_transactions."""
+    send_transactions(
+        client,
+        account,
+        airdrop,
+        [(encode_add_bulk(entries, packed), gas) for entries, gas in chunks],
+        **kwargs,
+    )
+
+
+def load_on_fork(airdrop, chunks, packed=PACKED):
+    """Run the planned calls in-process against a boa fork, as the owner."""
+    drop = airdrop_contract(packed).at(airdrop)
+    with boa.env.prank(drop.owner()):
+        for i, (entries, estimate) in enumerate(chunks):
+            boa.env.reset_gas_used()
+            used = add_bulk(drop, entries, packed)
+            print(
+                f"Chunk {i + 1}/{len(chunks)}: {len(entries)} entries, {used:,} gas (estimated {estimate:,})"
+            )
+    return drop
+
+
+def main():
+    entries = read_airdrop_json(input_file)
+    client = JsonRpcClient(RPC_URL)
+
+    entries = pending_entries(client, AIRDROP, entries)
+    print(f"{len(entries)} entries left to load")
+    if not entries:
+        return
+
+    fixed_gas, entry_gas = measure_entry_gas()
+    chunks = plan_chunks(entries, fixed_gas, entry_gas)
+    print(
+        f"Measured {entry_gas:,} gas per entry and {fixed_gas:,} per call, "
+        f"planned {len(chunks)} transactions of up to {TARGET_GAS:,} gas"
+    )
+
+    if FORK:
+        boa.fork(RPC_URL)
+        drop = load_on_fork(AIRDROP, chunks)
+        loaded = sum(
+            drop.eligible_addresses(addr) == amount for addr, amount in entries
+        )
+        print(f"Fork check: {loaded}/{len(entries)} entries stored")
+    else:
+        send_chunks(client, Account.from_key(PRIVATE_KEY), AIRDROP, chunks)
+
+
+if __name__ == "__main__":
+    main()
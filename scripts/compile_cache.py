@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+import threading
+
+import boa
+import vyper
+from boa.contracts.vyper.vyper_contract import VyperDeployer
+from vyper.compiler.output import build_layout_output, build_solc_json
+
+# Shared by tests and scripts, so both always resolve to the repo root
+CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", ".cache", "contracts")
+
+IMPORT_PATTERN = re.compile(
+    r"^\s*(?:from\s+([\w.]+)\s+)?import\s+([\w.]+)", re.MULTILINE
+)
+MODULE_SUFFIXES = (".vy", ".vyi", ".json")
+
+# CompilerData already loaded in this process, by source hash and location
+_loaded = {}
+_lock = threading.Lock()
+
+
+def _resolve_import(module, base_dir):
+    """
+    File of an imported module, or None for the compiler's builtin interfaces.
+
+    Looks next to the importing file first, then in the working directory,
+    like the default search path of the compiler.
+    """
+    relative = module.lstrip(".").replace(".", os.sep)
+    for root in (base_dir, os.getcwd()):
+        for suffix in MODULE_SUFFIXES:
+            candidate = os.path.join(root, relative + suffix)
+            if os.path.isfile(candidate):
+                return os.path.normpath(candidate)
+    return None
+
+
+def _imported_files(path, source):
+    base_dir = os.path.dirname(path)
+    files = []
+    for package, name in IMPORT_PATTERN.findall(source):
+        # `from a import b` imports either module a/b or a member of module a
+        candidates = [f"{package}.{name}", package] if package else [name]
+        for module in candidates:
+            resolved = _resolve_import(module, base_dir)
+            if resolved:
+                files.append(resolved)
+                break
+    return files
+
+
+def source_hash(path):
+    """
+    Hash of a contract, every module it imports and the compiler version.
+
+    Builtin interfaces such as `ethereum.ercs` ship with the compiler and are
+    covered by its version. Files are named relative to the contract's
+    directory, so the hash does not depend on where the repo is checked out.
+
+    Args:
+        path (str): Contract source file
+
+    Returns:
+        str: Hex digest identifying the compiled artifact
+    """
+    digest = hashlib.sha256(f"vyper {vyper.__version__}\n".encode())
+    base_dir = os.path.dirname(os.path.abspath(path))
+    seen = set()
+    pending = [os.path.normpath(path)]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        with open(current) as f:
+            source = f.read()
+        name = os.path.relpath(os.path.abspath(current), base_dir)
+        digest.update(f"{name}\n{len(source)}\n{source}".encode())
+        pending.extend(sorted(_imported_files(current, source), reverse=True))
+    return digest.hexdigest()
+
+
+def _artifact(key, suffix):
+    return os.path.join(CACHE_DIR, f"{key}{suffix}")
+
+
+def _write_atomic(path, data):
+    # Tests may run in parallel processes; a rename never leaves half a file
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def compiler_data(path):
+    """
+    Compiled contract, from memory, from the disk cache or compiled once.
+
+    CompilerData holds the absolute paths it was compiled from, which end up
+    in error messages and profiles. A pickle compiled at another location,
+    such as a copy of the repo, is compiled again rather than served with
+    stale paths.
+
+    Returns:
+        tuple: (source hash, vyper CompilerData with bytecode generated)
+    """
+    key = source_hash(path)
+    location = os.path.realpath(path)
+    with _lock:
+        if (key, location) in _loaded:
+            return key, _loaded[key, location]
+
+        artifact = _artifact(key, ".pickle")
+        data = None
+        if os.path.exists(artifact):
+            with open(artifact, "rb") as f:
+                compiled_at, data = pickle.load(f)
+            if compiled_at != location:
+                data = None
+        if data is None:
+            data = boa.load_partial(path).compiler_data
+            # Generate the bytecode now so it is part of the pickle
+            _ = data.bytecode, data.bytecode_runtime
+            _write_atomic(artifact, pickle.dumps((location, data)))
+
+        _loaded[key, location] = data
+    return key, data
+
+
+def load_partial(path):
+    """Drop-in for boa.load_partial that compiles each source version once."""
+    _, data = compiler_data(path)
+    deployer_class = getattr(boa.env, "deployer_class", VyperDeployer)
+    return deployer_class(data, filename=path)
+
+
+def _cached_json(path, suffix, build):
+    key, data = compiler_data(path)
+    artifact = _artifact(key, suffix)
+    if os.path.exists(artifact):
+        with open(artifact) as f:
+            return json.load(f)
+    output = json.dumps(build(data))
+    _write_atomic(artifact, output.encode())
+    return json.loads(output)
+
+
+def solc_json(path):
+    """Standard JSON input for block explorer verification (`vyper -f solc_json`)."""
+    return _cached_json(path, ".solc.json", build_solc_json)
+
+
+def storage_layout(path):
+    """Storage layout of a contract (`vyper -f layout`)."""
+    return _cached_json(path, ".layout.json", build_layout_output)
@@ -1,6 +1,7 @@
 import os
 
 import boa
+from compile_cache import load_partial
 from dotenv import load_dotenv
 from helpers import get_constructor_arguments, save_deployment_info
 from load_account import load_account
@@ -8,6 +9,7 @@ from load_account import load_account
 # Configuration
 FORK = True
 NETWORK = "ETHEREUM"
+CONTRACT_SOURCE = "contracts/SquillDrop.vy"
 
 # Load environment variables
 load_dotenv()
@@ -18,7 +20,7 @@ RPC_URL = f"https://eth-mainnet.g.alchemy.com/v2/{os.getenv('ALCHEMY_KEY')}"
 # Main deployment logic
 if FORK:
     boa.fork(RPC_URL)
-    token_contract = boa.load_partial("contracts/mocks/MockToken.vy")
+    token_contract = load_partial("contracts/mocks/MockToken.vy")
     reward = token_contract.deploy("Test Token", "TEST", 18)
     reward._mint_for_testing(boa.env.eoa, 1_776_000 * 10**18)
     print(f"Minted {boa.env.eoa} {reward.balanceOf(boa.env.eoa)/10**18:,.2f}")
@@ -40,7 +42,7 @@ print(
 
 # Deploy contract
 print(f"\nDeploying with reward token {REWARD_TOKEN}")
-reward_contract = boa.load_partial("contracts/SquillDrop.vy")
+reward_contract = load_partial(CONTRACT_SOURCE)
 airdrop = reward_contract.deploy(REWARD_TOKEN)
 print(f"Deployed to {airdrop.address}\n")
 
@@ -60,6 +62,7 @@ try:
         constructor_args=constructor_args,
         airdrop=airdrop,
         deployment_params=deployment_params,
+        contract_source=CONTRACT_SOURCE,
     )
 
 except Exception as e:
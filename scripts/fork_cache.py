@@ -0,0 +1,280 @@
+import sqlite3
+import threading
+
+from boa.rpc import RPC
+from eth_utils import keccak
+
+DEFAULT_CACHE_FILE = "fork_state_cache.db"
+
+# How many candidate storage slots are probed for a token's balance mapping
+MAX_PROBED_SLOT = 20
+
+
+def to_int(value):
+    """Block numbers and slots arrive as hex strings or ints."""
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+def mapping_slot(slot, key, layout):
+    """
+    Storage slot of `mapping[key]` for a mapping declared at `slot`.
+
+    Solidity hashes key then slot, Vyper hashes slot then key.
+    """
+    key_word = bytes(12) + bytes.fromhex(key[2:])
+    slot_word = slot.to_bytes(32, "big")
+    if layout == "vyper":
+        return int.from_bytes(keccak(slot_word + key_word), "big")
+    return int.from_bytes(keccak(key_word + slot_word), "big")
+
+
+class StateCache:
+    """
+    Persistent account and storage values keyed by (chain, block, address, slot).
+
+    Values read at a fixed block never change, so they can be served from disk
+    on every later run. Account fields other than storage use the pseudo-slots
+    "balance", "nonce" and "code".
+
+    Args:
+        path (str): SQLite database file
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS state ("
+            "chain_id INTEGER, block INTEGER, address TEXT, slot TEXT, value TEXT, "
+            "PRIMARY KEY (chain_id, block, address, slot))"
+        )
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS balance_slots ("
+            "chain_id INTEGER, token TEXT, slot INTEGER, layout TEXT, "
+            "PRIMARY KEY (chain_id, token))"
+        )
+        self.db.commit()
+
+    def get(self, chain_id, block, address, slot):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM state WHERE chain_id=? AND block=? AND address=? AND slot=?",
+                (chain_id, block, address.lower(), str(slot)),
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, chain_id, block, keys):
+        """Look up (address, slot) pairs; returns {(address, slot): value} for hits."""
+        found = {}
+        with self.lock:
+            for address, slot in keys:
+                row = self.db.execute(
+                    "SELECT value FROM state WHERE chain_id=? AND block=? AND address=? AND slot=?",
+                    (chain_id, block, address.lower(), str(slot)),
+                ).fetchone()
+                if row:
+                    found[(address, slot)] = row[0]
+        return found
+
+    def put_many(self, chain_id, block, items):
+        """Store {(address, slot): value} pairs."""
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chain_id, block, address.lower(), str(slot), value)
+                    for (address, slot), value in items.items()
+                ],
+            )
+            self.db.commit()
+
+    def get_balance_slot(self, chain_id, token):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT slot, layout FROM balance_slots WHERE chain_id=? AND token=?",
+                (chain_id, token.lower()),
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def put_balance_slot(self, chain_id, token, slot, layout):
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO balance_slots VALUES (?, ?, ?, ?)",
+                (chain_id, token.lower(), slot, layout),
+            )
+            self.db.commit()
+
+
+class CachedRPC(RPC):
+    """
+    boa RPC wrapper that serves state at one pinned block from a StateCache.
+
+    Storage, balance, nonce and code reads at `block` are looked up on disk
+    first and written back after a miss. Everything else goes to the node.
+
+    Args:
+        rpc (RPC): Underlying boa RPC, e.g. EthereumRPC
+        cache (StateCache): Persistent cache
+        chain_id (int): Chain the node serves
+        block (int): Pinned fork block
+    """
+
+    ACCOUNT_FIELDS = {
+        "eth_getBalance": "balance",
+        "eth_getTransactionCount": "nonce",
+        "eth_getCode": "code",
+    }
+
+    def __init__(self, rpc, cache, chain_id, block):
+        self.rpc = rpc
+        self.cache = cache
+        self.chain_id = chain_id
+        self.block = block
+
+    @property
+    def identifier(self):
+        return self.rpc.identifier
+
+    @property
+    def name(self):
+        return self.rpc.name
+
+    def _key(self, method, params):
+        """(address, slot) cache key of a request, or None if it is not cacheable."""
+        if method == "eth_getStorageAt":
+            address, slot, block = params
+            key = (address, to_int(slot))
+        elif method in self.ACCOUNT_FIELDS:
+            address, block = params
+            key = (address, self.ACCOUNT_FIELDS[method])
+        else:
+            return None
+        try:
+            pinned = to_int(block)
+        except ValueError:
+            # Tags like "latest" or "safe" are not pinned
+            return None
+        return key if pinned == self.block else None
+
+    def fetch_uncached(self, method, params):
+        return self.rpc.fetch_uncached(method, params)
+
+    def fetch(self, method, params):
+        key = self._key(method, params)
+        if key is not None:
+            value = self.cache.get(self.chain_id, self.block, *key)
+            if value is not None:
+                return value
+
+        value = self.rpc.fetch(method, params)
+        if key is not None:
+            self.cache.put_many(self.chain_id, self.block, {key: value})
+        return value
+
+    def fetch_multi(self, payloads):
+        keys = [self._key(method, params) for method, params in payloads]
+        hits = self.cache.get_many(
+            self.chain_id, self.block, [key for key in keys if key is not None]
+        )
+
+        missing = [i for i, key in enumerate(keys) if key is None or key not in hits]
+        fetched = (
+            self.rpc.fetch_multi([payloads[i] for i in missing]) if missing else []
+        )
+
+        results = [hits.get(key) if key is not None else None for key in keys]
+        new_items = {}
+        for i, value in zip(missing, fetched):
+            results[i] = value
+            if keys[i] is not None:
+                new_items[keys[i]] = value
+        if new_items:
+            self.cache.put_many(self.chain_id, self.block, new_items)
+        return results
+
+    def wait_for_tx_receipt(self, tx_hash, timeout, poll_dt=0.25):
+        return self.rpc.wait_for_tx_receipt(tx_hash, timeout, poll_dt)
+
+
+def find_balance_slot(client, cache, chain_id, block, token, holders, balances):
+    """
+    Find which storage slot holds a token's balance mapping.
+
+    Probes the first MAX_PROBED_SLOT slots in both Solidity and Vyper layout
+    for a holder with a known non-zero balance, all in one batched request.
+
+    Args:
+        client (JsonRpcClient): Node to query
+        cache (StateCache): Cache the answer is remembered in
+        chain_id (int): Chain id
+        block (int): Block to read at
+        token (str): Token contract address
+        holders (list): Candidate holder addresses
+        balances (list): balanceOf of each candidate holder
+
+    Returns:
+        tuple: (slot, layout), or None if no probed slot matches
+    """
+    known = cache.get_balance_slot(chain_id, token)
+    if known:
+        return known
+
+    holder, balance = next(
+        ((h, b) for h, b in zip(holders, balances) if b > 0), (None, 0)
+    )
+    if holder is None:
+        return None
+
+    candidates = [
+        (slot, layout)
+        for slot in range(MAX_PROBED_SLOT)
+        for layout in ("solidity", "vyper")
+    ]
+    values = client.batch(
+        [
+            (
+                "eth_getStorageAt",
+                [token, hex(mapping_slot(slot, holder, layout)), hex(block)],
+            )
+            for slot, layout in candidates
+        ]
+    )
+    for (slot, layout), value in zip(candidates, values):
+        if to_int(value) == balance:
+            cache.put_balance_slot(chain_id, token, slot, layout)
+            return slot, layout
+    return None
+
+
+def prefetch_balance_slots(
+    client, cache, chain_id, block, tokens, addrs, batch_size=500
+):
+    """
+    Pull every holder's balance-mapping slot into the cache before a fork run.
+
+    Args:
+        client (JsonRpcClient): Node to query
+        cache (StateCache): Cache to fill
+        chain_id (int): Chain id
+        block (int): Fork block
+        tokens (dict): token address -> (slot, layout) of its balance mapping
+        addrs (list): Holder addresses
+        batch_size (int): eth_getStorageAt requests per round trip
+    """
+    for token, (slot, layout) in tokens.items():
+        keys = [(token, mapping_slot(slot, addr, layout)) for addr in addrs]
+        hits = cache.get_many(chain_id, block, keys)
+        missing = [key for key in keys if key not in hits]
+        if not missing:
+            continue
+
+        values = client.batched(
+            [
+                ("eth_getStorageAt", [address, hex(slot_key), hex(block)])
+                for address, slot_key in missing
+            ],
+            batch_size=batch_size,
+        )
+        cache.put_many(chain_id, block, dict(zip(missing, values)))
+        print(f"Prefetched {len(missing)} balance slots of {token}")
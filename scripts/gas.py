@@ -0,0 +1,32 @@
+import contextlib
+
+import boa
+from boa.environment import Env
+
+
+@contextlib.contextmanager
+def fresh_env():
+    """
+    Run the block in a new boa env whose state can be committed.
+
+    boa runs every call in one open transaction: slots and accounts stay
+    warm, and values written earlier count as dirty, so SLOADs and SSTOREs
+    measure far cheaper than on chain. commit() ends that transaction, which
+    the open checkpoints of boa.env.anchor(), and of boa's pytest plugin,
+    do not allow; a new env has none. The env keeps the current gas meter,
+    so boa's profiler still sees the calls.
+    """
+    env = Env()
+    env.set_gas_meter_class(boa.env.get_gas_meter_class())
+    with boa.swap_env(env):
+        yield env
+
+
+def commit():
+    """
+    Commit the state of the current env, the way a mined transaction would.
+
+    Later calls start with cold slots and accounts, and an SSTORE counts as
+    a change only against the committed value.
+    """
+    boa.env.evm.vm.state.lock_changes()
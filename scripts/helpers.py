@@ -1,19 +1,17 @@
 import json
-import subprocess
 from datetime import datetime
 from pathlib import Path
 
 import yaml
+from compile_cache import solc_json
 from eth_abi import encode
-from web3 import Web3
+from eth_utils import to_checksum_address
 
 
 def get_constructor_arguments(reward_token):
     """Encode constructor arguments for contract verification"""
-    w3 = Web3()
-
     # Convert addresses to checksum format
-    reward_token = w3.to_checksum_address(reward_token)
+    reward_token = to_checksum_address(reward_token)
 
     # Prepare the argument types and values
     types = ["address"]
@@ -30,15 +28,10 @@ def get_constructor_arguments(reward_token):
         return None
 
 
-def get_vyper_bytecode():
+def get_vyper_bytecode(contract_source="contracts/SquillDrop.vy"):
     """Get the Vyper compiler output for contract verification"""
     try:
-        result = subprocess.run(
-            ["vyper", "-f", "solc_json", "contracts/SquillDrop.vy"],
-            capture_output=True,
-            text=True,
-        )
-        return json.loads(result.stdout)
+        return solc_json(contract_source)
     except Exception as e:
         print(f"Error getting Vyper bytecode: {e}")
         return None
@@ -50,6 +43,7 @@ def save_deployment_info(
     constructor_args: str,
     airdrop,  # Contract instance
     deployment_params: dict,
+    contract_source: str = "contracts/SquillDrop.vy",
 ):
     """Save deployment information to a YAML file with separate artifact storage"""
     # Create directory structure
@@ -68,7 +62,7 @@ def save_deployment_info(
     artifact_filename = f"{date_str}_{addr_prefix}_squilldrop_vyper_output.json"
 
     # Save Vyper output separately
-    vyper_output = get_vyper_bytecode()
+    vyper_output = get_vyper_bytecode(contract_source)
     if vyper_output:
         artifact_path = artifacts_dir / artifact_filename
         with open(artifact_path, "w") as f:
@@ -78,6 +72,7 @@ def save_deployment_info(
     deployment_data = {
         "network": network,
         "contract_address": contract_address,
+        "contract_source": contract_source,
         "constructor_arguments": constructor_args,
         "deployment_timestamp": datetime.now().isoformat(),
         "deployment_parameters": {
@@ -100,3 +95,29 @@ def save_deployment_info(
     print(f"\nDeployment info saved to: {chain_dir / yaml_filename}")
     if vyper_output:
         print(f"Vyper output saved to: {artifacts_dir / artifact_filename}")
+
+
+class DeploymentLoader(yaml.SafeLoader):
+    """SafeLoader reading the boa Address objects of deployment files as strings"""
+
+
+def _construct_address(loader, node):
+    # yaml.dump pickles the Address, canonical bytes included; its checksum
+    # string is the first constructor argument
+    for key, value in node.value:
+        if loader.construct_scalar(key) == "args":
+            return loader.construct_sequence(value)[0]
+    raise yaml.constructor.ConstructorError(
+        None, None, "Address without args", node.start_mark
+    )
+
+
+DeploymentLoader.add_constructor(
+    "tag:yaml.org,2002:python/object/new:boa.util.abi.Address", _construct_address
+)
+
+
+def load_deployment_info(path):
+    """Load a deployment YAML file written by save_deployment_info"""
+    with open(path) as f:
+        return yaml.load(f, Loader=DeploymentLoader)
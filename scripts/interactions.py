@@ -1,23 +1,327 @@
 import json
 import os
+import threading
 import time
+from collections.abc import Mapping
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from rpc import JsonRpcClient
+from transfer_logs import iter_transfers
 
 
-def get_contract_interactions(contracts, api_key=None, network="fraxtal"):
+class InteractionStore(Mapping):
+    """
+    Address interactions kept as one bitmask per address.
+
+    Bit i of an address's mask is set when it interacted with contracts[i].
+    Reading an address returns the list of contracts it interacted with, so the
+    store can be used wherever the plain address -> [contracts] dict was.
+
+    Args:
+        contracts (list): Contract addresses, in bit order
+    """
+
+    def __init__(self, contracts):
+        if len(contracts) > 64:
+            raise ValueError("At most 64 contracts can be tracked")
+        self.contracts = list(contracts)
+        self.masks = {}
+
+    @classmethod
+    def from_dict(cls, address_interactions, contracts):
+        """Build a store from an address -> [contracts] mapping."""
+        store = cls(contracts)
+        index = {contract: i for i, contract in enumerate(store.contracts)}
+        for address, interacted_contracts in address_interactions.items():
+            mask = 0
+            for contract in interacted_contracts:
+                if contract not in index:
+                    index[contract] = len(store.contracts)
+                    store.contracts.append(contract)
+                mask |= 1 << index[contract]
+            store.masks[address] = mask
+        return store
+
+    def add(self, contract_index, addresses):
+        """Record that every address in `addresses` touched contracts[contract_index]."""
+        bit = 1 << contract_index
+        masks = self.masks
+        for address in addresses:
+            masks[address] = masks.get(address, 0) | bit
+
+    def to_arrays(self):
+        """
+        Returns:
+            tuple: (object array of addresses, unsigned integer array of masks)
+        """
+        for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+            if len(self.contracts) <= np.iinfo(dtype).bits:
+                break
+        addresses = np.array(list(self.masks), dtype=object)
+        masks = np.fromiter(self.masks.values(), dtype=dtype, count=len(self.masks))
+        return addresses, masks
+
+    def contracts_for(self, mask):
+        """List of contracts whose bits are set in `mask`."""
+        mask = int(mask)
+        return [contract for i, contract in enumerate(self.contracts) if mask >> i & 1]
+
+    def __getitem__(self, address):
+        return self.contracts_for(self.masks[address])
+
+    def __iter__(self):
+        return iter(self.masks)
+
+    def __len__(self):
+        return len(self.masks)
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how fast requests leave the process.
+
+    Args:
+        rate (float): Tokens added per second (the API key's calls/sec quota)
+        burst (int, optional): Bucket capacity, defaults to one second of quota
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class ExplorerError(Exception):
+    """Raised when the explorer API keeps failing after all retries."""
+
+
+def make_session(pool_size=16):
+    """Create a requests Session that keeps connections to the explorer alive."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def fetch_page(session, limiter, base_url, params, max_retries=5, backoff=1.0):
+    """
+    Fetch one page of explorer results, retrying transient failures.
+
+    Args:
+        session (requests.Session): Pooled session used for the request
+        limiter (RateLimiter): Shared limiter every request goes through
+        base_url (str): Explorer API endpoint
+        params (dict): Query parameters, including page and offset
+        max_retries (int): Attempts before giving up
+        backoff (float): Initial delay in seconds, doubled after each failure
+
+    Returns:
+        list: Transactions on the page, empty once past the last page
+    """
+    delay = backoff
+    for attempt in range(1, max_retries + 1):
+        limiter.acquire()
+        try:
+            response = session.get(base_url, params=params, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            error = str(e)
+        else:
+            if data["status"] == "1":
+                return data["result"]
+
+            message = data.get("message", "")
+            result = data.get("result")
+            # An empty page is reported as an error by etherscan-style APIs
+            if message.startswith("No transactions found"):
+                return []
+            error = f"{message}: {result}"
+
+        if attempt < max_retries:
+            print(
+                f"Retrying page {params['page']} of {params['contractaddress']} "
+                f"in {delay:.1f}s ({error})"
+            )
+            time.sleep(delay)
+            delay *= 2
+
+    raise ExplorerError(
+        f"Page {params['page']} of {params['contractaddress']} failed "
+        f"after {max_retries} attempts: {error}"
+    )
+
+
+def fetch_shard(
+    session, limiter, base_url, params, offset, result_window, max_retries=5
+):
+    """
+    Fetch every page of one block-range shard, oldest first.
+
+    The explorer refuses to page past `result_window` rows, so a shard that
+    fills the window is cut short. Rows before the block of the last row are
+    then complete, while that block itself may have been split.
+
+    Args:
+        session (requests.Session): Pooled session used for the requests
+        limiter (RateLimiter): Shared limiter every request goes through
+        base_url (str): Explorer API endpoint
+        params (dict): Query parameters, including startblock and endblock
+        offset (int): Rows per page
+        result_window (int): Maximum page * offset the explorer serves
+        max_retries (int): Attempts per page before giving up
+
+    Returns:
+        tuple: (set of addresses, number of transfers, block to resume from or None)
+    """
+    addresses = set()
+    tx_count = 0
+    for page in range(1, result_window // offset + 1):
+        transactions = fetch_page(
+            session, limiter, base_url, {**params, "page": page}, max_retries
+        )
+        for tx in transactions:
+            addresses.add(tx["from"])
+            addresses.add(tx["to"])
+        tx_count += len(transactions)
+
+        if len(transactions) < offset:
+            return addresses, tx_count, None
+
+    return addresses, tx_count, int(transactions[-1]["blockNumber"])
+
+
+def split_range(start_block, end_block, parts):
+    """Split [start_block, end_block] into at most `parts` contiguous ranges."""
+    parts = max(1, min(parts, end_block - start_block + 1))
+    step = (end_block - start_block + 1) / parts
+    bounds = [start_block + round(i * step) for i in range(parts + 1)]
+    return [(bounds[i], bounds[i + 1] - 1) for i in range(parts)]
+
+
+def get_latest_block(session, limiter, base_url, api_key=None, max_retries=5):
+    """Return the explorer's current block height."""
+    params = {"module": "proxy", "action": "eth_blockNumber"}
+    if api_key:
+        params["apikey"] = api_key
+
+    delay = 1.0
+    for attempt in range(1, max_retries + 1):
+        limiter.acquire()
+        try:
+            response = session.get(base_url, params=params, timeout=30)
+            response.raise_for_status()
+            return int(response.json()["result"], 16)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as e:
+            error = str(e)
+        if attempt < max_retries:
+            time.sleep(delay)
+            delay *= 2
+
+    raise ExplorerError(f"Could not fetch latest block: {error}")
+
+
+def checkpoint_path(checkpoint_dir, network, contract_address):
+    """Path of the checkpoint file for one contract on one network."""
+    return os.path.join(
+        checkpoint_dir, f"{network.lower()}_{contract_address.lower()}.json"
+    )
+
+
+def load_checkpoint(path):
+    """
+    Load a contract checkpoint.
+
+    Returns:
+        dict: {"last_block": int, "addresses": set}, or None if there is none yet
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "r") as f:
+        data = json.load(f)
+    return {"last_block": data["last_block"], "addresses": set(data["addresses"])}
+
+
+def save_checkpoint(path, network, contract_address, last_block, addresses):
+    """Atomically write a contract checkpoint, so a crash never leaves it half-written."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(
+            {
+                "network": network,
+                "contract": contract_address,
+                "last_block": last_block,
+                "addresses": sorted(addresses),
+            },
+            f,
+        )
+    os.replace(tmp_path, path)
+
+
+def get_contract_interactions(
+    contracts,
+    api_key=None,
+    network="fraxtal",
+    rate_limit=5,
+    max_workers=8,
+    max_retries=5,
+    checkpoint_dir=None,
+    reorg_margin=64,
+    shards_per_contract=8,
+    result_window=10000,
+):
     """
     Gets all addresses that have interacted with specified contracts.
 
+    Each contract's block range is split into shards that are fetched
+    concurrently over a pooled session, with all requests going through one
+    token bucket sized to the API key's quota. A shard that fills the
+    explorer's result window is bisected from the block where it was cut off,
+    so busy tokens come back complete instead of truncated.
+
+    With a checkpoint directory, each contract's last fully processed block and
+    address set are kept on disk. Later runs only fetch blocks after the
+    checkpoint (less `reorg_margin` blocks, in case the tip was reorged) and
+    merge them into the stored set.
+
     Args:
         contracts (list): List of contract addresses to query
         api_key (str, optional): Explorer API key
         network (str): Network to query (fraxtal, sonic, etc.)
+        rate_limit (float): Requests per second allowed by the API key
+        max_workers (int): Maximum number of shards fetched at once
+        max_retries (int): Attempts per page before giving up
+        checkpoint_dir (str, optional): Directory holding per-contract checkpoints
+        reorg_margin (int): Blocks before the checkpoint that are fetched again
+        shards_per_contract (int): Initial number of block ranges per contract
+        result_window (int): Maximum page * offset the explorer serves
 
     Returns:
-        dict: Dictionary mapping addresses to lists of contracts they interacted with
+        InteractionStore: Mapping of addresses to lists of contracts they interacted with
     """
     # Select the appropriate base API URL based on network
     base_urls = {
@@ -31,95 +335,115 @@ def get_contract_interactions(contracts, api_key=None, network="fraxtal"):
         )
 
     base_url = base_urls[network.lower()]
+    offset = 1000  # Number of results per page
+
+    session = make_session(max_workers)
+    limiter = RateLimiter(rate_limit)
+
+    # Pin the range to the current head so shards have a fixed upper bound
+    end_block = get_latest_block(session, limiter, base_url, api_key, max_retries)
+
+    # Addresses seen per contract, merged into the result once all are done
+    seen = {contract_address: set() for contract_address in contracts}
+    start_blocks = {contract_address: 0 for contract_address in contracts}
+
+    if checkpoint_dir:
+        for contract_address in contracts:
+            checkpoint = load_checkpoint(
+                checkpoint_path(checkpoint_dir, network, contract_address)
+            )
+            if checkpoint:
+                seen[contract_address] = checkpoint["addresses"]
+                start_blocks[contract_address] = max(
+                    0, checkpoint["last_block"] + 1 - reorg_margin
+                )
 
-    # Initialize tracking dictionary for addresses and their interactions
-    address_interactions = {}
-
-    for contract_address in contracts:
-        print(f"Fetching transactions for contract {contract_address} on {network}...")
-
-        # Create parameters for API request
+    def shard_params(contract_address, start_block, shard_end_block):
         params = {
             "module": "account",
             "action": "tokentx",  # token transfers
             "contractaddress": contract_address,
-            "startblock": 0,
-            "endblock": 999999999,
-            "sort": "desc",
+            "startblock": start_block,
+            "endblock": shard_end_block,
+            "sort": "asc",
+            "offset": offset,
         }
-
-        # Add API key if provided
         if api_key:
             params["apikey"] = api_key
+        return params
+
+    tx_counts = {contract_address: 0 for contract_address in contracts}
+    outstanding = {contract_address: 0 for contract_address in contracts}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+
+        def submit(contract_address, start_block, shard_end_block):
+            future = pool.submit(
+                fetch_shard,
+                session,
+                limiter,
+                base_url,
+                shard_params(contract_address, start_block, shard_end_block),
+                offset,
+                result_window,
+                max_retries,
+            )
+            in_flight[future] = (contract_address, start_block, shard_end_block)
+            outstanding[contract_address] += 1
+
+        for contract_address in contracts:
+            print(
+                f"Fetching transactions for contract {contract_address} on {network} "
+                f"from block {start_blocks[contract_address]} to {end_block}..."
+            )
+            for start_block, shard_end_block in split_range(
+                start_blocks[contract_address], end_block, shards_per_contract
+            ):
+                submit(contract_address, start_block, shard_end_block)
+
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                contract_address, start_block, shard_end_block = in_flight.pop(future)
+                outstanding[contract_address] -= 1
+                addresses, tx_count, resume_block = future.result()
+
+                seen[contract_address].update(addresses)
+                tx_counts[contract_address] += tx_count
+
+                if resume_block is not None:
+                    if resume_block == shard_end_block:
+                        print(
+                            f"Warning: block {resume_block} of {contract_address} has "
+                            f"more than {result_window} transfers, results may be incomplete"
+                        )
+                    else:
+                        # Bisect whatever the result window did not cover
+                        for sub_start, sub_end in split_range(
+                            resume_block, shard_end_block, 2
+                        ):
+                            submit(contract_address, sub_start, sub_end)
+
+                # Checkpoint a contract as soon as its whole range is in
+                if checkpoint_dir and outstanding[contract_address] == 0:
+                    save_checkpoint(
+                        checkpoint_path(checkpoint_dir, network, contract_address),
+                        network,
+                        contract_address,
+                        end_block,
+                        seen[contract_address],
+                    )
 
-        # Initialize variables for pagination
-        page = 1
-        offset = 1000  # Number of results per page
-        more_data = True
-        contract_address_count = 0
-
-        # Loop through paginated results
-        while more_data:
-            # Add pagination parameters
-            params["page"] = page
-            params["offset"] = offset
-
-            try:
-                # Make API request
-                response = requests.get(base_url, params=params)
-                data = response.json()
-
-                # Check if request was successful
-                if data["status"] != "1":
-                    print(f"API Error: {data.get('message', 'Unknown error')}")
-                    break
-
-                # Process transactions
-                transactions = data["result"]
-
-                # Break if no more transactions
-                if not transactions:
-                    more_data = False
-                    continue
-
-                if page == 1:
-                    print(f"Found transactions, processing in batches...")
-
-                # Extract addresses and track their interactions with this contract
-                for tx in transactions:
-                    from_address = tx["from"]
-                    to_address = tx["to"]
-
-                    # Track 'from' address interactions
-                    if from_address not in address_interactions:
-                        address_interactions[from_address] = []
-                    if contract_address not in address_interactions[from_address]:
-                        address_interactions[from_address].append(contract_address)
-
-                    # Track 'to' address interactions
-                    if to_address not in address_interactions:
-                        address_interactions[to_address] = []
-                    if contract_address not in address_interactions[to_address]:
-                        address_interactions[to_address].append(contract_address)
-
-                contract_address_count += len(transactions)
-
-                # Move to next page
-                page += 1
-
-                # Add a small delay to avoid rate limiting
-                time.sleep(0.3)
-
-            except Exception as e:
-                print(
-                    f"Error processing page {page} for contract {contract_address}: {e}"
-                )
-                break
-
+    for contract_address in contracts:
         print(
-            f"Processed {contract_address_count} transactions for contract {contract_address}"
+            f"Processed {tx_counts[contract_address]} transactions for contract {contract_address}"
         )
 
+    address_interactions = InteractionStore(contracts)
+    for i, contract_address in enumerate(contracts):
+        address_interactions.add(i, seen[contract_address])
+
     total_addresses = len(address_interactions)
     print(
         f"Found {total_addresses} unique addresses interacting with {len(contracts)} contracts"
@@ -128,6 +452,92 @@ def get_contract_interactions(contracts, api_key=None, network="fraxtal"):
     return address_interactions
 
 
+def get_contract_interactions_from_logs(
+    contracts,
+    rpc_url=None,
+    client=None,
+    network="fraxtal",
+    max_workers=4,
+    checkpoint_dir=None,
+    reorg_margin=64,
+):
+    """
+    Gets all addresses that have interacted with specified contracts, reading
+    ERC-20 Transfer logs straight from a JSON-RPC node instead of the explorer.
+
+    Logs for all contracts are requested together in adaptive block chunks,
+    several at a time. Checkpoints are shared with get_contract_interactions.
+
+    Args:
+        contracts (list): List of contract addresses to query
+        rpc_url (str, optional): Node endpoint
+        client (JsonRpcClient, optional): Client to use instead of one for rpc_url
+        network (str): Network name, used for checkpoint files
+        max_workers (int): eth_getLogs requests in flight at once
+        checkpoint_dir (str, optional): Directory holding per-contract checkpoints
+        reorg_margin (int): Blocks before the checkpoint that are fetched again
+
+    Returns:
+        InteractionStore: Mapping of addresses to lists of contracts they interacted with
+    """
+    client = client or JsonRpcClient(rpc_url, pool_size=max_workers)
+    end_block = client.block_number()
+
+    seen = {contract_address: set() for contract_address in contracts}
+    start_blocks = {contract_address: 0 for contract_address in contracts}
+
+    if checkpoint_dir:
+        for contract_address in contracts:
+            checkpoint = load_checkpoint(
+                checkpoint_path(checkpoint_dir, network, contract_address)
+            )
+            if checkpoint:
+                seen[contract_address] = checkpoint["addresses"]
+                start_blocks[contract_address] = max(
+                    0, checkpoint["last_block"] + 1 - reorg_margin
+                )
+
+    # One pass from the earliest start covers every contract
+    start_block = min(start_blocks.values())
+    print(
+        f"Fetching Transfer logs for {len(contracts)} contracts on {network} "
+        f"from block {start_block} to {end_block}..."
+    )
+
+    by_address = {
+        contract_address.lower(): contract_address for contract_address in contracts
+    }
+    tx_counts = {contract_address: 0 for contract_address in contracts}
+    for transfer in iter_transfers(
+        client, contracts, start_block, end_block, max_workers=max_workers
+    ):
+        contract_address = by_address[transfer.contract]
+        seen[contract_address].add(transfer.sender)
+        seen[contract_address].add(transfer.receiver)
+        tx_counts[contract_address] += 1
+
+    address_interactions = InteractionStore(contracts)
+    for i, contract_address in enumerate(contracts):
+        print(
+            f"Processed {tx_counts[contract_address]} transfers for contract {contract_address}"
+        )
+        address_interactions.add(i, seen[contract_address])
+        if checkpoint_dir:
+            save_checkpoint(
+                checkpoint_path(checkpoint_dir, network, contract_address),
+                network,
+                contract_address,
+                end_block,
+                seen[contract_address],
+            )
+
+    print(
+        f"Found {len(address_interactions)} unique addresses interacting with {len(contracts)} contracts"
+    )
+
+    return address_interactions
+
+
 def generate_reports(
     address_interactions, contracts, output_dir="contract_interaction_reports"
 ):
@@ -135,7 +545,7 @@ def generate_reports(
     Generate reports from the address interaction data.
 
     Args:
-        address_interactions (dict): Dictionary of addresses and their contract interactions
+        address_interactions (InteractionStore or dict): Addresses and their contract interactions
         contracts (list): List of contract addresses that were queried
         output_dir (str): Directory to save the reports
     """
@@ -143,60 +553,70 @@ def generate_reports(
     os.makedirs(output_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    # Convert the data to a more usable format for reporting
-    records = []
-    for address, interacted_contracts in address_interactions.items():
-        # Create interaction flags for each contract
-        interaction_flags = {
-            contract: (contract in interacted_contracts) for contract in contracts
-        }
-
-        # Create a record for this address
-        record = {"address": address, "interaction_count": len(interacted_contracts)}
-        record.update(
-            {
-                f"interacted_with_{contract[:8]}": flag
-                for contract, flag in interaction_flags.items()
-            }
+    if not isinstance(address_interactions, InteractionStore):
+        address_interactions = InteractionStore.from_dict(
+            address_interactions, contracts
         )
-        record["contracts"] = ",".join(interacted_contracts)
-        records.append(record)
-
-    # Create a DataFrame
-    df = pd.DataFrame(records)
+    store = address_interactions
+
+    # One row per address, one column per contract bit
+    addresses, masks = store.to_arrays()
+    shifts = np.arange(len(store.contracts), dtype=masks.dtype)
+    flags = ((masks[:, None] >> shifts) & 1).astype(bool)
+    interaction_count = flags.sum(axis=1)
+
+    # Contract lists are only built once per distinct mask
+    unique_masks, inverse = np.unique(masks, return_inverse=True)
+    mask_contracts = [store.contracts_for(mask) for mask in unique_masks]
+
+    # Columns for the queried contracts only
+    columns = [store.contracts.index(contract) for contract in contracts]
+
+    df = pd.DataFrame(
+        {
+            "address": addresses,
+            "interaction_count": interaction_count,
+            **{
+                f"interacted_with_{contract[:8]}": flags[:, i]
+                for contract, i in zip(contracts, columns)
+            },
+            "contracts": np.array([",".join(c) for c in mask_contracts], dtype=object)[
+                inverse
+            ],
+        }
+    )
 
     # Sort by number of interactions (descending)
-    df = df.sort_values("interaction_count", ascending=False)
+    df = df.iloc[np.argsort(-interaction_count, kind="stable")]
 
     # Save as CSV (can be easily imported)
     csv_path = f"{output_dir}/contract_interactions_{timestamp}.csv"
     df.to_csv(csv_path, index=False)
 
-    # Save as JSON (useful for programmatic access)
+    # Save as JSON (useful for programmatic access), one address per line
     json_path = f"{output_dir}/contract_interactions_{timestamp}.json"
+    label_lists = {
+        int(mask): json.dumps(c) for mask, c in zip(unique_masks, mask_contracts)
+    }
     with open(json_path, "w") as f:
-        json.dump(address_interactions, f, indent=2)
+        f.write("{\n")
+        for i, (address, mask) in enumerate(store.masks.items()):
+            separator = ",\n" if i < len(store) - 1 else "\n"
+            f.write(f"  {json.dumps(address)}: {label_lists[mask]}{separator}")
+        f.write("}\n")
 
     # Generate summary statistics
+    per_contract = flags.sum(axis=0)
     summary = {
-        "total_unique_addresses": len(address_interactions),
+        "total_unique_addresses": len(store),
         "contracts_analyzed": len(contracts),
         "contracts": contracts,
-        "addresses_per_contract": {},
-        "addresses_with_multiple_contracts": sum(
-            1 for contracts in address_interactions.values() if len(contracts) > 1
-        ),
+        "addresses_per_contract": {
+            contract: int(per_contract[i]) for contract, i in zip(contracts, columns)
+        },
+        "addresses_with_multiple_contracts": int((interaction_count > 1).sum()),
     }
 
-    # Count addresses per contract
-    for contract in contracts:
-        count = sum(
-            1
-            for interacted_contracts in address_interactions.values()
-            if contract in interacted_contracts
-        )
-        summary["addresses_per_contract"][contract] = count
-
     # Save summary as JSON
     summary_path = f"{output_dir}/summary_{timestamp}.json"
     with open(summary_path, "w") as f:
@@ -251,17 +671,34 @@ def main():
         "0xbf55bb9463bbbb6ad724061910a450939e248ea6",  # LL
     ]
 
-    # API key (if required)
+    # API key (if required) and the calls/sec it is allowed
     api_key = os.getenv("FRAXSCAN_KEY")
+    rate_limit = float(os.getenv("FRAXSCAN_RATE_LIMIT", "5"))
 
     # Network to use (fraxtal or sonic)
     network = "fraxtal"
 
+    # Holder discovery backend: "explorer" (tokentx API) or "rpc" (eth_getLogs)
+    source = os.getenv("INTERACTIONS_SOURCE", "explorer")
+    rpc_url = os.getenv("RPC_URL", "https://rpc.frax.com")
+
     try:
         # 1. Get all addresses that interacted with the contracts
-        address_interactions = get_contract_interactions(
-            contracts=contracts, api_key=api_key, network=network
-        )
+        if source == "rpc":
+            address_interactions = get_contract_interactions_from_logs(
+                contracts=contracts,
+                rpc_url=rpc_url,
+                network=network,
+                checkpoint_dir="contract_interaction_reports/checkpoints",
+            )
+        else:
+            address_interactions = get_contract_interactions(
+                contracts=contracts,
+                api_key=api_key,
+                network=network,
+                rate_limit=rate_limit,
+                checkpoint_dir="contract_interaction_reports/checkpoints",
+            )
 
         # 2. Generate reports
         generate_reports(
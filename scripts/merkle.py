@@ -0,0 +1,126 @@
+import json
+import time
+
+from allocate import read_airdrop_json
+from eth_utils import keccak
+
+input_file = "airdrop_balances.json"
+output_file = "merkle_proofs.json"
+
+
+def leaf_hash(index, addr, amount):
+    """Leaf of SquillDropMerkle: keccak256(abi_encode(index, addr, amount))."""
+    return keccak(
+        index.to_bytes(32, "big")
+        + bytes(12)
+        + bytes.fromhex(addr[2:])
+        + amount.to_bytes(32, "big")
+    )
+
+
+def hash_pair(a, b):
+    """Hash two nodes in sorted order, as SquillDropMerkle._verify does."""
+    return keccak(a + b) if a < b else keccak(b + a)
+
+
+def build_tree(leaves):
+    """
+    Build every layer of a Merkle tree over `leaves`.
+
+    A node without a sibling is carried up to the next layer unchanged, so
+    its proofs simply skip that level.
+
+    Args:
+        leaves (list): Leaf hashes as bytes
+
+    Returns:
+        list: Layers from the leaves up to [root]
+    """
+    if not leaves:
+        raise ValueError("Cannot build a tree without leaves")
+
+    layers = [leaves]
+    while len(layers[-1]) > 1:
+        layer = layers[-1]
+        parents = [
+            hash_pair(layer[i], layer[i + 1]) for i in range(0, len(layer) - 1, 2)
+        ]
+        if len(layer) % 2:
+            parents.append(layer[-1])
+        layers.append(parents)
+    return layers
+
+
+def get_proof(layers, index):
+    """Sibling hashes from leaf `index` up to the root."""
+    proof = []
+    for layer in layers[:-1]:
+        sibling = index ^ 1
+        if sibling < len(layer):
+            proof.append(layer[sibling])
+        index //= 2
+    return proof
+
+
+def build_claims(allocations):
+    """
+    Hash every allocation, build the tree and collect all proofs.
+
+    Args:
+        allocations (list): [address, amount] pairs; position is the leaf index
+
+    Returns:
+        tuple: (root as bytes, {address: {"index", "amount", "proof"}})
+
+    Raises:
+        ValueError: If an address is listed more than once, since its claims
+            would share one proof entry while the tree commits to each leaf
+    """
+    seen = set()
+    for addr, _ in allocations:
+        if int(addr, 16) in seen:
+            raise ValueError(f"Duplicate address {addr}")
+        seen.add(int(addr, 16))
+
+    leaves = [
+        leaf_hash(index, addr, amount)
+        for index, (addr, amount) in enumerate(allocations)
+    ]
+    layers = build_tree(leaves)
+
+    # Each node appears in many proofs, so encode it once
+    hex_layers = [["0x" + node.hex() for node in layer] for layer in layers]
+    claims = {
+        addr: {
+            "index": index,
+            "amount": str(amount),
+            "proof": get_proof(hex_layers, index),
+        }
+        for index, (addr, amount) in enumerate(allocations)
+    }
+    return layers[-1][0], claims
+
+
+def main():
+    allocations = read_airdrop_json(input_file)
+    print(f"Loaded {len(allocations)} allocations from {input_file}")
+
+    start = time.time()
+    root, claims = build_claims(allocations)
+    print(f"Built tree and proofs in {time.time() - start:.2f}s")
+
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "merkle_root": "0x" + root.hex(),
+                "total": str(sum(amount for _, amount in allocations)),
+                "claims": claims,
+            },
+            f,
+            indent=2,
+        )
+    print(f"Merkle root: 0x{root.hex()}\nSaved proofs to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
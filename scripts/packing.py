@@ -0,0 +1,127 @@
+import json
+
+import boa
+from allocate import read_airdrop_json
+from eth_utils import keccak
+
+input_file = "airdrop_balances.json"
+output_file = "allocation_tables.json"
+
+# One record is a 20-byte address followed by a 12-byte big-endian amount
+ADDRESS_SIZE = 20
+AMOUNT_SIZE = 12
+RECORD_SIZE = ADDRESS_SIZE + AMOUNT_SIZE
+MAX_AMOUNT = 2 ** (8 * AMOUNT_SIZE) - 1
+
+# add_bulk_packed takes no ABI arguments; the records follow the selector
+ADD_BULK_PACKED_SELECTOR = keccak(text="add_bulk_packed()")[:4]
+
+# EIP-170 code size limit; data contracts spend one byte on a leading STOP
+MAX_CODE_SIZE = 24_576
+RECORDS_PER_TABLE = (MAX_CODE_SIZE - 1) // RECORD_SIZE
+
+
+def pack_record(addr, amount):
+    """Pack one allocation into a 32-byte record."""
+    if not 0 <= amount <= MAX_AMOUNT:
+        raise ValueError(
+            f"Amount {amount} of {addr} does not fit in {AMOUNT_SIZE} bytes"
+        )
+    return bytes.fromhex(addr[2:]) + amount.to_bytes(AMOUNT_SIZE, "big")
+
+
+def pack_records(allocations):
+    """Pack [address, amount] pairs into consecutive records, in the given order."""
+    return b"".join(pack_record(addr, amount) for addr, amount in allocations)
+
+
+def unpack_records(data):
+    """Inverse of pack_records; returns [address, amount] pairs."""
+    if len(data) % RECORD_SIZE:
+        raise ValueError(f"{len(data)} bytes is not a whole number of records")
+    return [
+        [
+            "0x" + data[i : i + ADDRESS_SIZE].hex(),
+            int.from_bytes(data[i + ADDRESS_SIZE : i + RECORD_SIZE], "big"),
+        ]
+        for i in range(0, len(data), RECORD_SIZE)
+    ]
+
+
+def encode_add_bulk_packed(allocations):
+    """Calldata of SquillDropBatch.add_bulk_packed for [address, amount] pairs."""
+    return ADD_BULK_PACKED_SELECTOR + pack_records(allocations)
+
+
+def sort_allocations(allocations):
+    """Sort by address as a number, the order the on-chain search expects."""
+    ordered = sorted(allocations, key=lambda row: int(row[0], 16))
+    for previous, current in zip(ordered, ordered[1:]):
+        if int(previous[0], 16) == int(current[0], 16):
+            raise ValueError(f"Duplicate address {current[0]}")
+    return ordered
+
+
+def split_tables(allocations, per_table=RECORDS_PER_TABLE):
+    """
+    Sort allocations and pack them into data blobs of at most `per_table` records.
+
+    The blobs are in ascending address order, each one picking up where
+    the previous one ended.
+    """
+    ordered = sort_allocations(allocations)
+    return [
+        pack_records(ordered[i : i + per_table])
+        for i in range(0, len(ordered), per_table)
+    ]
+
+
+def data_contract_initcode(blob):
+    """
+    Creation code deploying `blob` as contract bytecode, SSTORE2-style.
+
+    The runtime code is a STOP byte followed by the data, so the contract
+    cannot be called and the data starts at code offset 1.
+    """
+    runtime = b"\x00" + blob
+    if len(runtime) > MAX_CODE_SIZE:
+        raise ValueError(f"Blob of {len(blob)} bytes exceeds the code size limit")
+    # PUSH2 size, DUP1, PUSH1 10, RETURNDATASIZE, CODECOPY, RETURNDATASIZE, RETURN
+    header = b"\x61" + len(runtime).to_bytes(2, "big") + bytes.fromhex("80600a3d393df3")
+    return header + runtime
+
+
+def deploy_tables(blobs):
+    """Deploy every blob as a data contract; returns their addresses in order."""
+    return [
+        boa.env.deploy_code(bytecode=data_contract_initcode(blob))[0] for blob in blobs
+    ]
+
+
+def main():
+    allocations = read_airdrop_json(input_file)
+    blobs = split_tables(allocations)
+
+    # 32000 per CREATE plus 200 per byte of deployed code
+    deploy_gas = sum(32_000 + 200 * (len(blob) + 1) for blob in blobs)
+    print(
+        f"Packed {len(allocations)} allocations into {len(blobs)} tables "
+        f"({sum(len(blob) for blob in blobs):,} bytes, ~{deploy_gas:,} gas to deploy)"
+    )
+
+    with open(output_file, "w") as f:
+        json.dump(
+            {
+                "records": len(allocations),
+                "initcode": [
+                    "0x" + data_contract_initcode(blob).hex() for blob in blobs
+                ],
+            },
+            f,
+            indent=2,
+        )
+    print(f"Saved table creation code to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
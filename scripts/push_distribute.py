@@ -0,0 +1,169 @@
+import os
+
+import boa
+from allocate import read_airdrop_json
+from bulk_load import (
+    PRIVATE_KEY,
+    RPC_URL,
+    TARGET_GAS,
+    TX_BASE_GAS,
+    calldata_gas,
+    eligible_amounts,
+    send_transactions,
+)
+from compile_cache import load_partial
+from eth_abi import encode
+from eth_account import Account
+from eth_utils import keccak
+from gas import commit, fresh_env
+from rpc import JsonRpcClient, RPCError
+
+# Configuration
+FORK = True
+
+# Pushing needs a SquillDropBatch deployment, which adds claim_for_many to
+# the round 3 contract. None of the recorded deployments is one, so there is
+# no default; the round 3 contract bulk_load.py targets has no claim_for_many.
+AIRDROP = os.getenv("PUSH_AIRDROP")
+
+input_file = "scripts/airdrop_balances.json"
+
+MAX_BATCH = 1_000  # DynArray bound of claim_for_many
+CLAIM_FOR_MANY_SELECTOR = keccak(text="claim_for_many(address[])")[:4]
+
+
+def encode_claim_for_many(addrs):
+    """Calldata of claim_for_many for a list of addresses."""
+    return CLAIM_FOR_MANY_SELECTOR + encode(["address[]"], [addrs])
+
+
+def check_claim_for_many(client, airdrop, sender):
+    """
+    Make sure `sender` can call claim_for_many on `airdrop` before pushing.
+
+    Simulates claim_for_many([]) with eth_call. It pays nobody, but reverts
+    on a contract without the function, for anyone but the owner and while
+    the contract is paused.
+    """
+    try:
+        client.call(
+            "eth_call",
+            [
+                {
+                    "from": sender,
+                    "to": airdrop,
+                    "data": "0x" + encode_claim_for_many([]).hex(),
+                },
+                "latest",
+            ],
+        )
+    except RPCError as e:
+        raise RuntimeError(
+            f"{sender} cannot call claim_for_many on {airdrop}: {e.message}"
+        ) from e
+
+
+def measure_recipient_gas(sample_size=50):
+    """
+    Measure the execution gas of claim_for_many on a scratch deployment.
+
+    Pays out two batches of fresh recipients and fits a line through the gas
+    used, separating the per-call checks from the cost of each transfer.
+    The recipients are committed before each payout, so their slots are cold
+    and clearing them costs what it does on chain.
+
+    Returns:
+        tuple: (fixed gas per call, gas per recipient)
+    """
+    with fresh_env():
+        token = load_partial("contracts/mocks/MockToken.vy").deploy(
+            "Test Token", "TEST", 18
+        )
+        drop = load_partial("contracts/SquillDropBatch.vy").deploy(token.address)
+        token._mint_for_testing(drop.address, 10**30)
+
+        used = []
+        for size in (sample_size, 2 * sample_size):
+            addrs = [boa.env.generate_address() for _ in range(size)]
+            drop.add_bulk_addresses(addrs, [10**18] * size)
+            commit()
+            drop.claim_for_many(addrs)
+            used.append(drop._computation.get_gas_used())
+
+    per_recipient = -(-(used[1] - used[0]) // sample_size)
+    return used[0] - per_recipient * sample_size, per_recipient
+
+
+def plan_batches(addrs, fixed_gas, recipient_gas, target_gas=TARGET_GAS):
+    """
+    Split recipients into claim_for_many calls that stay under `target_gas`.
+
+    Returns:
+        list: (addresses, estimated gas) per transaction
+    """
+    overhead = TX_BASE_GAS + fixed_gas + calldata_gas(encode_claim_for_many([]))
+    per_recipient = recipient_gas + 16 * 20 + 4 * 12
+    size = max(1, min(MAX_BATCH, (target_gas - overhead) // per_recipient))
+    return [
+        (addrs[i : i + size], overhead + per_recipient * len(addrs[i : i + size]))
+        for i in range(0, len(addrs), size)
+    ]
+
+
+def push_on_fork(airdrop, batches):
+    """Run the planned payouts in-process against a boa fork, as the owner."""
+    drop = load_partial("contracts/SquillDropBatch.vy").at(airdrop)
+    with boa.env.prank(drop.owner()):
+        for i, (addrs, estimate) in enumerate(batches):
+            drop.claim_for_many(addrs)
+            claims = [log for log in drop.get_logs() if log.event_type.name == "Claim"]
+            print(
+                f"Batch {i + 1}/{len(batches)}: {len(addrs)} recipients, "
+                f"{len(claims)} claims, "
+                f"{drop._computation.get_gas_used():,} gas (estimated {estimate:,})"
+            )
+    return drop
+
+
+def main():
+    if not AIRDROP:
+        print("Set PUSH_AIRDROP to a deployment with claim_for_many")
+        return
+    addrs = [addr for addr, _ in read_airdrop_json(input_file)]
+    client = JsonRpcClient(RPC_URL)
+
+    # Only push to recipients who have not claimed yet
+    amounts = eligible_amounts(client, AIRDROP, addrs)
+    unclaimed = [addr for addr, amount in zip(addrs, amounts) if amount > 0]
+    print(
+        f"{len(unclaimed)} of {len(addrs)} recipients unclaimed, "
+        f"{sum(amounts) / 10**18:,.2f} tokens to push"
+    )
+    if not unclaimed:
+        return
+
+    fixed_gas, recipient_gas = measure_recipient_gas()
+    batches = plan_batches(unclaimed, fixed_gas, recipient_gas)
+    print(
+        f"Measured {recipient_gas:,} gas per recipient and {fixed_gas:,} per call, "
+        f"planned {len(batches)} transactions"
+    )
+
+    if FORK:
+        boa.fork(RPC_URL)
+        drop = push_on_fork(AIRDROP, batches)
+        left = sum(drop.eligible_addresses(addr) > 0 for addr in unclaimed)
+        print(f"Fork check: {left} recipients still unclaimed")
+    else:
+        account = Account.from_key(PRIVATE_KEY)
+        check_claim_for_many(client, AIRDROP, account.address)
+        send_transactions(
+            client,
+            account,
+            AIRDROP,
+            [(encode_claim_for_many(addrs), gas) for addrs, gas in batches],
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import itertools
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RPCError(Exception):
+    """Raised when a JSON-RPC node answers a request with an error object."""
+
+    def __init__(self, error):
+        self.code = error.get("code")
+        self.message = error.get("message", "")
+        super().__init__(f"{self.code}: {self.message}")
+
+
+class JsonRpcClient:
+    """
+    Minimal JSON-RPC client with request batching and retries.
+
+    Args:
+        url (str): Node endpoint
+        max_retries (int): Attempts per request before giving up
+        backoff (float): Initial retry delay in seconds, doubled after each failure
+        pool_size (int): Keep-alive connections kept open to the node
+        transport (callable, optional): Function taking a JSON-RPC payload and
+            returning the decoded response, used instead of HTTP. Lets the
+            client run against an in-process node stand-in.
+    """
+
+    def __init__(
+        self, url=None, max_retries=5, backoff=1.0, pool_size=16, transport=None
+    ):
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.transport = transport
+        self.ids = itertools.count()
+
+        if transport is None:
+            self.session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+
+    def _send(self, payload):
+        if self.transport is not None:
+            return self.transport(payload)
+
+        delay = self.backoff
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                response = self.session.post(self.url, json=payload, timeout=60)
+                response.raise_for_status()
+                return response.json()
+            except (requests.RequestException, ValueError) as e:
+                if attempt == self.max_retries:
+                    raise
+                print(f"RPC request failed, retrying in {delay:.1f}s ({e})")
+                time.sleep(delay)
+                delay *= 2
+
+    def call(self, method, params):
+        """Send a single request and return its result."""
+        return self.batch([(method, params)])[0]
+
+    def batch(self, calls):
+        """
+        Send several requests in one round trip.
+
+        Args:
+            calls (list): (method, params) tuples
+
+        Returns:
+            list: Results, in the order of `calls`
+        """
+        if not calls:
+            return []
+
+        payload = [
+            {"jsonrpc": "2.0", "id": next(self.ids), "method": method, "params": params}
+            for method, params in calls
+        ]
+        responses = self._send(payload)
+        if isinstance(responses, dict):
+            # Some nodes answer a failed batch with a single error object
+            raise RPCError(responses.get("error", {"message": str(responses)}))
+
+        by_id = {response["id"]: response for response in responses}
+        results = []
+        for request in payload:
+            response = by_id[request["id"]]
+            if "error" in response:
+                raise RPCError(response["error"])
+            results.append(response["result"])
+        return results
+
+    def batched(self, calls, batch_size=500):
+        """Send any number of requests, `batch_size` per round trip."""
+        results = []
+        for i in range(0, len(calls), batch_size):
+            results.extend(self.batch(calls[i : i + batch_size]))
+        return results
+
+    def block_number(self):
+        """Current block height of the node."""
+        return int(self.call("eth_blockNumber", []), 16)
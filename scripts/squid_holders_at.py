@@ -1,22 +1,66 @@
+import csv
 import json
+import multiprocessing
 import os
-import time
+import random
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 import boa
+from boa.rpc import EthereumRPC
+from eth_abi import decode, encode
+from fork_cache import (
+    CachedRPC,
+    StateCache,
+    find_balance_slot,
+    prefetch_balance_slots,
+)
+from rpc import JsonRpcClient
+from transfer_logs import iter_transfers, replay_balances
 
 LIVE = False
-FRAXSCAN_KEY = os.getenv("FRAXSCAN_KEY")
-FRAXSCAN_API = "https://api.fraxscan.com/api"
 RPC_URL = "https://rpc.frax.com"
 
-block = 18922260
-boa.env.fork(RPC_URL, block_identifier=block)
+# "multicall" batches balanceOf reads through Multicall3 at the snapshot block,
+# "fork" calls each contract on a local boa fork,
+# "replay" rebuilds balances from the Transfer events up to the block
+SNAPSHOT_MODE = "multicall"
+
+# Holders read per batch; each batch is appended to the JSONL output as it completes
+BATCH_SIZE = 500
+
+# Pick up after the rows an interrupted run already wrote
+RESUME = True
+
+# Holders re-read with balanceOf to cross-check a replayed snapshot
+CROSS_CHECK_SAMPLE = 100
+
+# Worker processes for fork mode, each with its own fork at the snapshot block
+WORKERS = 1
+
+# Fork state read at the snapshot block is kept here between runs
+FORK_CACHE_FILE = "fork_state_cache.db"
 
-with open(
-    "contract_interaction_reports/contract_interactions_20250403_004317.json", "r"
-) as f:
-    addrs = json.load(f)
+ERC20_BALANCE_ABI = [
+    {
+        "name": "balanceOf",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "owner", "type": "address"}],
+        "outputs": [{"name": "", "type": "uint256"}],
+    }
+]
 
+# Multicall3, deployed at the same address on Fraxtal and most EVM chains
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+BALANCE_OF_SELECTOR = bytes.fromhex("70a08231")
+
+block = 18922260
+interactions_file = (
+    "contract_interaction_reports/contract_interactions_20250403_004317.json"
+)
 
 contract_addrs = {
     "squid": "0x6e58089d8E8f664823d26454f49A5A0f2fF697Fe",
@@ -25,24 +69,431 @@ contract_addrs = {
     "convex": "0x29FF8F9ACb27727D8A2A52D16091c12ea56E9E4d",
 }
 
-contracts = {}
-for k, v in contract_addrs.items():
-    contracts[k] = boa.from_etherscan(v, k, FRAXSCAN_API, FRAXSCAN_KEY)
-    print(contracts[k])
-    time.sleep(1)
-
-i = 0
-data = {}
-for addr, addr_contract_data in addrs.items():
-    i += 1
-    bals = {}
-    for k, v in contracts.items():
-        bals[k] = v.balanceOf(addr)
-    print(i, len(addrs), addr, bals)
-    data[addr] = bals
-
-output_filename = f"balance_data_{block}.json"
-with open(output_filename, "w") as f:
-    json.dump(data, f, indent=2)
-
-print(f"Data saved to {output_filename}")
+
+def encode_balance_of(addr):
+    """Calldata for balanceOf(addr)."""
+    return BALANCE_OF_SELECTOR + encode(["address"], [addr])
+
+
+def multicall_balances(client, block, contract_addrs, addrs, batch_size=500):
+    """
+    Read every contract's balanceOf for every address through Multicall3.
+
+    Each eth_call aggregates `batch_size` addresses times all contracts, and
+    the eth_calls themselves go out together in JSON-RPC batches, so a few
+    thousand holders take a handful of round trips. A balanceOf that reverts
+    or returns something other than one word raises, rather than reverting
+    the whole aggregate or being read as a balance.
+
+    Args:
+        client (JsonRpcClient): Node to query
+        block (int): Block the balances are read at
+        contract_addrs (dict): Balance name -> token contract address
+        addrs (list): Holder addresses
+        batch_size (int): Addresses per aggregate3 call
+
+    Returns:
+        dict: address -> {name: balance}
+    """
+    names = list(contract_addrs)
+    payloads = []
+    for i in range(0, len(addrs), batch_size):
+        calls = [
+            (contract_addrs[name], True, encode_balance_of(addr))
+            for addr in addrs[i : i + batch_size]
+            for name in names
+        ]
+        calldata = AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])
+        payloads.append(
+            (
+                "eth_call",
+                [{"to": MULTICALL3, "data": "0x" + calldata.hex()}, hex(block)],
+            )
+        )
+
+    data = {}
+    results = client.batched(payloads, batch_size=4)
+    for i, result in enumerate(results):
+        (returned,) = decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+        batch_addrs = addrs[i * batch_size : (i + 1) * batch_size]
+        for j, addr in enumerate(batch_addrs):
+            row = returned[j * len(names) : (j + 1) * len(names)]
+            for name, (success, return_data) in zip(names, row):
+                if not success or len(return_data) != 32:
+                    raise ValueError(
+                        f"balanceOf({addr}) failed on {name} "
+                        f"({contract_addrs[name]}) at block {block}"
+                    )
+            data[addr] = {
+                name: int.from_bytes(return_data, "big")
+                for name, (_, return_data) in zip(names, row)
+            }
+        print(f"{len(data)} / {len(addrs)} balances read")
+    return data
+
+
+def locate_balance_slots(client, cache, chain_id, block, contract_addrs, sample):
+    """
+    Find each token's balance mapping from a small sample of known balances.
+
+    Returns:
+        dict: token address -> (slot, layout), for the tokens that were found
+    """
+    sample_balances = multicall_balances(client, block, contract_addrs, sample)
+    slots = {}
+    for k, v in contract_addrs.items():
+        found = find_balance_slot(
+            client,
+            cache,
+            chain_id,
+            block,
+            v,
+            sample,
+            [sample_balances[addr][k] for addr in sample],
+        )
+        if found:
+            slots[v] = found
+        else:
+            print(f"No balance slot found for {k}, its reads will not be prefetched")
+    return slots
+
+
+def open_fork(block, contract_addrs, chain_id, cache_file=FORK_CACHE_FILE):
+    """Fork at `block` through the persistent cache and return balanceOf handles."""
+    cache = StateCache(cache_file)
+    boa.env.fork_rpc(
+        CachedRPC(EthereumRPC(RPC_URL), cache, chain_id, block),
+        block_identifier=block,
+    )
+    erc20 = boa.loads_abi(json.dumps(ERC20_BALANCE_ABI), name="ERC20")
+    return {k: erc20.at(v) for k, v in contract_addrs.items()}
+
+
+def fork_balances(block, contract_addrs, batches, cache_file=FORK_CACHE_FILE):
+    """
+    Read balances one call at a time on a local fork at `block`.
+
+    Fork state is served from a persistent StateCache, and each batch's
+    balance-mapping slots are prefetched in batched requests before it is
+    read, so reruns at the same block hardly touch the node.
+
+    Args:
+        block (int): Snapshot block
+        contract_addrs (dict): Balance name -> token contract address
+        batches (iterable): Lists of holder addresses
+        cache_file (str): Fork state cache
+
+    Yields:
+        dict: address -> {name: balance} for each batch
+    """
+    client = JsonRpcClient(RPC_URL)
+    cache = StateCache(cache_file)
+    chain_id = int(client.call("eth_chainId", []), 16)
+    contracts = open_fork(block, contract_addrs, chain_id, cache_file)
+
+    slots = None
+    for batch in batches:
+        if slots is None:
+            slots = locate_balance_slots(
+                client, cache, chain_id, block, contract_addrs, batch
+            )
+        prefetch_balance_slots(client, cache, chain_id, block, slots, batch)
+
+        # Progress is reported per batch by the caller
+        yield {
+            addr: {k: v.balanceOf(addr) for k, v in contracts.items()} for addr in batch
+        }
+
+
+# Per-process balanceOf handles, set up once by _init_worker
+_worker_contracts = None
+
+
+def _init_worker(block, contract_addrs, chain_id, cache_file):
+    global _worker_contracts
+    _worker_contracts = open_fork(block, contract_addrs, chain_id, cache_file)
+
+
+def _shard_balances(shard):
+    return {
+        addr: {k: v.balanceOf(addr) for k, v in _worker_contracts.items()}
+        for addr in shard
+    }
+
+
+def map_in_order(pool, fn, batches, window, before=None):
+    """
+    Run `fn` over `batches` on an executor and yield the results in input order.
+
+    At most `window` batches are submitted ahead of the one being yielded, so
+    memory does not grow with the number of batches.
+
+    Args:
+        pool (Executor): Executor the batches run on
+        fn (callable): Function of one batch, picklable for process pools
+        batches (iterable): Batches to run
+        window (int): Batches in flight at once
+        before (callable, optional): Called with each batch before it is submitted
+
+    Yields:
+        The result of `fn` for each batch
+    """
+    in_flight = deque()
+    for batch in batches:
+        if before is not None:
+            before(batch)
+        in_flight.append(pool.submit(fn, batch))
+
+        if len(in_flight) >= window:
+            yield in_flight.popleft().result()
+
+    while in_flight:
+        yield in_flight.popleft().result()
+
+
+def parallel_fork_balances(
+    block, contract_addrs, batches, workers, cache_file=FORK_CACHE_FILE
+):
+    """
+    Read balances on a pool of worker processes, each with its own fork at `block`.
+
+    Each batch's slots are prefetched into the shared SQLite fork cache before
+    it is handed to a worker. At most two batches per worker are in flight, and
+    results are yielded in input order, so the output does not depend on
+    scheduling and memory does not grow with the holder count.
+
+    Args:
+        block (int): Snapshot block
+        contract_addrs (dict): Balance name -> token contract address
+        batches (iterable): Lists of holder addresses
+        workers (int): Worker processes
+        cache_file (str): Fork state cache shared by all workers
+
+    Yields:
+        dict: address -> {name: balance} for each batch
+    """
+    client = JsonRpcClient(RPC_URL)
+    cache = StateCache(cache_file)
+    chain_id = int(client.call("eth_chainId", []), 16)
+
+    slots = None
+
+    def prefetch(batch):
+        nonlocal slots
+        if slots is None:
+            slots = locate_balance_slots(
+                client, cache, chain_id, block, contract_addrs, batch
+            )
+        prefetch_balance_slots(client, cache, chain_id, block, slots, batch)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(block, contract_addrs, chain_id, cache_file),
+    ) as pool:
+        yield from map_in_order(
+            pool, _shard_balances, batches, 2 * workers, before=prefetch
+        )
+
+
+def replay_snapshot(client, block, contract_addrs, batches):
+    """
+    Rebuild balances at `block` by replaying every Transfer event up to it.
+
+    Cost grows with the number of events rather than holders x contracts.
+
+    Args:
+        client (JsonRpcClient): Node to read logs from
+        block (int): Snapshot block
+        contract_addrs (dict): Balance name -> token contract address
+        batches (iterable): Lists of holder addresses to report
+
+    Yields:
+        dict: address -> {name: balance} for each batch
+    """
+    names = {v.lower(): k for k, v in contract_addrs.items()}
+    balances = replay_balances(
+        iter_transfers(client, list(contract_addrs.values()), 0, block), names
+    )
+    for batch in batches:
+        yield {
+            addr: {k: balances[k].get(addr.lower(), 0) for k in contract_addrs}
+            for addr in batch
+        }
+
+
+def cross_check(client, block, contract_addrs, sample):
+    """
+    Compare sampled snapshot rows against balanceOf at `block`.
+
+    Args:
+        sample (dict): address -> {name: balance} rows to check
+
+    Returns:
+        list: (address, name, snapshot balance, balanceOf) for every mismatch
+    """
+    live = multicall_balances(client, block, contract_addrs, list(sample))
+
+    mismatches = [
+        (addr, k, sample[addr][k], live[addr][k])
+        for addr in sample
+        for k in contract_addrs
+        if sample[addr][k] != live[addr][k]
+    ]
+    print(
+        f"Cross-checked {len(sample)} holders against balanceOf: "
+        f"{len(mismatches)} mismatches"
+    )
+    for addr, k, replayed, actual in mismatches:
+        print(f"  {addr} {k}: replayed {replayed}, balanceOf {actual}")
+    return mismatches
+
+
+def iter_addresses(path, chunk_size=1 << 20):
+    """
+    Lazily yield holder addresses from an interactions report.
+
+    CSV reports are read row by row. JSON reports are scanned in chunks for
+    their top-level "0x...": keys, so the whole document is never loaded.
+    """
+    if path.endswith(".csv"):
+        with open(path, "r", newline="") as f:
+            for row in csv.DictReader(f):
+                yield row["address"]
+        return
+
+    # Only object keys are followed by a colon; contract lists are not
+    key = re.compile(r'"(0x[0-9a-fA-F]{40})"\s{0,16}:')
+    # A key match is under 64 characters, so one starting before the last
+    # 128 characters of the buffer is complete
+    overlap = 128
+    tail = ""
+    with open(path, "r") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            text = tail + chunk
+            cutoff = len(text) - overlap if chunk else len(text)
+            for match in key.finditer(text):
+                if match.start() >= cutoff:
+                    break
+                yield match.group(1)
+            if not chunk:
+                return
+            tail = text[max(cutoff, 0) :]
+
+
+def iter_batches(iterable, size):
+    """Group an iterable into lists of `size` items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def resume_position(jsonl_path):
+    """
+    Find how far a previous run got.
+
+    A line torn by a crash mid-write is cut off the file.
+
+    Returns:
+        tuple: (number of complete rows, address of the last row or None)
+    """
+    if not os.path.exists(jsonl_path):
+        return 0, None
+
+    count = 0
+    good_end = 0
+    last_line = None
+    with open(jsonl_path, "rb+") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            count += 1
+            good_end += len(line)
+            last_line = line
+        f.truncate(good_end)
+
+    return count, json.loads(last_line)["address"] if last_line else None
+
+
+def write_balance_json(jsonl_path, json_path):
+    """Stream the JSONL rows into the balance_data_<block>.json layout."""
+    with open(jsonl_path, "r") as rows, open(json_path, "w") as out:
+        out.write("{")
+        first = True
+        for line in rows:
+            row = json.loads(line)
+            addr = row.pop("address")
+            body = json.dumps(row, indent=2).replace("\n", "\n  ")
+            out.write(f'{"" if first else ","}\n  {json.dumps(addr)}: {body}')
+            first = False
+        out.write("\n}" if not first else "}")
+
+
+def main():
+    jsonl_filename = f"balance_data_{block}.jsonl"
+    output_filename = f"balance_data_{block}.json"
+
+    if not RESUME and os.path.exists(jsonl_filename):
+        os.remove(jsonl_filename)
+    done, last_addr = resume_position(jsonl_filename)
+
+    addrs = iter_addresses(interactions_file)
+    if done:
+        # Skip what was already written, checking the input has not changed
+        addr = None
+        for _, addr in zip(range(done), addrs):
+            pass
+        if addr != last_addr:
+            raise ValueError(
+                f"{jsonl_filename} does not match {interactions_file}: "
+                f"row {done} is {last_addr}, input has {addr}"
+            )
+        print(f"Resuming after {done} holders")
+    batches = iter_batches(addrs, BATCH_SIZE)
+
+    client = JsonRpcClient(RPC_URL)
+    if SNAPSHOT_MODE == "fork" and WORKERS > 1:
+        results = parallel_fork_balances(block, contract_addrs, batches, WORKERS)
+    elif SNAPSHOT_MODE == "fork":
+        results = fork_balances(block, contract_addrs, batches)
+    elif SNAPSHOT_MODE == "replay":
+        results = replay_snapshot(client, block, contract_addrs, batches)
+    else:
+        results = (
+            multicall_balances(client, block, contract_addrs, batch)
+            for batch in batches
+        )
+
+    # Reservoir sample of written rows for the replay cross-check
+    rng = random.Random(block)
+    sample = []
+    written = done
+    with open(jsonl_filename, "a") as out:
+        for data in results:
+            for addr, bals in data.items():
+                out.write(json.dumps({"address": addr, **bals}) + "\n")
+                written += 1
+                if len(sample) < CROSS_CHECK_SAMPLE:
+                    sample.append((addr, bals))
+                elif (j := rng.randrange(written - done)) < CROSS_CHECK_SAMPLE:
+                    sample[j] = (addr, bals)
+            out.flush()
+            os.fsync(out.fileno())
+            print(f"{written} balances written to {jsonl_filename}")
+
+    if SNAPSHOT_MODE == "replay" and sample:
+        cross_check(client, block, contract_addrs, dict(sample))
+
+    write_balance_json(jsonl_filename, output_filename)
+    print(f"Data saved to {output_filename}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import itertools
+import time
+
+import numpy as np
+import pandas as pd
+from allocate import (
+    COMPONENTS,
+    ROUND_BUDGET,
+    RPC_URL,
+    balance_file,
+    block,
+    eligible_mask,
+    excluded_addresses,
+    get_pool_state,
+    load_balances,
+    squid_weights,
+)
+from rpc import JsonRpcClient
+
+output_file = "allocation_scenarios.csv"
+
+# Every combination of these values is one scenario. Component weights scale
+# the SQUID-equivalent value of each position, as allocate's
+# COMPONENT_WEIGHTS does, thresholds and caps are in SQUID and SQUILL.
+# allocate_kwargs turns a scenario into the matching allocate() arguments.
+SWEEP = {
+    "squid": [1.0],
+    "lp": [0.5, 1.0, 1.5, 2.0],
+    "gauge": [1.0, 1.5, 2.0],
+    "convex": [0.5, 1.0, 1.5],
+    "min_squid": [0, 100, 1_000, 5_000],
+    "cap": [None, 10_000, 25_000, 50_000],
+}
+
+TOP_N = [10, 100]
+
+# Scenarios evaluated per matrix product, bounds memory at holders x chunk
+CHUNK_SIZE = 64
+
+# Rough cost of loading the whitelist with add_bulk_addresses
+GAS_PER_ENTRY = 23_000  # Fresh SSTORE, calldata and loop overhead
+GAS_PER_TX = 21_000
+ENTRIES_PER_TX = 500
+GAS_PRICE_GWEI = 20
+
+
+def scenario_grid(sweep=SWEEP):
+    """Expand {parameter: [values]} into a list of scenario dicts."""
+    keys = list(sweep)
+    return [dict(zip(keys, values)) for values in itertools.product(*sweep.values())]
+
+
+def allocate_kwargs(scenario):
+    """Keyword arguments of allocate.allocate that reproduce a scenario."""
+    return {
+        "min_squid": int(scenario["min_squid"] * 10**18),
+        "cap": None if scenario["cap"] is None else int(scenario["cap"] * 10**18),
+        "component_weights": {name: scenario[name] for name in COMPONENTS},
+    }
+
+
+def component_matrix(addresses, columns, pool_squid, lp_supply, excluded=None):
+    """
+    Holders x components matrix of SQUID-equivalent balances, in whole SQUID.
+
+    Metrics only need float precision, so the exact integer columns are
+    converted once here and every scenario reuses the result.
+    """
+    if excluded is None:
+        excluded = excluded_addresses(addresses, columns)
+    keep = np.fromiter(
+        (addr.lower() not in excluded for addr in addresses), bool, len(addresses)
+    )
+    lp_price = pool_squid / lp_supply
+    prices = {"squid": 1.0, "lp": lp_price, "gauge": lp_price, "convex": lp_price}
+    return np.column_stack(
+        [columns[name][keep].astype(float) * prices[name] / 1e18 for name in COMPONENTS]
+    )
+
+
+def eligibility(addresses, columns, pool_squid, lp_supply, thresholds, excluded=None):
+    """
+    Rows of component_matrix that take part at each min_squid threshold.
+
+    Uses allocate.eligible_mask on the exact weights, so a scenario counts
+    the same holders the allocation itself would.
+
+    Returns:
+        dict: Threshold in SQUID -> boolean mask over the matrix rows
+    """
+    if excluded is None:
+        excluded = excluded_addresses(addresses, columns)
+    keep = np.fromiter(
+        (addr.lower() not in excluded for addr in addresses), bool, len(addresses)
+    )
+    weights = squid_weights(columns, pool_squid, lp_supply)
+    return {
+        threshold: eligible_mask(
+            addresses, weights, int(threshold * 10**18) * lp_supply, excluded
+        )[keep]
+        for threshold in thresholds
+    }
+
+
+def capped_shares(weights, budget, caps):
+    """
+    Proportional split of `budget` over every column of `weights` at once.
+
+    Water-fills all columns together: holders over their column's cap are
+    pinned to it and the rest are rescaled, until no share exceeds a cap.
+    A column whose holders cannot take the budget even at the cap is
+    infeasible and comes back as NaN, like allocate's water_fill refusing it.
+
+    Args:
+        weights (np.ndarray): Holders x scenarios weights
+        budget (float): Amount split in every scenario
+        caps (np.ndarray): Per-scenario cap, np.inf for none
+
+    Returns:
+        np.ndarray: Holders x scenarios allocations
+    """
+    finite_caps = np.where(np.isfinite(caps), caps, 0.0)
+    recipients = (weights > 0).sum(axis=0)
+    short = np.isfinite(caps) & (recipients * finite_caps < budget)
+    weights = np.where(short, 0.0, weights)
+
+    capped = np.zeros(weights.shape, dtype=bool)
+    while True:
+        free = np.where(capped, 0.0, weights)
+        free_total = free.sum(axis=0)
+        room = budget - capped.sum(axis=0) * finite_caps
+        level = np.divide(
+            room, free_total, out=np.zeros_like(room), where=free_total > 0
+        )
+        shares = np.where(capped, finite_caps, free * level)
+        over = ~capped & (shares > caps * (1 + 1e-12))
+        if not over.any():
+            return np.where(short, np.nan, shares)
+        capped |= over
+
+
+def scenario_metrics(shares, top_n=TOP_N):
+    """
+    Recipient count, Gini, top-N share and loading cost of every column.
+
+    Infeasible columns, NaN in `shares`, get NaN for every metric.
+    """
+    infeasible = np.isnan(shares).any(axis=0)
+    shares = np.nan_to_num(shares)
+    n = shares.shape[0]
+    recipients = (shares > 0).sum(axis=0)
+    ordered = np.sort(shares, axis=0)
+    total = ordered.sum(axis=0)
+
+    # Gini over recipients only: the zero rows sort first, so recipient ranks
+    # are row ranks shifted by the number of zeros
+    ranked = np.arange(1, n + 1) @ ordered - (n - recipients) * total
+    gas = recipients * GAS_PER_ENTRY + -(-recipients // ENTRIES_PER_TX) * GAS_PER_TX
+    metrics = {"recipients": recipients, "load_gas": gas}
+    metrics["load_cost_eth"] = gas * GAS_PRICE_GWEI / 1e9
+
+    # Scenarios whose threshold leaves nobody report NaN
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics["gini"] = (
+            2 * ranked / (recipients * total) - (recipients + 1) / recipients
+        )
+        for top in top_n:
+            metrics[f"top{top}_share"] = ordered[-top:].sum(axis=0) / total
+    return {
+        name: np.where(infeasible, np.nan, values) for name, values in metrics.items()
+    }
+
+
+def evaluate(matrix, eligible, scenarios, budget, chunk_size=CHUNK_SIZE):
+    """
+    Evaluate allocation scenarios in batches of matrix products.
+
+    Args:
+        matrix (np.ndarray): Holders x components, from component_matrix
+        eligible (dict): Threshold -> row mask, from eligibility
+        scenarios (list): Scenario dicts, from scenario_grid
+        budget (float): Round budget in SQUILL
+        chunk_size (int): Scenarios per batch
+
+    Returns:
+        pd.DataFrame: One row per scenario, parameters followed by metrics
+    """
+    rows = []
+    for i in range(0, len(scenarios), chunk_size):
+        chunk = scenarios[i : i + chunk_size]
+        component_weights = np.array(
+            [[scenario[name] for scenario in chunk] for name in COMPONENTS]
+        )
+        caps = np.array(
+            [
+                np.inf if scenario["cap"] is None else scenario["cap"]
+                for scenario in chunk
+            ]
+        )
+
+        weights = matrix @ component_weights
+        mask = np.column_stack([eligible[scenario["min_squid"]] for scenario in chunk])
+        weights = np.where(mask, weights, 0.0)
+
+        metrics = scenario_metrics(capped_shares(weights, budget, caps))
+        for j, scenario in enumerate(chunk):
+            rows.append(
+                {**scenario, **{name: values[j] for name, values in metrics.items()}}
+            )
+    return pd.DataFrame(rows)
+
+
+def main():
+    addresses, columns = load_balances(balance_file)
+    pool_squid, lp_supply = get_pool_state(JsonRpcClient(RPC_URL), block)
+    matrix = component_matrix(addresses, columns, pool_squid, lp_supply)
+    eligible = eligibility(
+        addresses, columns, pool_squid, lp_supply, SWEEP["min_squid"]
+    )
+
+    scenarios = scenario_grid()
+    print(f"Evaluating {len(scenarios)} scenarios over {len(matrix)} holders")
+
+    start = time.time()
+    report = evaluate(matrix, eligible, scenarios, ROUND_BUDGET / 10**18)
+    print(f"Done in {time.time() - start:.2f}s")
+    infeasible = report["recipients"].isna().sum()
+    if infeasible:
+        print(f"{infeasible} scenarios cannot pay out the budget under their cap")
+
+    report.to_csv(output_file, index=False)
+    print(report.sort_values("gini").head(20).to_string(index=False))
+    print(f"\nSaved {len(report)} scenarios to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+import re
+from collections import defaultdict, deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from rpc import RPCError
+
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# Wording nodes use when a getLogs range holds too many results
+RANGE_ERROR = re.compile(
+    r"more than|too (large|many|big|wide)|response size|block range|is limited to",
+    re.IGNORECASE,
+)
+
+Transfer = namedtuple("Transfer", ["contract", "block", "sender", "receiver", "value"])
+
+
+def decode_transfer(log):
+    """Decode an ERC-20 Transfer log into a Transfer tuple."""
+    topics = log["topics"]
+    if len(topics) > 3:
+        value = int(topics[3], 16)
+    else:
+        value = int(log["data"], 16) if log["data"] not in ("0x", "") else 0
+    return Transfer(
+        contract=log["address"].lower(),
+        block=int(log["blockNumber"], 16),
+        sender="0x" + topics[1][-40:].lower(),
+        receiver="0x" + topics[2][-40:].lower(),
+        value=value,
+    )
+
+
+def get_logs(client, contracts, topics, from_block, to_block):
+    """Fetch raw logs of `contracts` matching `topics` in one eth_getLogs request."""
+    return client.call(
+        "eth_getLogs",
+        [
+            {
+                "address": contracts,
+                "topics": topics,
+                "fromBlock": hex(from_block),
+                "toBlock": hex(to_block),
+            }
+        ],
+    )
+
+
+def iter_logs(
+    client,
+    contracts,
+    topics,
+    from_block,
+    to_block,
+    chunk_size=2_000,
+    max_chunk_size=1_000_000,
+    target_logs=5_000,
+    max_workers=4,
+):
+    """
+    Yield raw logs of `contracts` matching `topics` between two blocks.
+
+    The range is fetched in chunks of blocks, `max_workers` at a time. A chunk
+    the node refuses as too large is halved and retried, and chunks that come
+    back well under `target_logs` logs double the size of the next ones, so
+    sparse history is crossed in a few requests. Logs are yielded per chunk,
+    not in block order.
+
+    Args:
+        client (JsonRpcClient): Node to query
+        contracts (list): Contract addresses
+        topics (list): eth_getLogs topic filter
+        from_block (int): First block, inclusive
+        to_block (int): Last block, inclusive
+        chunk_size (int): Initial number of blocks per request
+        max_chunk_size (int): Upper bound for the adaptive chunk size
+        target_logs (int): Logs per request the chunk size steers towards
+        max_workers (int): Requests in flight at once
+
+    Yields:
+        dict: One log, as returned by the node
+    """
+    contracts = [contract.lower() for contract in contracts]
+    cursor = from_block
+    retry = deque()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = {}
+
+        def next_range():
+            nonlocal cursor
+            if retry:
+                return retry.popleft()
+            if cursor > to_block:
+                return None
+            block_range = (cursor, min(to_block, cursor + chunk_size - 1))
+            cursor = block_range[1] + 1
+            return block_range
+
+        def fill():
+            while len(in_flight) < max_workers:
+                block_range = next_range()
+                if block_range is None:
+                    break
+                future = pool.submit(get_logs, client, contracts, topics, *block_range)
+                in_flight[future] = block_range
+
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                start, end = in_flight.pop(future)
+                try:
+                    logs = future.result()
+                except RPCError as e:
+                    if start == end or not RANGE_ERROR.search(e.message):
+                        raise
+                    middle = (start + end) // 2
+                    retry.extend([(start, middle), (middle + 1, end)])
+                    chunk_size = max(1, (end - start + 1) // 2)
+                    continue
+
+                if len(logs) < target_logs // 2 and end - start + 1 >= chunk_size:
+                    chunk_size = min(max_chunk_size, chunk_size * 2)
+
+                yield from logs
+            fill()
+
+
+def iter_transfers(client, contracts, from_block, to_block, **kwargs):
+    """
+    Yield decoded Transfer events of `contracts` between two blocks.
+
+    Fetched with iter_logs, which takes the same chunking keyword arguments.
+    Events are yielded per chunk, not in block order.
+
+    Yields:
+        Transfer: One decoded event
+    """
+    for log in iter_logs(
+        client, contracts, [TRANSFER_TOPIC], from_block, to_block, **kwargs
+    ):
+        yield decode_transfer(log)
+
+
+def replay_balances(transfers, contract_names, to_block=None):
+    """
+    Fold a stream of Transfer events into running balances.
+
+    Mints come from and burns go to the zero address, which is not tracked.
+    The events may arrive in any order, since only their sum matters.
+
+    Args:
+        transfers (iterable): Transfer tuples, e.g. from iter_transfers
+        contract_names (dict): Lowercase token address -> balance name
+        to_block (int, optional): Ignore events after this block
+
+    Returns:
+        dict: name -> {address: balance}
+    """
+    balances = {name: defaultdict(int) for name in contract_names.values()}
+    for transfer in transfers:
+        if to_block is not None and transfer.block > to_block:
+            continue
+        token_balances = balances[contract_names[transfer.contract]]
+        if transfer.sender != ZERO_ADDRESS:
+            token_balances[transfer.sender] -= transfer.value
+        if transfer.receiver != ZERO_ADDRESS:
+            token_balances[transfer.receiver] += transfer.value
+    return {name: dict(token_balances) for name, token_balances in balances.items()}
@@ -1,203 +1,319 @@
 #!/usr/bin/env python3
 
 """
-Verify that the addresses and amounts in the SquillDrop.vy contract match 
-those in airdrop_balances.json.
+Verify that the addresses and amounts in the SquillDrop.vy contract, the
+published airdrop table and optionally the deployed contract match those in
+airdrop_balances.json.
 """
 
 import json
 import os
-import re
-import sys
 
-import boa
+import numpy as np
+from compile_cache import storage_layout
 from dotenv import load_dotenv
-from web3 import Web3
-
-
-def parse_json_with_comments(file_path):
-    """Load address-amount pairs from a JSON file with potential comments."""
-    try:
-        with open(file_path, "r") as f:
-            content = f.read()
-
-            # Parse the addresses and amounts, ignoring commented out lines
-            pattern = r'\["(0x[a-fA-F0-9]+)", "(\d+)"\]'
-            commented_pattern = r'//\["(0x[a-fA-F0-9]+)", "(\d+)"\]'
-
-            # First identify commented addresses
-            commented_addresses = set()
-            for match in re.finditer(commented_pattern, content):
-                commented_addresses.add(match.group(1).lower())
-
-            # Then get non-commented addresses
-            active_data = {}
-            for match in re.finditer(pattern, content):
-                address = match.group(1)
-                amount = match.group(2)
-                if address.lower() not in commented_addresses:
-                    # Store with checksum address as key
-                    active_data[Web3.to_checksum_address(address)] = amount
-
-            return active_data
-    except FileNotFoundError:
-        raise
-
-
-def extract_whitelist_from_contract():
-    """Read the eligible_addresses from the deployed contract."""
-    # Read contract ABI and address from environment or pass directly
-    load_dotenv()
-
-    # Choose network - adjust as needed
-    RPC_URL = os.getenv(
-        "RPC_URL", "https://rpc.frax.com"
-    )  # Default to FRAXTAL if not specified
-
-    try:
-        print(f"Connecting to {RPC_URL}...")
-        # Connect to network using boa
-        boa.set_env(boa.env.fork(RPC_URL))
-
-        # Load contract
-        airdrop_address = os.getenv("AIRDROP_CONTRACT")
-        if not airdrop_address:
-            print(
-                "No contract address found. Please specify AIRDROP_CONTRACT in .env file or as environment variable"
-            )
-            sys.exit(1)
-
-        print(f"Loading contract at {airdrop_address}...")
-        airdrop = boa.load_partial("contracts/SquillDrop.vy").at(airdrop_address)
-
-        # Extract whitelist information
-        contract_whitelist = {}
-
-        # Get eligible addresses - this is a simplified approach
-        # You might need to use events or other methods depending on how the contract data is accessible
-        print("Extracting eligible addresses from contract...")
-
-        # This part would need adjustment based on actual contract structure
-        # We're using the contract's public mapping to query each address in our expected list
-
-        return contract_whitelist
-
-    except Exception as e:
-        print(f"Error connecting to contract: {str(e)}")
-        return {}
-
-
-def parse_vyper_whitelist():
-    """Parse the _whitelist() function in SquillDrop.vy to extract addresses and amounts."""
-    try:
-        with open("contracts/SquillDrop.vy", "r") as f:
-            content = f.read()
-
-            # Find the _whitelist function section
-            whitelist_section = re.search(
-                r"@internal\s+def\s+_whitelist\(\):\s+(.*?)(?=\n\n|\Z)",
-                content,
-                re.DOTALL,
-            )
-
-            if not whitelist_section:
-                raise Exception("Could not find _whitelist function in contract")
-
-            whitelist_content = whitelist_section.group(1)
-
-            # Extract address-amount pairs
-            pattern = r"self\.eligible_addresses\[(0x[a-fA-F0-9]+)\]\s+=\s+(\d+)"
-            address_amounts = {}
-
-            for match in re.finditer(pattern, whitelist_content):
-                address = Web3.to_checksum_address(match.group(1))
-                amount = match.group(2)
-                address_amounts[address] = amount
-
-            return address_amounts
-    except Exception as e:
-        print(f"Error parsing contract: {str(e)}")
-        return {}
-
-
-def main():
-    # Load addresses from the JSON file
-    v2_addresses = parse_json_with_comments("scripts/airdrop_balances.json")
-    print(f"Loaded {len(v2_addresses)} addresses from airdrop_balances.json")
-
-    # Parse the contract whitelist
-    contract_addresses = parse_vyper_whitelist()
-    print(f"Found {len(contract_addresses)} addresses in SquillDrop.vy contract")
-
-    # Compare the two lists
-    json_addresses_not_in_contract = []
-    contract_addresses_not_in_json = []
-    amount_mismatches = []
-
-    # Check if all JSON addresses are in contract with matching amounts
-    for addr, json_amount in v2_addresses.items():
-        if addr not in contract_addresses:
-            json_addresses_not_in_contract.append(addr)
-        elif contract_addresses[addr] != json_amount:
-            amount_mismatches.append(
-                {
-                    "address": addr,
-                    "json_amount": json_amount,
-                    "contract_amount": contract_addresses[addr],
-                }
+from eth_abi import decode, encode
+from eth_utils import keccak, to_checksum_address
+from fork_cache import mapping_slot
+from helpers import load_deployment_info
+from rpc import JsonRpcClient
+from whitelist import (
+    Table,
+    diff_tables,
+    read_json_table,
+    read_markdown_table,
+    read_vyper_table,
+    to_hex,
+)
+
+load_dotenv()
+RPC_URL = os.getenv(
+    "RPC_URL", f"https://eth-mainnet.g.alchemy.com/v2/{os.getenv('ALCHEMY_KEY')}"
+)  # Default to Ethereum, where the recorded deployments are
+
+# Deployed contract to check against the JSON, as a deployment/<chain>/*.yaml
+# record or an address on NETWORK. Without either only the contract source is
+# checked. AIRDROP_SOURCE names the source AIRDROP_CONTRACT was compiled from.
+DEPLOYMENT = os.getenv("DEPLOYMENT")
+AIRDROP_CONTRACT = os.getenv("AIRDROP_CONTRACT")
+AIRDROP_SOURCE = os.getenv("AIRDROP_SOURCE")
+NETWORK = os.getenv("NETWORK", "ETHEREUM")
+
+# Chain ids of the networks deployment records name
+CHAIN_IDS = {"ETHEREUM": 1, "FRAXTAL": 252}
+
+# Reference allocation, and the sources checked against it
+JSON_FILE = "scripts/airdrop_balances.json"
+CONTRACT_SOURCE = "contracts/SquillDrop.vy"
+MARKDOWN_FILE = "airdrop1.md"  # Published table of the round, None to skip
+
+REPORT_FILE = "scripts/verification_report.json"
+
+# Discrepancies printed per kind and source; the report lists all of them
+PRINT_LIMIT = 20
+
+# "storage" reads the eligible_addresses slots with eth_getStorageAt,
+# "multicall" calls pending_claim_amount through Multicall3. Storage reads
+# need the deployed contract's source for its layout; without it, or if it
+# has no eligible_addresses mapping, the multicall path is used.
+ONCHAIN_MODE = "storage"
+
+# Requests per JSON-RPC batch, and pending_claim_amount calls per aggregate3
+BATCH_SIZE = 500
+MULTICALL_SIZE = 1_000
+
+# Multicall3, deployed at the same address on Ethereum, Fraxtal and most EVM chains
+MULTICALL3 = "0xcA11bde05977b3631167028862bE2a173976CA11"
+AGGREGATE3_SELECTOR = bytes.fromhex("82ad56cb")
+PENDING_SELECTOR = keccak(text="pending_claim_amount(address)")[:4]
+
+
+def eligible_slot(source):
+    """Storage slot of the eligible_addresses mapping of `source`, or None."""
+    layout = storage_layout(source)["storage_layout"]
+    # Contracts built on whitelist.vy keep the mapping in the module's storage
+    entry = layout.get("eligible_addresses") or layout.get("whitelist", {}).get(
+        "eligible_addresses"
+    )
+    return entry["slot"] if entry else None
+
+
+def eligible_storage(client, airdrop, addrs, block, source):
+    """
+    Read eligible_addresses of every address straight from contract storage.
+
+    The slot of each entry is hashed locally from the storage layout of
+    `source`, the contract `airdrop` was compiled from, so every read is a
+    plain eth_getStorageAt sent in JSON-RPC batches of BATCH_SIZE.
+    """
+    slot = eligible_slot(source)
+    values = client.batched(
+        [
+            (
+                "eth_getStorageAt",
+                [airdrop, hex(mapping_slot(slot, addr, "vyper")), block],
             )
+            for addr in addrs
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    return [int(value, 16) for value in values]
+
+
+def pending_multicall(client, airdrop, addrs, block):
+    """
+    Call pending_claim_amount of every address through Multicall3.
+
+    Each eth_call aggregates MULTICALL_SIZE addresses and the eth_calls go
+    out in one JSON-RPC batch, so thousands of entries take a single round
+    trip. Does not depend on the storage layout of the deployed contract.
+    """
+    payloads = []
+    for i in range(0, len(addrs), MULTICALL_SIZE):
+        calls = [
+            (airdrop, False, PENDING_SELECTOR + encode(["address"], [addr]))
+            for addr in addrs[i : i + MULTICALL_SIZE]
+        ]
+        calldata = AGGREGATE3_SELECTOR + encode(["(address,bool,bytes)[]"], [calls])
+        payloads.append(
+            ("eth_call", [{"to": MULTICALL3, "data": "0x" + calldata.hex()}, block])
+        )
 
-    # Check if all contract addresses are in JSON
-    for addr in contract_addresses:
-        if addr not in v2_addresses:
-            contract_addresses_not_in_json.append(addr)
+    values = []
+    for result in client.batched(payloads, batch_size=BATCH_SIZE):
+        (returned,) = decode(["(bool,bytes)[]"], bytes.fromhex(result[2:]))
+        values.extend(int.from_bytes(return_data, "big") for _, return_data in returned)
+    return values
+
+
+def extract_whitelist_from_contract(
+    client, airdrop_address, expected, mode=ONCHAIN_MODE, source=None
+):
+    """
+    Read the eligible_addresses of the deployed contract.
+
+    A mapping cannot be enumerated, so only the addresses of the expected
+    table are read, all at one block. Entries that read zero were never
+    loaded, removed or already claimed, and are left out like absent ones.
+
+    Args:
+        client (JsonRpcClient): Node of the chain the contract is deployed on
+        airdrop_address (str): Deployed claim contract
+        expected (Table): Whitelist whose addresses are read
+        mode (str): "storage" or "multicall"
+        source (str, optional): Source the contract was compiled from, needed
+            for "storage"
+
+    Returns:
+        tuple: (Table of the non-zero entries, block number read at)
+    """
+    if mode == "storage" and (source is None or eligible_slot(source) is None):
+        print(
+            f"Storage layout of {airdrop_address} unknown "
+            f"({source or 'no source recorded'}), calling it instead"
+        )
+        mode = "multicall"
+
+    block = client.block_number()
+    print(
+        f"Reading {len(expected)} eligible_addresses entries of "
+        f"{airdrop_address} at block {block} ({mode})..."
+    )
+    addrs = expected.addresses()
+    if mode == "storage":
+        values = eligible_storage(client, airdrop_address, addrs, hex(block), source)
+    else:
+        values = pending_multicall(client, airdrop_address, addrs, hex(block))
+    amounts = np.array(values, dtype=object)
+    onchain = Table(f"{airdrop_address} at block {block}", expected.keys, amounts)
+    return onchain.select((amounts > 0).astype(bool)), block
+
+
+def deployment_source(info, deployment_dir="deployment"):
+    """
+    Contract source a deployment record was compiled from, or None.
+
+    Newer records name it; older ones only have it in their Vyper output
+    artifact, if that was saved.
+    """
+    if info.get("contract_source"):
+        return info["contract_source"]
+    artifact = (info.get("artifacts") or {}).get("vyper_output")
+    if artifact and os.path.exists(os.path.join(deployment_dir, artifact)):
+        with open(os.path.join(deployment_dir, artifact)) as f:
+            return next(iter(json.load(f)["settings"]["outputSelection"]))
+    return None
+
+
+def deployed_address():
+    """
+    Contract from DEPLOYMENT or AIRDROP_CONTRACT, if one is configured.
+
+    Returns:
+        tuple: (address or None, network it is deployed on, source or None)
+    """
+    if DEPLOYMENT:
+        info = load_deployment_info(DEPLOYMENT)
+        return info["contract_address"], info["network"], deployment_source(info)
+    return AIRDROP_CONTRACT, NETWORK, AIRDROP_SOURCE
+
+
+def check_deployment(client, airdrop_address, network):
+    """
+    Make sure the node serves `network` and has code at `airdrop_address`.
+
+    Every read of a contract that is not there returns zero, so a run against
+    the wrong chain or address would otherwise report every entry as missing.
+    """
+    chain_id, code = client.batch(
+        [("eth_chainId", []), ("eth_getCode", [airdrop_address, "latest"])]
+    )
+    expected = CHAIN_IDS[network.upper()]
+    if int(chain_id, 16) != expected:
+        raise ValueError(
+            f"RPC_URL serves chain {int(chain_id, 16)}, but {airdrop_address} "
+            f"is deployed on {network} (chain {expected})"
+        )
+    if code in ("0x", ""):
+        raise ValueError(f"No contract at {airdrop_address} on {network}")
+
+
+def describe_diff(expected, actual):
+    """
+    Print the discrepancies of `actual` against `expected`.
+
+    Returns:
+        dict: Report entry of `actual`, every discrepancy listed
+    """
+    missing, extra, mismatches = diff_tables(expected, actual)
+    entry = {
+        "entries": len(actual),
+        "total_amount": str(actual.total()),
+        "tolerance": str(actual.tolerance),
+        "duplicates": [to_checksum_address(to_hex(key)) for key in actual.duplicates],
+        "missing": [to_checksum_address(to_hex(key)) for key in missing],
+        "extra": [to_checksum_address(to_hex(key)) for key in extra],
+        "amount_mismatches": [
+            {
+                "address": to_checksum_address(to_hex(key)),
+                "expected_amount": str(expected_amount),
+                "actual_amount": str(actual_amount),
+            }
+            for key, expected_amount, actual_amount in mismatches
+        ],
+    }
 
-    # Report results
-    if (
-        not json_addresses_not_in_contract
-        and not contract_addresses_not_in_json
-        and not amount_mismatches
+    if not any(
+        entry[kind] for kind in ("duplicates", "missing", "extra", "amount_mismatches")
     ):
         print(
-            "\n✅ SUCCESS: All addresses and amounts match between airdrop_balances.json and the contract!"
+            f"\n✅ SUCCESS: {actual.name} matches {expected.name} ({len(actual)} entries)"
         )
-    else:
-        print("\n❌ Verification failed! Discrepancies found:")
+        return entry
 
-        if json_addresses_not_in_contract:
-            print(
-                f"\n{len(json_addresses_not_in_contract)} addresses in JSON but not in contract:"
-            )
-            for addr in json_addresses_not_in_contract:
+    print(f"\n❌ {actual.name} does not match {expected.name}! Discrepancies found:")
+    for kind, label in (
+        ("missing", f"addresses in {expected.name} but not in {actual.name}"),
+        ("extra", f"addresses in {actual.name} but not in {expected.name}"),
+        ("duplicates", f"addresses listed more than once in {actual.name}"),
+    ):
+        if entry[kind]:
+            print(f"\n{len(entry[kind])} {label}:")
+            for addr in entry[kind][:PRINT_LIMIT]:
                 print(f"  - {addr}")
 
-        if contract_addresses_not_in_json:
-            print(
-                f"\n{len(contract_addresses_not_in_json)} addresses in contract but not in JSON:"
-            )
-            for addr in contract_addresses_not_in_json:
-                print(f"  - {addr}")
+    if entry["amount_mismatches"]:
+        print(f"\n{len(entry['amount_mismatches'])} amount mismatches:")
+        for mismatch in entry["amount_mismatches"][:PRINT_LIMIT]:
+            print(f"  - {mismatch['address']}:")
+            print(f"    Expected: {mismatch['expected_amount']}")
+            print(f"    Actual: {mismatch['actual_amount']}")
+
+    if any(
+        len(value) > PRINT_LIMIT for value in entry.values() if isinstance(value, list)
+    ):
+        print(f"\nOnly the first {PRINT_LIMIT} of each kind are shown")
+    return entry
+
 
-        if amount_mismatches:
-            print(f"\n{len(amount_mismatches)} amount mismatches:")
-            for mismatch in amount_mismatches:
-                print(f"  - {mismatch['address']}:")
-                print(f"    JSON: {mismatch['json_amount']}")
-                print(f"    Contract: {mismatch['contract_amount']}")
+def main():
+    expected = read_json_table(JSON_FILE)
+    print(f"Loaded {len(expected)} addresses from {JSON_FILE}")
+
+    sources = [read_vyper_table(CONTRACT_SOURCE)]
+    if MARKDOWN_FILE:
+        sources.append(read_markdown_table(MARKDOWN_FILE))
+    for table in sources:
+        print(f"Found {len(table)} addresses in {table.name}")
+
+    # Compare against the deployed contract, if one is configured. Claimed
+    # entries read zero, so addresses missing on chain may just have claimed.
+    airdrop_address, network, source = deployed_address()
+    if airdrop_address:
+        client = JsonRpcClient(RPC_URL)
+        check_deployment(client, airdrop_address, network)
+        onchain, _ = extract_whitelist_from_contract(
+            client, airdrop_address, expected, source=source
+        )
+        print(f"Found {len(onchain)} addresses with a balance on chain")
+        sources.append(onchain)
 
-    # Generate summary report
     report = {
-        "total_addresses_v2_json": len(v2_addresses),
-        "total_addresses_contract": len(contract_addresses),
-        "addresses_in_json_not_in_contract": json_addresses_not_in_contract,
-        "addresses_in_contract_not_in_json": contract_addresses_not_in_json,
-        "amount_mismatches": amount_mismatches,
+        "reference": {
+            "source": expected.name,
+            "entries": len(expected),
+            "total_amount": str(expected.total()),
+            "duplicates": [
+                to_checksum_address(to_hex(key)) for key in expected.duplicates
+            ],
+        },
+        "sources": {table.name: describe_diff(expected, table) for table in sources},
     }
 
-    with open("scripts/verification_report.json", "w") as f:
+    with open(REPORT_FILE, "w") as f:
         json.dump(report, f, indent=2)
 
-    print(f"\nDetailed verification report saved to scripts/verification_report.json")
+    print(f"\nDetailed verification report saved to {REPORT_FILE}")
 
 
 if __name__ == "__main__":
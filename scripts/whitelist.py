@@ -0,0 +1,206 @@
+import binascii
+import re
+from collections import namedtuple
+
+import numpy as np
+
+DECIMALS = 18
+
+# One row per line in every source, matched on bytes so nothing is decoded
+JSON_ROW = re.compile(rb'^\s*(//)?\s*\["0x([0-9a-fA-F]{40})",\s*"(\d+)"\]')
+VYPER_ROW = re.compile(
+    rb"^\s*self\.eligible_addresses\[0x([0-9a-fA-F]{40})\]\s*=\s*(\d+)"
+)
+MARKDOWN_ROW = re.compile(
+    rb"^\|\s*0x([0-9a-fA-F]{40})\s*\|\s*([\d,]+)(?:\.(\d+))?\s*\|"
+)
+
+Diff = namedtuple("Diff", ["missing", "extra", "mismatches"])
+
+
+class Table:
+    """
+    Whitelist of one source, normalized so any two sources can be diffed.
+
+    Addresses are kept as raw 20-byte keys in a sorted numpy array and amounts
+    as exact integers in an object array, the same order. Nothing is
+    checksummed; only reported discrepancies are formatted.
+
+    Args:
+        name (str): Source the table was read from
+        keys (np.ndarray): Sorted, unique 20-byte addresses (dtype S20)
+        amounts (np.ndarray): Token amounts in wei (object dtype)
+        tolerance (int): How far an amount may be off another source's,
+            for sources that only show rounded amounts
+        duplicates (np.ndarray): Keys listed more than once in the source
+    """
+
+    def __init__(self, name, keys, amounts, tolerance=0, duplicates=None):
+        self.name = name
+        self.keys = keys
+        self.amounts = amounts
+        self.tolerance = tolerance
+        self.duplicates = (
+            np.array([], dtype="S20") if duplicates is None else duplicates
+        )
+
+    @classmethod
+    def from_rows(cls, name, keys, amounts, tolerance=0):
+        """
+        Build a table from unsorted rows.
+
+        An address listed more than once keeps its last amount, the way a
+        later add_address overwrites an earlier one.
+
+        Args:
+            keys (list): 20-byte addresses
+            amounts (list): Integer amounts, same order
+        """
+        keys = np.array(keys, dtype="S20")
+        amounts = np.array(amounts, dtype=object)
+        order = np.argsort(keys, kind="stable")
+        keys, amounts = keys[order], amounts[order]
+
+        # Within a run of equal keys the stable sort keeps file order
+        repeated = keys[1:] == keys[:-1]
+        last = np.append(~repeated, True)
+        return cls(
+            name, keys[last], amounts[last], tolerance, np.unique(keys[1:][repeated])
+        )
+
+    def __len__(self):
+        return len(self.keys)
+
+    def total(self):
+        """Sum of all amounts."""
+        return int(self.amounts.sum()) if len(self) else 0
+
+    def addresses(self):
+        """Addresses as lowercase hex strings, in key order."""
+        return [to_hex(key) for key in self.keys]
+
+    def select(self, mask, name=None):
+        """Table of the rows where `mask` is set."""
+        return Table(
+            name or self.name,
+            self.keys[mask],
+            self.amounts[mask],
+            self.tolerance,
+            self.duplicates,
+        )
+
+
+def to_hex(key):
+    """Lowercase 0x address of a key; numpy strips trailing zero bytes from S20."""
+    return "0x" + key.ljust(20, b"\0").hex()
+
+
+def _read_rows(path, pattern, row):
+    keys, amounts = [], []
+    with open(path, "rb") as f:
+        for line in f:
+            match = pattern.match(line)
+            if match:
+                parsed = row(match)
+                if parsed is not None:
+                    keys.append(parsed[0])
+                    amounts.append(parsed[1])
+    return keys, amounts
+
+
+def read_json_table(path):
+    """
+    Read an airdrop_balances.json file, skipping rows commented out with //.
+
+    Returns:
+        Table: Exact amounts
+    """
+
+    def row(match):
+        if match.group(1):
+            return None
+        return binascii.unhexlify(match.group(2)), int(match.group(3))
+
+    return Table.from_rows(path, *_read_rows(path, JSON_ROW, row))
+
+
+def read_vyper_table(path):
+    """
+    Read the literal eligible_addresses assignments of a contract's _whitelist().
+
+    Returns:
+        Table: Exact amounts
+    """
+    keys, amounts = [], []
+    with open(path, "rb") as f:
+        inside = False
+        for line in f:
+            if line.startswith(b"def _whitelist("):
+                inside = True
+            elif inside and line[:1] not in (b" ", b"\t", b"\n", b"\r"):
+                # The next decorator or top-level statement ends the function
+                break
+            elif inside:
+                match = VYPER_ROW.match(line)
+                if match:
+                    keys.append(binascii.unhexlify(match.group(1)))
+                    amounts.append(int(match.group(2)))
+    return Table.from_rows(path, keys, amounts)
+
+
+def read_markdown_table(path, decimals=DECIMALS):
+    """
+    Read a published airdrop*.md table such as the one write_airdrop_md writes.
+
+    The tables show amounts rounded to whole tokens or tenths, so the table's
+    tolerance is half a unit of the coarsest precision it uses.
+
+    Returns:
+        Table: Amounts in wei, to the precision shown
+    """
+    precision = [None]
+
+    def row(match):
+        whole, fraction = match.group(2).replace(b",", b""), match.group(3) or b""
+        digits = len(fraction)
+        if precision[0] is None or digits < precision[0]:
+            precision[0] = digits
+        scale = 10 ** (decimals - digits)
+        return binascii.unhexlify(match.group(1)), int(whole + fraction) * scale
+
+    keys, amounts = _read_rows(path, MARKDOWN_ROW, row)
+    tolerance = 10 ** (decimals - (precision[0] or 0)) // 2
+    return Table.from_rows(path, keys, amounts, tolerance)
+
+
+def _locate(keys, sorted_keys):
+    """Positions of `keys` in `sorted_keys`, and which of them are present there."""
+    if len(sorted_keys) == 0:
+        return np.zeros(len(keys), dtype=int), np.zeros(len(keys), dtype=bool)
+    positions = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return positions, sorted_keys[positions] == keys
+
+
+def diff_tables(expected, actual):
+    """
+    Compare two tables by binary search over their sorted keys.
+
+    Amounts count as equal within the larger tolerance of the two tables.
+
+    Returns:
+        Diff: (keys only in `expected`, keys only in `actual`,
+            [(key, expected amount, actual amount)] for amounts that differ)
+    """
+    positions, found = _locate(expected.keys, actual.keys)
+    _, found_back = _locate(actual.keys, expected.keys)
+
+    ours = expected.amounts[found]
+    theirs = actual.amounts[positions[found]]
+    tolerance = max(expected.tolerance, actual.tolerance)
+    off = (np.abs(ours - theirs) > tolerance).astype(bool)
+
+    return Diff(
+        expected.keys[~found],
+        actual.keys[~found_back],
+        list(zip(expected.keys[found][off], ours[off], theirs[off])),
+    )
@@ -1,25 +1,44 @@
+import os
+import sys
+
 import boa
 import pytest
+from hypothesis import settings
+
+# Let tests import the off-chain builders in scripts/
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from compile_cache import load_partial  # noqa: E402
+
+# Long stateful fuzzing runs: --include-hypothesis --hypothesis-profile=fuzz
+settings.register_profile("fuzz", max_examples=50_000, deadline=None)
+
+# The token is deployed once per session and the claim contracts once per
+# module. boa's pytest plugin runs every test, and every Hypothesis example,
+# inside boa.env.anchor(), so whatever a test changes is rolled back before
+# the next one starts. Fixture anchors unwind in reverse order of setup, so
+# only fixtures that every stateful module fixture depends on are session-
+# scoped; anything else would keep earlier module state alive.
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def owner():
     return boa.env.generate_address()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def alice():
     return boa.env.generate_address()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def bob():
     return boa.env.generate_address()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def token(owner):
-    contract = boa.load_partial("contracts/mocks/MockToken.vy")
+    contract = load_partial("contracts/mocks/MockToken.vy")
     with boa.env.prank(owner):
         token = contract.deploy("Test Token", "TEST", 18)
 
@@ -28,19 +47,19 @@ def token(owner):
     return token
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def reward_amount():
     return 100 * 10**18
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def survey(owner, token, reward_amount):
-    contract = boa.load_partial("contracts/SquillDrop.vy")
+    contract = load_partial("contracts/SquillDrop.vy")
     with boa.env.prank(owner):
         instance = contract.deploy(token.address)
 
-        # Fund contract
-        token.transfer(instance.address, reward_amount * 10)
+        # Fund contract, minting so the owner keeps the full initial supply
+        token._mint_for_testing(instance.address, reward_amount * 10)
     return instance
 
 
@@ -51,11 +70,36 @@ def pytest_addoption(parser):
         default=False,
         help="Include Hypothesis tests",
     )
+    parser.addoption(
+        "--gas-benchmark",
+        action="store_true",
+        default=False,
+        help="Run gas benchmarks against tests/gas_baseline.json",
+    )
+    parser.addoption(
+        "--update-gas-baseline",
+        action="store_true",
+        default=False,
+        help="Rewrite tests/gas_baseline.json with the benchmarked numbers",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "gas_benchmark: tracked gas number, run with --gas-benchmark"
+    )
+
 
 def pytest_collection_modifyitems(config, items):
     if not config.getoption("--include-hypothesis"):
         # Skip Hypothesis tests if the flag is not set
         skip_hypothesis = pytest.mark.skip(reason="Need --include-hypothesis option to run")
         for item in items:
-            if "test_hypothesis" in item.nodeid:
+            if "test_hypothesis" in item.nodeid or "test_stateful" in item.nodeid:
                 item.add_marker(skip_hypothesis)
+
+    if not config.getoption("--gas-benchmark"):
+        skip_benchmark = pytest.mark.skip(reason="Need --gas-benchmark option to run")
+        for item in items:
+            if item.get_closest_marker("gas_benchmark"):
+                item.add_marker(skip_benchmark)
@@ -0,0 +1,190 @@
+import random
+import time
+
+import numpy as np
+import pytest
+from allocate import (
+    EXCLUDED,
+    POOL,
+    allocate,
+    argsort_exact,
+    eligible_mask,
+    excluded_addresses,
+    find_wrappers,
+    largest_remainder,
+    load_balances,
+    squid_weights,
+    water_fill,
+)
+
+GAUGE = "0x" + "11" * 20
+PROXY = "0x" + "22" * 20
+ALICE = "0x" + "aa" * 20
+BOB = "0x" + "bb" * 20
+CAROL = "0x" + "cc" * 20
+
+
+@pytest.fixture
+def snapshot():
+    """
+    Alice holds SQUID and LP, the gauge holds the rest of the LP for Bob's
+    gauge deposit and the voter proxy's gauge tokens, which back Carol's
+    Convex deposit. The pool holds the SQUID behind all 10 LP.
+    """
+    addresses = [POOL, GAUGE, PROXY, ALICE, BOB, CAROL]
+    rows = {
+        "squid": [50, 0, 0, 100, 0, 0],
+        "lp": [0, 8, 0, 2, 0, 0],
+        "gauge": [0, 0, 5, 0, 3, 0],
+        "convex": [0, 0, 0, 0, 0, 5],
+    }
+    columns = {name: np.array(values, dtype=object) for name, values in rows.items()}
+    return addresses, columns
+
+
+def test_find_wrappers(snapshot):
+    """Test that holders backing a whole wrapped component are found"""
+    addresses, columns = snapshot
+    assert find_wrappers(addresses, columns) == {GAUGE, PROXY}
+
+
+def test_weights_count_squid_once(snapshot):
+    """Test that the eligible weights add up to the snapshot's SQUID, once"""
+    addresses, columns = snapshot
+    pool_squid, lp_supply = 50, 10
+
+    weights = squid_weights(columns, pool_squid, lp_supply)
+    mask = eligible_mask(
+        addresses, weights, excluded=excluded_addresses(addresses, columns)
+    )
+
+    assert [addr for addr, keep in zip(addresses, mask) if keep] == [ALICE, BOB, CAROL]
+    assert weights[mask].sum() == columns["squid"].sum() * lp_supply
+
+
+def test_snapshot_wrappers_excluded():
+    """Test that the wrappers of the round's snapshot are all in EXCLUDED"""
+    addresses, columns = load_balances("scripts/balance_data_18922260.json")
+    wrappers = find_wrappers(addresses, columns)
+
+    assert wrappers == {
+        "0xe5e5ed1b50ae33e66ca69df17aa6381fde4e9c7e",
+        "0x989aeb4d175e16225e39e87d0d97a3360524ad80",
+    }
+    assert wrappers <= EXCLUDED
+    assert POOL.lower() in EXCLUDED
+
+
+def weights(*values):
+    return np.array(values, dtype=object)
+
+
+def test_largest_remainder():
+    """Test that shares are rounded down and leftover wei go to the largest remainders"""
+    amounts = largest_remainder(weights(1, 1, 1), 10)
+    assert amounts.tolist() == [4, 3, 3]
+
+    amounts = largest_remainder(weights(10**30, 1, 0), 10**18 + 1)
+    assert amounts.sum() == 10**18 + 1
+    assert amounts[2] == 0
+
+    with pytest.raises(ValueError, match="zero total weight"):
+        largest_remainder(weights(0, 0), 1)
+
+
+def test_water_fill_cap_and_floor():
+    """Test that shares are clamped and the rest is split proportionally"""
+    assert water_fill(weights(1, 1, 8), 100, cap=50).tolist() == [25, 25, 50]
+    assert water_fill(weights(1, 9, 90), 100, floor=10).tolist() == [10, 10, 80]
+    assert water_fill(weights(1, 9, 90), 100, cap=50, floor=20).tolist() == [
+        20,
+        30,
+        50,
+    ]
+
+
+def test_water_fill_zero_weights():
+    """Test that zero weights get the floor, also when every other holder is capped"""
+    amounts = water_fill(weights(36, 508874, 0, 27, 0), 435, cap=145)
+    assert amounts.tolist() == [145, 145, 0, 145, 0]
+
+    amounts = water_fill(weights(0, 0, 5), 10, floor=2)
+    assert amounts.tolist() == [2, 2, 6]
+
+
+def test_water_fill_infeasible():
+    """Test that budgets the bounds cannot meet are rejected"""
+    with pytest.raises(ValueError, match="cannot pay the floor"):
+        water_fill(weights(1, 1), 3, floor=2)
+    with pytest.raises(ValueError, match="exceeds the cap"):
+        water_fill(weights(1, 0), 3, cap=2)
+    with pytest.raises(ValueError, match="below floor"):
+        water_fill(weights(1, 1), 3, cap=1, floor=2)
+    with pytest.raises(ValueError, match="zero total weight"):
+        water_fill(weights(0, 0), 3)
+
+
+def test_water_fill_random():
+    """Test exact sums, bounds and ordering over random feasible inputs"""
+    rng = random.Random(0)
+    for _ in range(500):
+        n = rng.randint(1, 12)
+        w = weights(*(rng.choice([0, rng.randint(1, 10**6)]) for _ in range(n)))
+        if not any(w):
+            continue
+        zeros = sum(1 for value in w if value == 0)
+        floor = rng.choice([0, rng.randint(0, 100)])
+        cap = rng.choice([None, floor + rng.randint(0, 1_000)])
+        high = zeros * floor + (n - zeros) * cap if cap is not None else 10**6
+        budget = rng.randint(n * floor, max(n * floor, high))
+
+        amounts = water_fill(w, budget, cap, floor)
+
+        assert amounts.sum() == budget
+        assert all(floor <= amount for amount in amounts)
+        assert cap is None or all(amount <= cap for amount in amounts)
+        # A larger weight never gets less, give or take the rounded wei
+        for i in range(n):
+            for j in range(n):
+                if w[i] > w[j]:
+                    assert amounts[i] >= amounts[j] - 1
+
+
+def test_argsort_exact():
+    """Test that values equal as floats are still put in exact, stable order"""
+    big = 2**80
+    values = np.array([big + 3, 5, big + 1, big, 5, big + 1], dtype=object)
+    assert float(big + 3) == float(big)
+
+    assert argsort_exact(values).tolist() == [1, 4, 3, 2, 5, 0]
+    assert argsort_exact(values, descending=True).tolist() == [0, 2, 5, 3, 1, 4]
+
+    rng = random.Random(1)
+    values = np.array([rng.getrandbits(100) for _ in range(1_000)], dtype=object)
+    exact = sorted(range(len(values)), key=values.__getitem__)
+    assert argsort_exact(values).tolist() == exact
+
+
+def test_allocate_100k_holders():
+    """Benchmark allocate() on 100k holders against the one-second target"""
+    rng = random.Random(0)
+    n = 100_000
+    addresses = [f"0x{rng.getrandbits(160):040x}" for _ in range(n)]
+    columns = {
+        name: np.array(
+            [rng.choice([0, rng.getrandbits(80)]) for _ in range(n)], dtype=object
+        )
+        for name in ("squid", "lp", "gauge", "convex")
+    }
+    budget = 1_776_000 * 10**18
+
+    for cap in (None, 50 * 10**18):
+        start = time.perf_counter()
+        allocations = allocate(addresses, columns, 3 * 10**24, 10**22, budget, cap=cap)
+        elapsed = time.perf_counter() - start
+        print(f"allocate, 100k holders, cap {cap}: {elapsed:.3f}s")
+
+        assert sum(amount for _, amount in allocations) == budget
+        amounts = [amount for _, amount in allocations]
+        assert amounts == sorted(amounts, reverse=True)
+        assert elapsed < 1.0
@@ -0,0 +1,254 @@
+import boa
+import pytest
+import rlp
+from bulk_load import (
+    CLAIM_TOPIC,
+    TX_BASE_GAS,
+    add_bulk,
+    calldata_gas,
+    encode_add_bulk,
+    pending_entries,
+    send_transactions,
+)
+from compile_cache import load_partial
+from eth_abi import encode
+from eth.exceptions import Revert
+from eth_account import Account
+from eth_utils import keccak
+from rpc import JsonRpcClient, RPCError
+
+ENTRIES = 200
+
+
+@pytest.fixture(scope="module")
+def batch_drop(owner, token):
+    contract = load_partial("contracts/SquillDropBatch.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address)
+    return instance
+
+
+@pytest.fixture(scope="module")
+def entries():
+    return [
+        [str(boa.env.generate_address()), (i + 1) * 12_345 * 10**15]
+        for i in range(ENTRIES)
+    ]
+
+
+def test_add_bulk_packed(batch_drop, owner, entries):
+    """Test that packed records load the same amounts as the ABI arrays"""
+    with boa.env.prank(owner):
+        add_bulk(batch_drop, entries, packed=True)
+
+    for addr, amount in entries:
+        assert batch_drop.eligible_addresses(addr) == amount
+
+
+def test_add_bulk_packed_checks(batch_drop, owner, bob, entries):
+    """Test owner and record length checks"""
+    calldata = encode_add_bulk(entries, packed=True)
+    with pytest.raises(Revert, match="!owner"):
+        boa.env.raw_call(batch_drop.address, sender=bob, data=calldata)
+    with pytest.raises(Revert, match="!length"):
+        boa.env.raw_call(batch_drop.address, sender=owner, data=calldata[:-1])
+
+
+def test_packed_gas_comparison(batch_drop, owner, entries):
+    """Compare transaction gas of add_bulk_packed against add_bulk_addresses"""
+    half = ENTRIES // 2
+    abi_entries, packed_entries = entries[:half], entries[half:]
+
+    with boa.env.prank(owner):
+        abi_execution = add_bulk(batch_drop, abi_entries, packed=False)
+        packed_execution = add_bulk(batch_drop, packed_entries, packed=True)
+
+    abi_calldata = calldata_gas(encode_add_bulk(abi_entries, packed=False))
+    packed_calldata = calldata_gas(encode_add_bulk(packed_entries, packed=True))
+    abi_total = TX_BASE_GAS + abi_calldata + abi_execution
+    packed_total = TX_BASE_GAS + packed_calldata + packed_execution
+
+    print(f"add_bulk_addresses: {abi_total:,} gas ({abi_calldata:,} calldata)")
+    print(f"add_bulk_packed:    {packed_total:,} gas ({packed_calldata:,} calldata)")
+
+    # Records carry no padding, so calldata per entry roughly halves
+    assert len(encode_add_bulk(packed_entries, packed=True)) < 0.55 * len(
+        encode_add_bulk(abi_entries, packed=False)
+    )
+    assert packed_calldata < abi_calldata
+    assert packed_total < abi_total
+
+
+class Node:
+    """
+    JSON-RPC stand-in for a deployed claim contract.
+
+    Args:
+        stored (dict): Address -> eligible_addresses value
+        claimed (list): Addresses with a Claim event
+        deployed_at (int): First block with code at the contract
+        drops (int): Broadcasts of each nonce the node silently drops
+        base_fee (int): Base fee; transactions with a lower fee cap are never mined
+        mine_on_resend (bool): Mine the first broadcast of a nonce just before
+            it is resent, so the resend is refused with "nonce too low"
+        nonce_taken (bool): Refuse resends with "nonce too low" while none
+            of the broadcasts is mined, as if another transaction took the nonce
+    """
+
+    def __init__(
+        self,
+        stored=None,
+        claimed=(),
+        deployed_at=0,
+        drops=0,
+        base_fee=10**9,
+        mine_on_resend=False,
+        nonce_taken=False,
+    ):
+        self.stored = stored or {}
+        self.claimed = claimed
+        self.deployed_at = deployed_at
+        self.drops = drops
+        self.base_fee = base_fee
+        self.mine_on_resend = mine_on_resend
+        self.nonce_taken = nonce_taken
+        # nonce -> [(hash, maxFeePerGas)] of every broadcast
+        self.broadcasts = {}
+        self.mined = set()
+        self.log_ranges = []
+
+    def __call__(self, payload):
+        responses = []
+        for request in payload:
+            response = {"jsonrpc": "2.0", "id": request["id"]}
+            try:
+                response["result"] = self.answer(**request)
+            except RPCError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+            responses.append(response)
+        return responses
+
+    def answer(self, method, params, **kwargs):
+        if method == "eth_blockNumber":
+            return hex(100)
+        if method == "eth_chainId":
+            return hex(1)
+        if method == "eth_getCode":
+            return "0x" if int(params[1], 16) < self.deployed_at else "0x6000"
+        if method == "eth_call":
+            addr = "0x" + params[0]["data"][-40:]
+            return "0x" + encode(["uint256"], [self.stored.get(addr, 0)]).hex()
+        if method == "eth_getLogs":
+            query = params[0]
+            assert query["topics"] == [CLAIM_TOPIC]
+            self.log_ranges.append(
+                (int(query["fromBlock"], 16), int(query["toBlock"], 16))
+            )
+            return [
+                {"data": "0x" + encode(["address", "uint256"], [addr, 1]).hex()}
+                for addr in self.claimed
+            ]
+        if method == "eth_getTransactionCount":
+            return hex(0)
+        if method == "eth_getBlockByNumber":
+            return {"baseFeePerGas": hex(10**9)}
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(10**8)
+        if method == "eth_sendRawTransaction":
+            raw = bytes.fromhex(params[0][2:])
+            tx_hash = "0x" + keccak(raw).hex()
+            # Type 2: chainId, nonce, maxPriorityFeePerGas, maxFeePerGas, ...
+            fields = rlp.decode(raw[1:])
+            nonce, max_fee = (int.from_bytes(fields[i], "big") for i in (1, 3))
+            sent = self.broadcasts.setdefault(nonce, [])
+            if sent and self.mine_on_resend:
+                self.mined.add(sent[0][0])
+            if any(h in self.mined for h, _ in sent) or (sent and self.nonce_taken):
+                raise RPCError({"code": -32000, "message": "nonce too low"})
+            sent.append((tx_hash, max_fee))
+            return tx_hash
+        if method == "eth_getTransactionReceipt":
+            sent = next(s for s in self.broadcasts.values() if params[0] in dict(s))
+            fee = dict(sent)[params[0]]
+            if params[0] not in self.mined and (
+                len(sent) <= self.drops or fee < self.base_fee
+            ):
+                return None
+            self.mined.add(params[0])
+            return {"status": "0x1", "blockNumber": hex(100), "gasUsed": hex(21_000)}
+        raise NotImplementedError(method)
+
+
+def test_pending_entries_skip_claimed(entries):
+    """Test that claimed and already stored entries are not loaded again"""
+    (stored, _), (claimed, _), (changed, _) = entries[:3]
+    node = Node(
+        stored={stored.lower(): entries[0][1], changed.lower(): 1},
+        claimed=[claimed.lower()],
+        deployed_at=42,
+    )
+
+    pending = pending_entries(JsonRpcClient(transport=node), "0x" + "00" * 20, entries)
+
+    assert pending == entries[3:]
+    # Claim logs are read from the deployment block on
+    assert node.log_ranges[0][0] == 42
+
+
+def send(node, **kwargs):
+    send_transactions(
+        JsonRpcClient(transport=node),
+        Account.create(),
+        "0x" + "00" * 20,
+        [(b"", 21_000)],
+        poll_interval=0,
+        receipt_timeout=0,
+        **kwargs,
+    )
+
+
+def test_send_transactions_rebroadcasts():
+    """Test that a dropped transaction is sent again until it is mined"""
+    node = Node(drops=2)
+    send(node)
+
+    (sent,) = node.broadcasts.values()
+    assert len(sent) == 3
+    # Every resend raises the fee cap enough to replace the previous one
+    fees = [fee for _, fee in sent]
+    assert all(b >= a * 1.1 for a, b in zip(fees, fees[1:]))
+
+
+def test_send_transactions_bumps_fees():
+    """Test that a base fee rising above the fee cap is outbid on resend"""
+    node = Node()
+    # Suggested cap is 2 * 1 gwei + 0.1 gwei; the base fee then rises past it
+    node.base_fee = 2.5 * 10**9
+    send(node)
+
+    (sent,) = node.broadcasts.values()
+    assert [fee for _, fee in sent][0] == 2.1 * 10**9
+    assert sent[-1][1] >= node.base_fee
+    assert sent[-1][0] in node.mined
+
+
+def test_send_transactions_nonce_too_low():
+    """Test that a resend refused because the original was mined finds its receipt"""
+    node = Node(drops=1, mine_on_resend=True)
+    send(node)
+
+    (sent,) = node.broadcasts.values()
+    assert len(sent) == 1
+    assert node.mined == {sent[0][0]}
+
+    # The nonce was taken by some other transaction
+    node = Node(drops=10, nonce_taken=True)
+    with pytest.raises(RuntimeError, match="Nonce 0 of transaction 1 was used"):
+        send(node)
+
+
+def test_send_transactions_gives_up():
+    """Test that a transaction that is never mined raises instead of hanging"""
+    node = Node(drops=10)
+    with pytest.raises(TimeoutError, match="not mined after 3 resends"):
+        send(node)
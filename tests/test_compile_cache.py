@@ -0,0 +1,91 @@
+import os
+
+import boa
+import compile_cache
+import pytest
+
+LIB = """
+# @version 0.4.0
+
+counter: uint256
+
+
+@internal
+def bump() -> uint256:
+    self.counter += {step}
+    return self.counter
+"""
+
+MAIN = """
+# @version 0.4.0
+
+import lib
+
+initializes: lib
+
+
+@external
+def bump() -> uint256:
+    return lib.bump()
+"""
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    monkeypatch.setattr(compile_cache, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(compile_cache, "_loaded", {})
+    (tmp_path / "lib.vy").write_text(LIB.format(step=1))
+    (tmp_path / "main.vy").write_text(MAIN)
+    return tmp_path
+
+
+def test_source_hash_covers_imports(sources):
+    """Test that editing an imported module changes the hash"""
+    main = str(sources / "main.vy")
+    before = compile_cache.source_hash(main)
+    assert compile_cache.source_hash(main) == before
+
+    (sources / "lib.vy").write_text(LIB.format(step=2))
+    assert compile_cache.source_hash(main) != before
+
+
+def test_warm_load_skips_compiler(sources, monkeypatch):
+    """Test that a cached contract loads without compiling"""
+    main = str(sources / "main.vy")
+    assert compile_cache.load_partial(main).deploy().bump() == 1
+
+    # A fresh process only has the disk cache
+    monkeypatch.setattr(compile_cache, "_loaded", {})
+    monkeypatch.setattr(
+        boa, "load_partial", lambda *args: pytest.fail("compiler was invoked")
+    )
+    assert compile_cache.load_partial(main).deploy().bump() == 1
+    assert compile_cache.storage_layout(main)["storage_layout"]["lib"]
+
+
+def test_changed_import_recompiles(sources):
+    """Test that a changed module is compiled instead of served stale"""
+    main = str(sources / "main.vy")
+    assert compile_cache.load_partial(main).deploy().bump() == 1
+
+    (sources / "lib.vy").write_text(LIB.format(step=2))
+    assert compile_cache.load_partial(main).deploy().bump() == 2
+
+
+def test_relocated_checkout(sources, tmp_path, monkeypatch):
+    """Test that a moved copy hashes the same but does not reuse stale paths"""
+    main = str(sources / "main.vy")
+    key, data = compile_cache.compiler_data(main)
+
+    copy = tmp_path / "copy"
+    copy.mkdir()
+    for name in ("lib.vy", "main.vy"):
+        (copy / name).write_text((sources / name).read_text())
+    moved = str(copy / "main.vy")
+    assert compile_cache.source_hash(moved) == key
+
+    monkeypatch.setattr(compile_cache, "_loaded", {})
+    moved_key, moved_data = compile_cache.compiler_data(moved)
+    assert moved_key == key
+    assert str(moved_data.file_input.resolved_path) == os.path.realpath(moved)
+    assert compile_cache.load_partial(moved).deploy().bump() == 1
@@ -0,0 +1,231 @@
+import boa
+import pytest
+from boa.util.abi import Address
+from compile_cache import load_partial
+from eth_utils import keccak
+from fork_cache import (
+    CachedRPC,
+    StateCache,
+    find_balance_slot,
+    mapping_slot,
+    prefetch_balance_slots,
+)
+from rpc import JsonRpcClient
+
+BLOCK = 1_000
+CHAIN_ID = 252
+
+
+class FakeRPC:
+    """
+    boa RPC stand-in that answers every request from a fixed function and
+    counts what reaches it.
+    """
+
+    identifier = "fake"
+    name = "fake"
+
+    def __init__(self):
+        self.requests = []
+
+    def value(self, method, params):
+        return "0x" + keccak(repr((method, params)).encode()).hex()
+
+    def fetch(self, method, params):
+        self.requests.append((method, params))
+        return self.value(method, params)
+
+    def fetch_multi(self, payloads):
+        return [self.fetch(method, params) for method, params in payloads]
+
+
+class StorageNode:
+    """
+    JSON-RPC stand-in serving eth_getStorageAt from the boa env.
+
+    Args:
+        block (int): The only block it answers for
+    """
+
+    def __init__(self, block=BLOCK):
+        self.block = block
+        self.requests = 0
+
+    def __call__(self, payload):
+        self.requests += len(payload)
+        return [
+            {"jsonrpc": "2.0", "id": request["id"], "result": self.answer(**request)}
+            for request in payload
+        ]
+
+    def answer(self, method, params, **kwargs):
+        assert method == "eth_getStorageAt"
+        address, slot, block = params
+        assert int(block, 16) == self.block
+        value = boa.env.evm.get_storage(Address(address), int(slot, 16))
+        return f"0x{value:064x}"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return StateCache(str(tmp_path / "fork.db"))
+
+
+@pytest.fixture
+def mock_token(owner):
+    contract = load_partial("contracts/mocks/MockToken.vy")
+    with boa.env.prank(owner):
+        return contract.deploy("Test Token", "TEST", 18)
+
+
+def test_state_cache_keys(cache):
+    """Test that values are keyed by chain, block, address and slot"""
+    address = "0x" + "Ab" * 20
+    cache.put_many(CHAIN_ID, BLOCK, {(address, 5): "0x01", (address, "code"): "0x60"})
+
+    assert cache.get(CHAIN_ID, BLOCK, address.lower(), 5) == "0x01"
+    assert cache.get(CHAIN_ID, BLOCK, address, "code") == "0x60"
+    assert cache.get(1, BLOCK, address, 5) is None
+    assert cache.get(CHAIN_ID, BLOCK + 1, address, 5) is None
+    assert cache.get(CHAIN_ID, BLOCK, address, 6) is None
+
+    cache.put_balance_slot(CHAIN_ID, address, 3, "vyper")
+    assert cache.get_balance_slot(CHAIN_ID, address.lower()) == (3, "vyper")
+    assert cache.get_balance_slot(1, address) is None
+
+
+def test_cached_rpc_second_run(tmp_path):
+    """Test that a second run at the same block is served from disk"""
+    path = str(tmp_path / "fork.db")
+    address = "0x" + "11" * 20
+    requests = [
+        ("eth_getStorageAt", [address, hex(7), hex(BLOCK)]),
+        ("eth_getBalance", [address, hex(BLOCK)]),
+        ("eth_getCode", [address, hex(BLOCK)]),
+        ("eth_getTransactionCount", [address, hex(BLOCK)]),
+    ]
+
+    first_rpc = FakeRPC()
+    first = CachedRPC(first_rpc, StateCache(path), CHAIN_ID, BLOCK)
+    answers = [first.fetch(*requests[0])] + first.fetch_multi(requests[1:])
+    assert answers == [first_rpc.value(*request) for request in requests]
+    assert len(first_rpc.requests) == 4
+
+    # A new process opens the same file
+    second_rpc = FakeRPC()
+    second = CachedRPC(second_rpc, StateCache(path), CHAIN_ID, BLOCK)
+    assert second.fetch_multi(requests) == answers
+    assert [second.fetch(*request) for request in requests] == answers
+    assert second_rpc.requests == []
+
+    # Unpinned tags, other blocks, other chains and other methods go to the node
+    uncached = [
+        ("eth_getStorageAt", [address, hex(7), "latest"]),
+        ("eth_getStorageAt", [address, hex(7), hex(BLOCK + 1)]),
+        ("eth_call", [{"to": address, "data": "0x"}, hex(BLOCK)]),
+    ]
+    for request in uncached:
+        second.fetch(*request)
+    other_chain = CachedRPC(second_rpc, StateCache(path), 1, BLOCK)
+    other_chain.fetch(*requests[0])
+    assert len(second_rpc.requests) == 4
+    assert second.fetch_multi(uncached) == [
+        second_rpc.value(*request) for request in uncached
+    ]
+    assert len(second_rpc.requests) == 7
+
+
+def test_find_balance_slot_vyper(cache, mock_token, alice):
+    """Test that the balance mapping of a Vyper token is found"""
+    mock_token._mint_for_testing(alice, 12_345)
+    node = StorageNode()
+    client = JsonRpcClient(transport=node)
+    holders = [boa.env.generate_address(), alice]
+
+    found = find_balance_slot(
+        client, cache, CHAIN_ID, BLOCK, mock_token.address, holders, [0, 12_345]
+    )
+
+    assert found[1] == "vyper"
+    slot = mapping_slot(found[0], str(alice), "vyper")
+    assert boa.env.evm.get_storage(Address(mock_token.address), slot) == 12_345
+
+    # Remembered for later runs
+    requests = node.requests
+    assert (
+        find_balance_slot(client, cache, CHAIN_ID, BLOCK, mock_token.address, [], [])
+        == found
+    )
+    assert node.requests == requests
+
+
+def test_find_balance_slot_solidity(cache, mock_token, alice):
+    """Test that a mapping hashed key first, as Solidity does, is found"""
+    slot = 4
+    key = keccak(bytes(12) + bytes.fromhex(str(alice)[2:]) + slot.to_bytes(32, "big"))
+    boa.env.evm.set_storage(
+        Address(mock_token.address), int.from_bytes(key, "big"), 777
+    )
+    client = JsonRpcClient(transport=StorageNode())
+
+    found = find_balance_slot(
+        client, cache, CHAIN_ID, BLOCK, mock_token.address, [alice], [777]
+    )
+    assert found == (slot, "solidity")
+
+
+def test_find_balance_slot_not_found(cache, mock_token, alice):
+    """Test that no match, or no holder with a balance, finds nothing"""
+    client = JsonRpcClient(transport=StorageNode())
+
+    assert (
+        find_balance_slot(
+            client, cache, CHAIN_ID, BLOCK, mock_token.address, [alice], [0]
+        )
+        is None
+    )
+    assert (
+        find_balance_slot(
+            client, cache, CHAIN_ID, BLOCK, mock_token.address, [alice], [5]
+        )
+        is None
+    )
+    assert cache.get_balance_slot(CHAIN_ID, mock_token.address) is None
+
+
+def test_prefetch_balance_slots(cache, mock_token):
+    """Test that every holder's slot is cached once and read back by CachedRPC"""
+    holders = [str(boa.env.generate_address()) for _ in range(30)]
+    for i, addr in enumerate(holders):
+        mock_token._mint_for_testing(addr, i + 1)
+    node = StorageNode()
+    client = JsonRpcClient(transport=node)
+    slot, layout = find_balance_slot(
+        client, cache, CHAIN_ID, BLOCK, mock_token.address, holders, [1]
+    )
+    tokens = {mock_token.address: (slot, layout)}
+
+    prefetch_balance_slots(
+        client, cache, CHAIN_ID, BLOCK, tokens, holders, batch_size=7
+    )
+    requests = node.requests
+    prefetch_balance_slots(client, cache, CHAIN_ID, BLOCK, tokens, holders)
+    assert node.requests == requests
+
+    rpc = FakeRPC()
+    cached = CachedRPC(rpc, cache, CHAIN_ID, BLOCK)
+    values = cached.fetch_multi(
+        [
+            (
+                "eth_getStorageAt",
+                [
+                    str(mock_token.address),
+                    hex(mapping_slot(slot, addr, layout)),
+                    hex(BLOCK),
+                ],
+            )
+            for addr in holders
+        ]
+    )
+    assert [int(value, 16) for value in values] == list(range(1, 31))
+    assert rpc.requests == []
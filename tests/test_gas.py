@@ -0,0 +1,137 @@
+import json
+import os
+
+import boa
+import pytest
+from compile_cache import load_partial
+from gas import commit, fresh_env
+
+# Skipped without --gas-benchmark; gas_profile adds boa's per-function and
+# per-line tables to the end of the run. Each benchmark runs in a fresh env
+# and commits its setup, so every measured call starts from cold, committed
+# storage like a transaction of its own.
+pytestmark = [pytest.mark.gas_benchmark, pytest.mark.gas_profile]
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+REPORT_FILE = os.path.join(os.path.dirname(__file__), "gas_report.json")
+
+# Relative increase over the baseline that fails a benchmark
+THRESHOLD = 0.02
+
+CONTRACTS = ["SquillDrop", "SquillDrop3", "SquillDropLite"]
+BULK_SIZES = [10, 100, 1_000, 10_000]
+
+# 10,000 entries take more than the default gas limit of a call
+BULK_GAS_LIMIT = 400_000_000
+
+
+@pytest.fixture(scope="session")
+def track_gas(pytestconfig):
+    """
+    Record a tracked number and fail if it exceeds the baseline by THRESHOLD.
+
+    At the end of the session the numbers are written to gas_report.json with
+    their change against the baseline. The baseline is written when it does
+    not exist yet, or rewritten with --update-gas-baseline.
+    """
+    update = pytestconfig.getoption("--update-gas-baseline")
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+    measured = {}
+
+    def track(name, used):
+        measured[name] = used
+        expected = baseline.get(name)
+        print(f"{name}: {used:,} gas, baseline {f'{expected:,}' if expected else '-'}")
+        if expected and not update:
+            assert used <= expected * (
+                1 + THRESHOLD
+            ), f"{name} regressed to {used:,} gas from {expected:,}"
+
+    yield track
+
+    report = {
+        name: {
+            "gas": used,
+            "baseline": baseline.get(name),
+            "change": used / baseline[name] - 1 if baseline.get(name) else None,
+        }
+        for name, used in sorted(measured.items())
+    }
+    with open(REPORT_FILE, "w") as f:
+        json.dump(report, f, indent=2)
+
+    if update or not baseline:
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(dict(sorted({**baseline, **measured}.items())), f, indent=2)
+            f.write("\n")
+
+
+def deploy(name, owner, funding=0):
+    """
+    Deploy a token and a claim contract as `owner`, send the claim contract
+    `funding` tokens and commit.
+
+    Returns:
+        tuple: (claim contract, deployment gas)
+    """
+    with boa.env.prank(owner):
+        token = load_partial("contracts/mocks/MockToken.vy").deploy(
+            "Test Token", "TEST", 18
+        )
+        drop = load_partial(f"contracts/{name}.vy").deploy(token.address)
+        gas = drop._computation.get_gas_used()
+        if funding:
+            token._mint_for_testing(drop.address, funding)
+    commit()
+    return drop, gas
+
+
+@pytest.mark.parametrize("name", CONTRACTS)
+def test_deploy_gas(name, owner, track_gas):
+    """Deployment, including the hardcoded whitelist of SquillDrop"""
+    with fresh_env():
+        _, gas = deploy(name, owner)
+    track_gas(f"{name}.deploy", gas)
+
+
+@pytest.mark.parametrize("size", BULK_SIZES)
+def test_add_bulk_addresses_gas(size, owner, track_gas):
+    """Gas per entry of SquillDrop3.add_bulk_addresses"""
+    with fresh_env():
+        drop, _ = deploy("SquillDrop3", owner)
+        addrs = [boa.env.generate_address() for _ in range(size)]
+
+        with boa.env.prank(owner):
+            drop.add_bulk_addresses(addrs, [10**18] * size, gas=BULK_GAS_LIMIT)
+        used = drop._computation.get_gas_used()
+
+    track_gas(f"SquillDrop3.add_bulk_addresses[{size}].per_entry", -(-used // size))
+
+
+@pytest.mark.parametrize("name", CONTRACTS)
+def test_claim_gas(name, owner, alice, bob, reward_amount, track_gas):
+    """add_address, claim, claim_for and withdraw_remaining on a funded contract"""
+    with fresh_env():
+        drop, _ = deploy(name, owner, reward_amount * 10)
+
+        with boa.env.prank(owner):
+            drop.add_address(alice, reward_amount)
+            track_gas(f"{name}.add_address", drop._computation.get_gas_used())
+            drop.add_address(bob, reward_amount)
+        commit()
+
+        with boa.env.prank(alice):
+            drop.claim()
+        track_gas(f"{name}.claim", drop._computation.get_gas_used())
+        commit()
+
+        with boa.env.prank(owner):
+            drop.claim_for(bob)
+            track_gas(f"{name}.claim_for", drop._computation.get_gas_used())
+            commit()
+
+            drop.withdraw_remaining(drop.reward_token())
+            track_gas(f"{name}.withdraw_remaining", drop._computation.get_gas_used())
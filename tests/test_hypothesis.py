@@ -7,6 +7,7 @@ def pytest_configure(config):
         pytest.skip("Skipping Hypothesis tests", allow_module_level=True)
 
 import boa
+from compile_cache import load_partial
 from eth_utils import to_checksum_address
 from hypothesis import HealthCheck, Phase, Verbosity, assume, given, settings
 from hypothesis import strategies as st
@@ -68,7 +69,7 @@ def test_claim_for_properties(
     with boa.env.prank(owner):
         token._mint_for_testing(owner, initial_balance)
         token.transfer(survey.address, initial_balance)
-        survey.add_address(recipient)
+        survey.add_address(recipient, REWARD_AMOUNT)
 
     recipient_balance_before = token.balanceOf(recipient)
     claimer_balance_before = token.balanceOf(claimer)
@@ -142,7 +143,7 @@ def test_state_machine(survey, token, owner, actions):
             # Only owner can add
             with boa.env.prank(owner):
                 prev_eligible = survey.eligible_addresses(addr)
-                survey.add_address(addr)
+                survey.add_address(addr, REWARD_AMOUNT)
                 # Verify address is now eligible
                 assert survey.eligible_addresses(addr)
                 eligible_addresses.add(addr)
@@ -266,21 +267,21 @@ def test_token_decimals(owner, decimals, reward):
     reward_amount = reward * 10**decimals
 
     # Deploy token with specific decimals
-    token_contract = boa.load_partial("contracts/mocks/MockToken.vy")
+    token_contract = load_partial("contracts/mocks/MockToken.vy")
     with boa.env.prank(owner):
         token = token_contract.deploy("Test", "TST", decimals)
         token._mint_for_testing(owner, reward_amount * 10)
 
     # Deploy survey
-    survey_contract = boa.load_partial("contracts/SquillDrop.vy")
+    survey_contract = load_partial("contracts/SquillDrop.vy")
     with boa.env.prank(owner):
-        survey = survey_contract.deploy(token.address, reward_amount)
+        survey = survey_contract.deploy(token.address)
         token.transfer(survey.address, reward_amount * 5)
 
     # Test claim
     test_address = boa.env.generate_address()
     with boa.env.prank(owner):
-        survey.add_address(test_address)
+        survey.add_address(test_address, reward_amount)
 
     with boa.env.prank(test_address):
         survey.claim()
@@ -337,7 +338,7 @@ def test_concurrent_actions(survey, token, owner, actions):
 
         with boa.env.prank(actor):
             if what == "add" and actor == owner:
-                survey.add_address(target)
+                survey.add_address(target, REWARD_AMOUNT)
                 eligible_addresses.add(target)
 
             elif what == "remove" and actor == owner:
@@ -389,7 +390,7 @@ def test_mass_claims(survey, token, owner, addresses, claims):
     # Add all addresses
     with boa.env.prank(owner):
         for addr in addresses:
-            survey.add_address(addr)
+            survey.add_address(addr, REWARD_AMOUNT)
 
     # Random claims
     for claim_idx in claims:
@@ -429,7 +430,7 @@ def test_cross_claims(survey, token, owner, claimers, recipients):
     # Make all recipients eligible
     with boa.env.prank(owner):
         for recipient in recipients:
-            survey.add_address(recipient)
+            survey.add_address(recipient, REWARD_AMOUNT)
 
     # Try all combinations of claimers claiming for recipients
     for claimer in claimers:
@@ -0,0 +1,334 @@
+import json
+import threading
+
+import interactions
+import numpy as np
+import pandas as pd
+import pytest
+from interactions import (
+    InteractionStore,
+    RateLimiter,
+    checkpoint_path,
+    generate_reports,
+    get_contract_interactions,
+    load_checkpoint,
+    split_range,
+)
+
+TOKEN = "0x" + "aa" * 20
+OTHER = "0x" + "bb" * 20
+
+
+def holder(i):
+    return f"0x{i:040x}"
+
+
+class Response:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class Explorer:
+    """
+    In-process stand-in for an etherscan-style explorer API session.
+
+    Serves the token transfers of each contract page by page, refuses to page
+    past `result_window` rows like the real APIs, and records every request.
+
+    Args:
+        transfers (dict): Contract -> [(block, from, to)] in block order
+        head (int): Block height reported by eth_blockNumber
+        result_window (int): Maximum page * offset served
+        latency (float): Seconds each request takes
+    """
+
+    def __init__(self, transfers, head, result_window=10_000, latency=0):
+        self.transfers = transfers
+        self.head = head
+        self.result_window = result_window
+        self.latency = latency
+        self.requests = []
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params, timeout):
+        with self.lock:
+            self.requests.append(dict(params))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Not time.sleep, which tests replace with a fake clock
+            threading.Event().wait(self.latency)
+            return Response(self.answer(params))
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def answer(self, params):
+        if params["action"] == "eth_blockNumber":
+            return {"result": hex(self.head)}
+
+        page, offset = params["page"], params["offset"]
+        with self.lock:
+            key = (params["contractaddress"], page)
+            if self.failures.get(key, 0) > 0:
+                self.failures[key] -= 1
+                return {"status": "0", "message": "NOTOK", "result": "Max rate limit"}
+        if page * offset > self.result_window:
+            return {"status": "0", "message": "NOTOK", "result": "Result window"}
+
+        rows = [
+            {"blockNumber": str(block), "from": sender, "to": receiver}
+            for block, sender, receiver in self.transfers.get(
+                params["contractaddress"], []
+            )
+            if params["startblock"] <= block <= params["endblock"]
+        ]
+        rows = rows[(page - 1) * offset : page * offset]
+        if not rows:
+            return {"status": "0", "message": "No transactions found", "result": []}
+        return {"status": "1", "message": "OK", "result": rows}
+
+
+class Clock:
+    """Fake monotonic clock, advanced only by sleep()."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(interactions.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(interactions.time, "sleep", clock.sleep)
+    return clock
+
+
+def crawl(monkeypatch, explorer, contracts=(TOKEN,), **kwargs):
+    monkeypatch.setattr(interactions, "make_session", lambda pool_size: explorer)
+    return get_contract_interactions(list(contracts), rate_limit=1_000, **kwargs)
+
+
+def test_rate_limiter(clock):
+    """Test that the bucket allows a burst, then one token per 1/rate seconds"""
+    # A period exact in binary, so the fake clock lands on whole tokens
+    limiter = RateLimiter(4, burst=3)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.now == 0
+
+    for _ in range(10):
+        limiter.acquire()
+    assert clock.now == 2.5
+
+    # Idling refills no more than the burst
+    clock.sleep(10)
+    for _ in range(3):
+        limiter.acquire()
+    assert clock.now == 12.5
+    limiter.acquire()
+    assert clock.now == 12.75
+
+
+def test_concurrent_fetch(monkeypatch):
+    """Test that shards are fetched in parallel and every transfer is counted"""
+    transfers = {
+        TOKEN: [(block, holder(block), holder(block + 1)) for block in range(5_000)],
+        OTHER: [(block, holder(block), TOKEN) for block in range(0, 5_000, 7)],
+    }
+    explorer = Explorer(transfers, head=4_999, latency=0.01)
+
+    store = crawl(monkeypatch, explorer, (TOKEN, OTHER), max_workers=4)
+
+    assert set(store) == {holder(i) for i in range(5_001)} | {TOKEN}
+    assert store[holder(7)] == [TOKEN, OTHER]
+    assert store[holder(8)] == [TOKEN]
+    assert 1 < explorer.max_in_flight <= 4
+
+
+def test_transient_failures_retried(monkeypatch, clock):
+    """Test that a failed page is retried with backoff, then given up on"""
+    transfers = {TOKEN: [(block, holder(block), OTHER) for block in range(10)]}
+    explorer = Explorer(transfers, head=9)
+    explorer.failures[TOKEN, 1] = 2
+
+    store = crawl(monkeypatch, explorer, shards_per_contract=1)
+    assert len(store) == 11
+    assert clock.now >= 1.0 + 2.0
+
+    explorer.failures[TOKEN, 1] = 5
+    with pytest.raises(interactions.ExplorerError, match="after 5 attempts"):
+        crawl(monkeypatch, explorer, shards_per_contract=1)
+
+
+def test_checkpoint_resume(monkeypatch, clock, tmp_path):
+    """Test that a later run only fetches blocks after the checkpoint"""
+    transfers = {TOKEN: [(block, holder(block), OTHER) for block in range(0, 1_000, 3)]}
+    explorer = Explorer(transfers, head=999)
+    path = checkpoint_path(str(tmp_path), "fraxtal", TOKEN)
+
+    first = crawl(monkeypatch, explorer, checkpoint_dir=str(tmp_path))
+    checkpoint = load_checkpoint(path)
+    assert checkpoint["last_block"] == 999
+    assert checkpoint["addresses"] == set(first)
+
+    transfers[TOKEN] += [(block, holder(block), OTHER) for block in range(1_000, 2_000)]
+    explorer.head = 1_999
+    explorer.requests.clear()
+
+    second = crawl(monkeypatch, explorer, checkpoint_dir=str(tmp_path))
+    starts = [r["startblock"] for r in explorer.requests if r["action"] == "tokentx"]
+    assert min(starts) == 1_000 - 64
+    assert set(second) == set(first) | {holder(block) for block in range(1_000, 2_000)}
+    assert load_checkpoint(path)["last_block"] == 1_999
+
+
+def test_resume_after_interrupt(monkeypatch, clock, tmp_path):
+    """Test that a failed run keeps the previous checkpoint and the next one recovers"""
+    transfers = {TOKEN: [(block, holder(block), OTHER) for block in range(1_000)]}
+    explorer = Explorer(transfers, head=499)
+    path = checkpoint_path(str(tmp_path), "fraxtal", TOKEN)
+    crawl(monkeypatch, explorer, checkpoint_dir=str(tmp_path))
+
+    explorer.head = 999
+    explorer.failures[TOKEN, 1] = 100
+    with pytest.raises(interactions.ExplorerError):
+        crawl(monkeypatch, explorer, checkpoint_dir=str(tmp_path))
+    checkpoint = load_checkpoint(path)
+    assert checkpoint["last_block"] == 499
+    assert checkpoint["addresses"] == {holder(block) for block in range(500)} | {OTHER}
+
+    explorer.failures.clear()
+    store = crawl(monkeypatch, explorer, checkpoint_dir=str(tmp_path))
+    assert set(store) == {holder(block) for block in range(1_000)} | {OTHER}
+    assert load_checkpoint(path)["last_block"] == 999
+
+
+@pytest.mark.parametrize(
+    "start,end,parts", [(0, 9, 3), (100, 1_099, 8), (5, 6, 10), (7, 7, 4)]
+)
+def test_split_range(start, end, parts):
+    """Test that the ranges are contiguous and cover every block once"""
+    ranges = split_range(start, end, parts)
+
+    assert len(ranges) == min(parts, end - start + 1)
+    assert ranges[0][0] == start and ranges[-1][1] == end
+    assert all(a <= b for a, b in ranges)
+    assert all(prev[1] + 1 == cur[0] for prev, cur in zip(ranges, ranges[1:]))
+
+
+def test_full_shards_bisected(monkeypatch):
+    """Test that shards filling the result window are bisected until complete"""
+    transfers = {
+        TOKEN: [(i // 10, holder(i), OTHER) for i in range(10_000)],
+    }
+    explorer = Explorer(transfers, head=999, result_window=2_000)
+
+    store = crawl(monkeypatch, explorer, shards_per_contract=2, result_window=2_000)
+
+    assert set(store) == {holder(i) for i in range(10_000)} | {OTHER}
+    shards = {
+        (r["startblock"], r["endblock"])
+        for r in explorer.requests
+        if r["action"] == "tokentx"
+    }
+    assert len(shards) > 2
+
+
+def test_bisect_stops_at_one_block(monkeypatch, capsys):
+    """Test that a single block over the result window ends the bisection"""
+    transfers = {
+        TOKEN: [(block, holder(block), OTHER) for block in range(500)]
+        + [(500, holder(1_000 + i), OTHER) for i in range(3_000)]
+        + [(block, holder(block), OTHER) for block in range(501, 1_000)]
+    }
+    explorer = Explorer(transfers, head=999, result_window=2_000)
+
+    store = crawl(monkeypatch, explorer, shards_per_contract=2, result_window=2_000)
+
+    assert "block 500 of" in capsys.readouterr().out
+    # Everything outside the crowded block is still found
+    assert {holder(block) for block in range(1_000) if block != 500} <= set(store)
+
+
+def test_interaction_store():
+    """Test that the bitmasks read back as the contracts each address touched"""
+    contracts = [f"0x{i:040x}" for i in range(1, 11)]
+    store = InteractionStore(contracts)
+    store.add(0, [holder(1), holder(2)])
+    store.add(9, [holder(2), holder(3)])
+    store.add(0, [holder(1)])
+
+    assert dict(store) == {
+        holder(1): [contracts[0]],
+        holder(2): [contracts[0], contracts[9]],
+        holder(3): [contracts[9]],
+    }
+    addresses, masks = store.to_arrays()
+    assert masks.dtype == np.uint16
+    assert dict(zip(addresses, masks.tolist())) == {
+        holder(1): 1,
+        holder(2): 1 | 1 << 9,
+        holder(3): 1 << 9,
+    }
+
+    # Contracts only found in the dict are appended after the queried ones
+    rebuilt = InteractionStore.from_dict({holder(4): [OTHER, TOKEN]}, [TOKEN])
+    assert rebuilt.contracts == [TOKEN, OTHER]
+    assert rebuilt[holder(4)] == [TOKEN, OTHER]
+
+    with pytest.raises(ValueError, match="64"):
+        InteractionStore([holder(i) for i in range(65)])
+
+
+def test_generate_reports(tmp_path):
+    """Test that the vectorized reports match the address -> contracts mapping"""
+    contracts = [TOKEN, OTHER, holder(99)]
+    rng = np.random.default_rng(0)
+    interactions_by_address = {
+        holder(i): [c for c in contracts if rng.random() < 0.5] or [TOKEN]
+        for i in range(500)
+    }
+
+    paths = generate_reports(interactions_by_address, contracts, str(tmp_path))
+
+    df = pd.read_csv(paths["csv_path"])
+    assert len(df) == 500
+    assert list(df["interaction_count"]) == sorted(
+        df["interaction_count"], reverse=True
+    )
+    for row in df.itertuples(index=False):
+        interacted = interactions_by_address[row.address]
+        assert row.interaction_count == len(interacted)
+        assert row.contracts.split(",") == interacted
+        for contract in contracts:
+            flag = getattr(row, f"interacted_with_{contract[:8]}")
+            assert flag == (contract in interacted)
+
+    with open(paths["json_path"]) as f:
+        assert json.load(f) == interactions_by_address
+
+    with open(paths["summary_path"]) as f:
+        summary = json.load(f)
+    assert summary["total_unique_addresses"] == 500
+    assert summary["addresses_per_contract"] == {
+        c: sum(c in v for v in interactions_by_address.values()) for c in contracts
+    }
+    assert summary["addresses_with_multiple_contracts"] == sum(
+        len(v) > 1 for v in interactions_by_address.values()
+    )
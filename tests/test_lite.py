@@ -0,0 +1,116 @@
+import boa
+import pytest
+from compile_cache import load_partial
+from gas import commit, fresh_env
+
+
+@pytest.fixture(scope="module")
+def lite(owner, token, reward_amount):
+    contract = load_partial("contracts/SquillDropLite.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address)
+
+        # Fund contract
+        token.transfer(instance.address, reward_amount * 10)
+    return instance
+
+
+def test_claim(lite, owner, alice, token, reward_amount):
+    """Test claiming reads and clears the recipient's slot"""
+    with boa.env.prank(owner):
+        lite.add_address(alice, reward_amount)
+    assert lite.pending_claim_amount(alice) == reward_amount
+    assert lite.reward_token() == token.address
+
+    with boa.env.prank(alice):
+        lite.claim()
+    logs = lite.get_logs()
+
+    assert token.balanceOf(alice) == reward_amount
+    assert lite.eligible_addresses(alice) == 0
+    assert lite.pending_claim_amount(alice) == 0
+    claims = [log for log in logs if log.event_type.name == "Claim"]
+    assert [log.args for log in claims] == [(alice, reward_amount)]
+
+    with boa.env.prank(alice):
+        with boa.reverts("!address"):
+            lite.claim()
+
+
+def test_claim_checks(lite, owner, alice, bob, reward_amount):
+    """Test owner, pause and eligibility checks"""
+    with boa.env.prank(owner):
+        lite.add_address(alice, reward_amount)
+
+    with boa.env.prank(bob):
+        with boa.reverts("!address"):
+            lite.claim()
+        with boa.reverts("!owner"):
+            lite.claim_for(alice)
+        with boa.reverts("!owner"):
+            lite.add_address(bob, reward_amount)
+
+    with boa.env.prank(owner):
+        lite.pause()
+    with boa.env.prank(alice):
+        with boa.reverts("paused"):
+            lite.claim()
+
+    with boa.env.prank(owner):
+        lite.unpause()
+        lite.claim_for(alice)
+    assert lite.eligible_addresses(alice) == 0
+
+
+def test_claim_underfunded(lite, owner, alice, token):
+    """Test that a claim above the contract balance reverts in the token"""
+    balance = token.balanceOf(lite.address)
+    with boa.env.prank(owner):
+        lite.add_address(alice, balance + 1)
+
+    with boa.env.prank(alice):
+        with boa.reverts():
+            lite.claim()
+    assert lite.eligible_addresses(alice) == balance + 1
+    assert token.balanceOf(lite.address) == balance
+
+
+def test_claim_for_many(lite, owner, token):
+    """Test pushing tokens to a batch of recipients"""
+    addrs = [boa.env.generate_address() for _ in range(10)]
+    amounts = [10**17 * (i + 1) for i in range(10)]
+    with boa.env.prank(owner):
+        lite.add_bulk_addresses(addrs, amounts)
+        lite.claim_for_many(addrs + addrs[:3])
+
+    for addr, amount in zip(addrs, amounts):
+        assert token.balanceOf(addr) == amount
+        assert lite.eligible_addresses(addr) == 0
+
+
+def test_claim_gas(owner, alice, reward_amount):
+    """Test that claiming costs less than on the current contracts"""
+    used = {}
+    for name in ("SquillDrop", "SquillDrop3", "SquillDropLite"):
+        # A fresh env per contract, committed before the claim, so the claim
+        # pays for cold slots like a transaction of its own
+        with fresh_env():
+            with boa.env.prank(owner):
+                token = load_partial("contracts/mocks/MockToken.vy").deploy(
+                    "Test Token", "TEST", 18
+                )
+                drop = load_partial(f"contracts/{name}.vy").deploy(token.address)
+                token._mint_for_testing(drop.address, reward_amount)
+                drop.add_address(alice, reward_amount)
+            commit()
+
+            with boa.env.prank(alice):
+                drop.claim()
+            used[name] = drop._computation.get_gas_used()
+
+    saved = used["SquillDrop3"] - used["SquillDropLite"]
+    print(", ".join(f"{name}: {gas:,} gas" for name, gas in used.items()))
+    print(f"SquillDropLite saves {saved:,} gas per claim over SquillDrop3")
+
+    assert used["SquillDropLite"] < used["SquillDrop3"]
+    assert used["SquillDropLite"] < used["SquillDrop"]
@@ -0,0 +1,159 @@
+import boa
+import pytest
+from compile_cache import load_partial
+from merkle import build_claims, build_tree, get_proof, leaf_hash
+
+
+def unpack(claims, addr):
+    """Index, amount and proof of `addr` as contract call arguments."""
+    claim = claims[str(addr)]
+    proof = [bytes.fromhex(node[2:]) for node in claim["proof"]]
+    return claim["index"], int(claim["amount"]), proof
+
+
+@pytest.fixture(scope="module")
+def allocations(alice, bob):
+    others = [boa.env.generate_address() for _ in range(10)]
+    return [
+        [str(addr), (i + 1) * 10**18] for i, addr in enumerate([alice, bob, *others])
+    ]
+
+
+@pytest.fixture(scope="module")
+def tree(allocations):
+    return build_claims(allocations)
+
+
+@pytest.fixture(scope="module")
+def merkle_drop(owner, token, reward_amount, tree):
+    root, _ = tree
+    contract = load_partial("contracts/SquillDropMerkle.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address, root)
+
+        # Fund contract
+        token.transfer(instance.address, reward_amount * 10)
+    return instance
+
+
+def test_tree_shape():
+    """Test layers and proof lengths for an odd number of leaves"""
+    leaves = [leaf_hash(i, "0x" + "11" * 20, i) for i in range(5)]
+    layers = build_tree(leaves)
+
+    assert [len(layer) for layer in layers] == [5, 3, 2, 1]
+
+    # The fifth leaf has no sibling on the first two layers
+    assert len(get_proof(layers, 4)) == 1
+    assert len(get_proof(layers, 0)) == 3
+
+
+def test_initial_state(merkle_drop, owner, token, tree):
+    """Test initial contract state after deployment"""
+    root, _ = tree
+
+    assert merkle_drop.owner() == owner
+    assert merkle_drop.reward_token() == token.address
+    assert merkle_drop.merkle_root() == root
+    assert not merkle_drop.paused()
+
+
+def test_every_proof_verifies(merkle_drop, allocations, tree):
+    """Test that the contract accepts every proof the builder emits"""
+    _, claims = tree
+    for addr, amount in allocations:
+        index, _, proof = unpack(claims, addr)
+        assert merkle_drop.verify(index, addr, amount, proof)
+        assert not merkle_drop.is_claimed(index)
+
+
+def test_successful_claim(merkle_drop, alice, token, tree):
+    """Test successful token claim process"""
+    _, claims = tree
+    index, amount, proof = unpack(claims, alice)
+    initial_contract_balance = token.balanceOf(merkle_drop.address)
+
+    with boa.env.prank(alice):
+        merkle_drop.claim(index, amount, proof)
+
+    assert token.balanceOf(alice) == amount
+    assert token.balanceOf(merkle_drop.address) == initial_contract_balance - amount
+    assert merkle_drop.is_claimed(index)
+
+    # Claiming twice fails
+    with boa.env.prank(alice):
+        with boa.reverts("claimed"):
+            merkle_drop.claim(index, amount, proof)
+
+
+def test_invalid_claims(merkle_drop, alice, bob, tree):
+    """Test that wrong amounts, indexes and callers are rejected"""
+    _, claims = tree
+    index, amount, proof = unpack(claims, alice)
+
+    with boa.env.prank(alice):
+        with boa.reverts("!proof"):
+            merkle_drop.claim(index, amount + 1, proof)
+        with boa.reverts("!proof"):
+            merkle_drop.claim(index + 1, amount, proof)
+
+    # Bob cannot use Alice's proof
+    with boa.env.prank(bob):
+        with boa.reverts("!proof"):
+            merkle_drop.claim(index, amount, proof)
+
+
+def test_claim_for(merkle_drop, owner, alice, bob, token, tree):
+    """Test claiming on behalf of another address"""
+    _, claims = tree
+    index, amount, proof = unpack(claims, alice)
+
+    with boa.env.prank(bob):
+        with boa.reverts("!owner"):
+            merkle_drop.claim_for(alice, index, amount, proof)
+
+    with boa.env.prank(owner):
+        merkle_drop.claim_for(alice, index, amount, proof)
+
+    assert token.balanceOf(alice) == amount
+    assert merkle_drop.is_claimed(index)
+
+
+def test_paused_functionality(merkle_drop, owner, alice, tree):
+    """Test pause and unpause functionality"""
+    _, claims = tree
+    index, amount, proof = unpack(claims, alice)
+
+    with boa.env.prank(owner):
+        merkle_drop.pause()
+
+    with boa.env.prank(alice):
+        with boa.reverts("paused"):
+            merkle_drop.claim(index, amount, proof)
+
+    with boa.env.prank(owner):
+        merkle_drop.unpause()
+
+    with boa.env.prank(alice):
+        merkle_drop.claim(index, amount, proof)
+
+
+def test_withdraw_remaining(merkle_drop, owner, bob, token, reward_amount):
+    """Test owner withdrawal of unclaimed tokens"""
+    with boa.env.prank(bob):
+        with boa.reverts("!owner"):
+            merkle_drop.withdraw_remaining(token.address)
+
+    initial_owner_balance = token.balanceOf(owner)
+    with boa.env.prank(owner):
+        merkle_drop.withdraw_remaining(token.address)
+
+    assert token.balanceOf(owner) == initial_owner_balance + reward_amount * 10
+    assert token.balanceOf(merkle_drop.address) == 0
+
+
+def test_duplicate_address(allocations):
+    """Test that an address listed twice is rejected instead of overwritten"""
+    addr, amount = allocations[3]
+    with pytest.raises(ValueError, match=f"Duplicate address 0x{addr.upper()[2:]}"):
+        build_claims([*allocations, ["0x" + addr.upper()[2:], amount + 1]])
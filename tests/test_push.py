@@ -0,0 +1,149 @@
+import boa
+import pytest
+from compile_cache import load_partial
+from eth.exceptions import Revert
+from push_distribute import check_claim_for_many, plan_batches
+from rpc import JsonRpcClient
+
+RECIPIENTS = 50
+
+
+@pytest.fixture(scope="module")
+def batch_drop(owner, token, reward_amount):
+    contract = load_partial("contracts/SquillDropBatch.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address)
+
+        # Fund contract
+        token.transfer(instance.address, reward_amount * 10)
+    return instance
+
+
+@pytest.fixture(scope="module")
+def recipients(batch_drop, owner):
+    addrs = [boa.env.generate_address() for _ in range(RECIPIENTS)]
+    with boa.env.prank(owner):
+        batch_drop.add_bulk_addresses(
+            addrs, [10**17 * (i + 1) for i in range(RECIPIENTS)]
+        )
+    return addrs
+
+
+def test_claim_for_many(batch_drop, owner, token, recipients):
+    """Test pushing tokens to a batch of recipients"""
+    initial_contract_balance = token.balanceOf(batch_drop.address)
+    amounts = [batch_drop.eligible_addresses(addr) for addr in recipients]
+
+    with boa.env.prank(owner):
+        batch_drop.claim_for_many(recipients)
+    logs = batch_drop.get_logs()
+
+    for addr, amount in zip(recipients, amounts):
+        assert token.balanceOf(addr) == amount
+        assert batch_drop.eligible_addresses(addr) == 0
+    assert token.balanceOf(batch_drop.address) == initial_contract_balance - sum(
+        amounts
+    )
+
+    claims = [log for log in logs if log.event_type.name == "Claim"]
+    assert [log.args for log in claims] == list(zip(recipients, amounts))
+
+
+def test_claim_for_many_skips_claimed(batch_drop, owner, alice, token, recipients):
+    """Test that claimed and unknown addresses in a batch are skipped"""
+    with boa.env.prank(recipients[0]):
+        batch_drop.claim()
+    claimed_balance = token.balanceOf(recipients[0])
+
+    with boa.env.prank(owner):
+        batch_drop.claim_for_many([recipients[0], alice, recipients[1]])
+
+    assert token.balanceOf(recipients[0]) == claimed_balance
+    assert token.balanceOf(alice) == 0
+    assert batch_drop.eligible_addresses(recipients[1]) == 0
+
+
+def test_claim_for_many_checks(batch_drop, owner, bob, recipients, reward_amount):
+    """Test owner, pause and balance checks"""
+    with boa.env.prank(bob):
+        with boa.reverts("!owner"):
+            batch_drop.claim_for_many(recipients)
+
+    with boa.env.prank(owner):
+        batch_drop.pause()
+        with boa.reverts("paused"):
+            batch_drop.claim_for_many(recipients)
+        batch_drop.unpause()
+
+        # One recipient more than the contract holds fails the whole batch
+        whale = boa.env.generate_address()
+        batch_drop.add_address(whale, reward_amount * 10)
+        with boa.reverts("!balance"):
+            batch_drop.claim_for_many([*recipients, whale])
+
+
+def test_push_gas_comparison(batch_drop, owner, recipients):
+    """Compare gas per recipient of claim_for_many against claim_for"""
+    half = RECIPIENTS // 2
+
+    with boa.env.prank(owner):
+        single = 0
+        for addr in recipients[:half]:
+            batch_drop.claim_for(addr)
+            single += 21_000 + batch_drop._computation.get_gas_used()
+
+        batch_drop.claim_for_many(recipients[half:])
+        batched = 21_000 + batch_drop._computation.get_gas_used()
+
+    print(f"claim_for:      {single // half:,} gas per recipient")
+    print(f"claim_for_many: {batched // half:,} gas per recipient")
+    assert batched < 0.8 * single
+
+
+def test_plan_batches(recipients):
+    """Test that batches respect the gas target and the array bound"""
+    batches = plan_batches(recipients, 50_000, 30_000, target_gas=500_000)
+
+    assert [addr for addrs, _ in batches for addr in addrs] == recipients
+    assert all(gas <= 500_000 for _, gas in batches)
+    assert len(plan_batches(recipients * 100, 0, 1)[0][0]) == 1_000
+
+
+def eth_call(payload):
+    """JSON-RPC stand-in answering eth_call from the boa env"""
+    responses = []
+    for request in payload:
+        assert request["method"] == "eth_call"
+        call = request["params"][0]
+        response = {"jsonrpc": "2.0", "id": request["id"]}
+        try:
+            output = boa.env.raw_call(
+                call["to"], sender=call["from"], data=bytes.fromhex(call["data"][2:])
+            ).output
+            response["result"] = "0x" + output.hex()
+        except Revert:
+            response["error"] = {"code": 3, "message": "execution reverted"}
+        responses.append(response)
+    return responses
+
+
+def test_check_claim_for_many(batch_drop, owner, bob, token):
+    """Test that only the owner of an unpaused SquillDropBatch passes the check"""
+    client = JsonRpcClient(transport=eth_call)
+    check_claim_for_many(client, batch_drop.address, owner)
+
+    with pytest.raises(RuntimeError, match="cannot call claim_for_many"):
+        check_claim_for_many(client, batch_drop.address, bob)
+
+    with boa.env.prank(owner):
+        batch_drop.pause()
+    with pytest.raises(RuntimeError):
+        check_claim_for_many(client, batch_drop.address, owner)
+    with boa.env.prank(owner):
+        batch_drop.unpause()
+
+    # The deployed round 3 contract has no claim_for_many at all
+    with boa.env.prank(owner):
+        older = load_partial("contracts/SquillDrop3.vy").deploy(token.address)
+    with pytest.raises(RuntimeError):
+        check_claim_for_many(client, older.address, owner)
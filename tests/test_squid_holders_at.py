@@ -0,0 +1,254 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from eth_abi import decode, encode
+from rpc import JsonRpcClient
+from squid_holders_at import (
+    AGGREGATE3_SELECTOR,
+    BALANCE_OF_SELECTOR,
+    MULTICALL3,
+    cross_check,
+    iter_addresses,
+    iter_batches,
+    map_in_order,
+    multicall_balances,
+    replay_snapshot,
+    resume_position,
+    write_balance_json,
+)
+from transfer_logs import TRANSFER_TOPIC, ZERO_ADDRESS
+
+SQUID = "0x" + "aa" * 20
+LP = "0x" + "bb" * 20
+CONTRACTS = {"squid": SQUID, "lp": LP}
+
+
+def holder(i):
+    return f"0x{i:040x}"
+
+
+def transfer_log(contract, block, sender, receiver, value):
+    return {
+        "address": contract,
+        "blockNumber": hex(block),
+        "topics": [
+            TRANSFER_TOPIC,
+            "0x" + sender[2:].rjust(64, "0"),
+            "0x" + receiver[2:].rjust(64, "0"),
+        ],
+        "data": hex(value),
+    }
+
+
+class Node:
+    """
+    JSON-RPC stand-in answering Multicall3 aggregate3 eth_calls and eth_getLogs.
+
+    Args:
+        balances (dict): Token address -> {holder: balance}
+        failing (set): (token, holder) pairs whose balanceOf reverts
+        logs (list): Logs as a node returns them
+    """
+
+    def __init__(self, balances, failing=(), logs=()):
+        self.balances = balances
+        self.failing = set(failing)
+        self.logs = list(logs)
+        self.calls = []
+
+    def __call__(self, payload):
+        return [
+            {"jsonrpc": "2.0", "id": request["id"], "result": self.answer(**request)}
+            for request in payload
+        ]
+
+    def answer(self, method, params, **kwargs):
+        if method == "eth_getLogs":
+            query = params[0]
+            start, end = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            return [
+                log
+                for log in self.logs
+                if log["address"] in query["address"]
+                and start <= int(log["blockNumber"], 16) <= end
+            ]
+        if method != "eth_call":
+            raise NotImplementedError(method)
+        call, block = params
+        assert call["to"] == MULTICALL3
+        data = bytes.fromhex(call["data"][2:])
+        assert data[:4] == AGGREGATE3_SELECTOR
+        (calls,) = decode(["(address,bool,bytes)[]"], data[4:])
+        self.calls.append((int(block, 16), len(calls)))
+
+        returned = []
+        for target, allow_failure, calldata in calls:
+            assert allow_failure and calldata[:4] == BALANCE_OF_SELECTOR
+            (owner,) = decode(["address"], calldata[4:])
+            if (target, owner) in self.failing:
+                returned.append((False, b""))
+            else:
+                balance = self.balances.get(target, {}).get(owner, 0)
+                returned.append((True, balance.to_bytes(32, "big")))
+        return "0x" + encode(["(bool,bytes)[]"], [returned]).hex()
+
+
+def test_multicall_balances():
+    """Test that aggregate3 results are decoded back to each holder and token"""
+    addrs = [holder(i) for i in range(1, 12)]
+    node = Node(
+        {
+            SQUID: {addr: i * 10**18 for i, addr in enumerate(addrs)},
+            LP: {addrs[3]: 7},
+        }
+    )
+
+    data = multicall_balances(
+        JsonRpcClient(transport=node), 123, CONTRACTS, addrs, batch_size=4
+    )
+
+    assert list(data) == addrs
+    for i, addr in enumerate(addrs):
+        assert data[addr] == {"squid": i * 10**18, "lp": 7 if i == 3 else 0}
+    # Batches of 4 holders times 2 tokens, the last one partial
+    assert node.calls == [(123, 8), (123, 8), (123, 6)]
+
+
+def test_multicall_failed_call():
+    """Test that a reverted balanceOf raises instead of reading as a balance"""
+    addrs = [holder(i) for i in range(1, 6)]
+    node = Node({SQUID: {addr: 1 for addr in addrs}}, failing={(LP, addrs[2])})
+
+    with pytest.raises(ValueError, match=f"balanceOf\\({addrs[2]}\\) failed on lp"):
+        multicall_balances(JsonRpcClient(transport=node), 1, CONTRACTS, addrs)
+
+
+def test_iter_addresses_chunks(tmp_path):
+    """Test that JSON keys are found wherever the chunk boundaries fall"""
+    report = {holder(i): [SQUID, LP] if i % 2 else [LP] for i in range(1, 200)}
+    path = tmp_path / "interactions.json"
+    path.write_text(json.dumps(report, indent=2))
+
+    for chunk_size in (1, 7, 63, 64, 65, 1_000, 1 << 20):
+        assert list(iter_addresses(str(path), chunk_size=chunk_size)) == list(report)
+
+    csv_path = tmp_path / "interactions.csv"
+    csv_path.write_text(
+        "address,interaction_count\n" + "".join(f"{addr},1\n" for addr in report)
+    )
+    assert list(iter_addresses(str(csv_path))) == list(report)
+
+
+@pytest.mark.parametrize("count,size", [(0, 3), (9, 3), (10, 3), (2, 5)])
+def test_iter_batches(count, size):
+    """Test that batches are full except the last and keep every item in order"""
+    batches = list(iter_batches(iter(range(count)), size))
+
+    assert [item for batch in batches for item in batch] == list(range(count))
+    assert all(len(batch) == size for batch in batches[:-1])
+    assert len(batches) == -(-count // size)
+
+
+def test_resume_position(tmp_path):
+    """Test that a torn last line is cut off and the run resumes before it"""
+    path = tmp_path / "balances.jsonl"
+    assert resume_position(str(path)) == (0, None)
+
+    rows = [{"address": holder(i), "squid": i, "lp": 0} for i in range(1, 4)]
+    complete = "".join(json.dumps(row) + "\n" for row in rows)
+    path.write_text(complete + '{"address": "0x00')
+
+    assert resume_position(str(path)) == (3, holder(3))
+    assert path.read_text() == complete
+
+    # Appending after a resume leaves only whole rows
+    with open(path, "a") as f:
+        f.write(json.dumps({"address": holder(4), "squid": 4, "lp": 0}) + "\n")
+    assert resume_position(str(path)) == (4, holder(4))
+
+    path.write_text('{"address": "0x00')
+    assert resume_position(str(path)) == (0, None)
+    assert path.read_text() == ""
+
+
+def test_write_balance_json(tmp_path):
+    """Test that the streamed JSON reads back as the JSONL rows"""
+    jsonl_path = tmp_path / "balances.jsonl"
+    json_path = tmp_path / "balances.json"
+    rows = {holder(i): {"squid": i * 10**20, "lp": i} for i in range(1, 5)}
+    jsonl_path.write_text(
+        "".join(json.dumps({"address": a, **b}) + "\n" for a, b in rows.items())
+    )
+
+    write_balance_json(str(jsonl_path), str(json_path))
+    assert json.loads(json_path.read_text()) == rows
+
+    jsonl_path.write_text("")
+    write_balance_json(str(jsonl_path), str(json_path))
+    assert json.loads(json_path.read_text()) == {}
+
+
+def test_map_in_order():
+    """Test that results come back in input order with a bounded window"""
+    lock = threading.Lock()
+    running = 0
+    most = 0
+    seen = []
+
+    def work(batch):
+        nonlocal running, most
+        with lock:
+            running += 1
+            most = max(most, running)
+        # Later batches finish first
+        time.sleep(0.002 * (20 - batch[0]))
+        with lock:
+            running -= 1
+        return [x * 2 for x in batch]
+
+    batches = [[i, i + 100] for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(map_in_order(pool, work, batches, 6, before=seen.append))
+
+    assert results == [[i * 2, (i + 100) * 2] for i in range(20)]
+    assert seen == batches
+    assert 1 < most <= 4
+
+
+def test_replay_snapshot_cross_check():
+    """Test that replayed balances match balanceOf and mismatches are reported"""
+    a, b, c, d = (holder(i) for i in range(1, 5))
+    logs = [
+        transfer_log(SQUID, 30, b, c, 10 * 10**18),
+        transfer_log(SQUID, 10, ZERO_ADDRESS, a, 100 * 10**18),
+        transfer_log(SQUID, 20, a, b, 30 * 10**18),
+        transfer_log(LP, 15, ZERO_ADDRESS, c, 5),
+        transfer_log(LP, 25, c, ZERO_ADDRESS, 2),
+        # After the snapshot block
+        transfer_log(SQUID, 51, a, d, 70 * 10**18),
+    ]
+    node = Node(
+        {
+            SQUID: {a: 70 * 10**18, b: 20 * 10**18, c: 10 * 10**18},
+            LP: {c: 3},
+        },
+        logs=logs,
+    )
+    client = JsonRpcClient(transport=node)
+
+    batches = list(replay_snapshot(client, 50, CONTRACTS, [[a, b], [c, d]]))
+
+    assert batches == [
+        {a: {"squid": 70 * 10**18, "lp": 0}, b: {"squid": 20 * 10**18, "lp": 0}},
+        {c: {"squid": 10 * 10**18, "lp": 3}, d: {"squid": 0, "lp": 0}},
+    ]
+    snapshot = {addr: bals for batch in batches for addr, bals in batch.items()}
+    assert cross_check(client, 50, CONTRACTS, snapshot) == []
+    assert all(block == 50 for block, _ in node.calls)
+
+    # A replay that lost the burn no longer matches the chain
+    snapshot[c] = {"squid": 10 * 10**18, "lp": 5}
+    assert cross_check(client, 50, CONTRACTS, snapshot) == [(c, "lp", 5, 3)]
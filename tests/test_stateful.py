@@ -0,0 +1,344 @@
+import json
+import os
+import time
+
+import boa
+import pytest
+from compile_cache import load_partial, storage_layout
+from fork_cache import mapping_slot
+from hypothesis import HealthCheck, Phase, settings
+from hypothesis import strategies as st
+from hypothesis.stateful import (
+    RuleBasedStateMachine,
+    invariant,
+    precondition,
+    rule,
+    run_state_machine_as_test,
+)
+
+CONTRACTS = ["SquillDrop", "SquillDrop3", "SquillDropBatch", "SquillDropLite"]
+
+USERS = 4
+FUNDING = 10**6
+STEPS = 10
+
+# Sequences run by the throughput benchmark
+BENCHMARK_EXAMPLES = 1_000
+REPORT_FILE = os.path.join(os.path.dirname(__file__), "stateful_report.json")
+
+# Small amounts, so claims regularly run into an underfunded contract
+amounts = st.integers(min_value=0, max_value=FUNDING)
+
+
+class Storage:
+    """
+    Read contract storage directly instead of calling view functions.
+
+    A view call goes through the EVM and costs as much as a transaction,
+    while an invariant only needs a few slots after every step. Mapping
+    slots are hashed once per key.
+    """
+
+    def __init__(self, contract, path):
+        self.address = contract.address
+        self.layout = storage_layout(path)["storage_layout"]
+        self.slots = {}
+
+    def slot(self, *path):
+        entry = self.layout
+        for name in path:
+            entry = entry[name]
+        return entry["slot"]
+
+    def read(self, slot):
+        return boa.env.evm.get_storage(self.address, slot)
+
+    def mapping(self, name, key):
+        """Value at `key` of the mapping `name`, a variable name or a path."""
+        if (name, key) not in self.slots:
+            path = name if isinstance(name, tuple) else (name,)
+            self.slots[name, key] = mapping_slot(self.slot(*path), str(key), "vyper")
+        return self.read(self.slots[name, key])
+
+
+def reverts(error):
+    """boa.reverts for an expected message; an empty one matches any revert."""
+    return boa.reverts(error) if error else boa.reverts()
+
+
+@pytest.fixture(scope="module")
+def deployments():
+    """Fresh token and funded claim contracts, deployed once for the module."""
+    owner = boa.env.generate_address()
+    users = [boa.env.generate_address() for _ in range(USERS)]
+    with boa.env.prank(owner):
+        token = load_partial("contracts/mocks/MockToken.vy").deploy(
+            "Test Token", "TEST", 18
+        )
+        token._mint_for_testing(owner, 1_000 * FUNDING)
+
+        drops = {}
+        for name in CONTRACTS:
+            drops[name] = load_partial(f"contracts/{name}.vy").deploy(token.address)
+            token.transfer(drops[name].address, FUNDING)
+
+    return {
+        name: {
+            "name": name,
+            "drop": drop,
+            "storage": Storage(drop, f"contracts/{name}.vy"),
+            "token": token,
+            "token_storage": Storage(token, "contracts/mocks/MockToken.vy"),
+            "owner": owner,
+            "users": users,
+            # Everyone holding the token, the other claim contracts included
+            "holders": [owner, *(drop.address for drop in drops.values()), *users],
+        }
+        for name, drop in drops.items()
+    }
+
+
+def claim_machine(deployment):
+    """
+    Rule-based state machine over one deployed claim contract.
+
+    Every sequence starts from the deployed state inside its own anchor and
+    is rolled back in teardown, so no contract is deployed per sequence.
+    The model predicts the outcome of every call, and the invariants compare
+    it to storage after every step.
+    """
+    name = deployment["name"]
+    drop = deployment["drop"]
+    storage = deployment["storage"]
+    token = deployment["token"]
+    token_storage = deployment["token_storage"]
+    owner = deployment["owner"]
+    users = deployment["users"]
+    holders = deployment["holders"]
+    user_indices = st.integers(min_value=0, max_value=USERS - 1)
+
+    # Contracts built on whitelist.vy keep the mapping in the module's storage
+    eligible = (
+        ("whitelist", "eligible_addresses")
+        if "whitelist" in storage.layout
+        else "eligible_addresses"
+    )
+
+    # SquillDropLite leaves insufficient funds to the token's own revert,
+    # which carries no message
+    balance_error = "" if name == "SquillDropLite" else "!balance"
+
+    class ClaimMachine(RuleBasedStateMachine):
+        def __init__(self):
+            super().__init__()
+            self.anchor = boa.env.anchor()
+            self.anchor.__enter__()
+
+            self.owed = [0] * USERS
+            self.paid = [0] * USERS
+            self.balance = token_storage.mapping("balanceOf", drop.address)
+            self.owner_balance = token_storage.mapping("balanceOf", owner)
+            self.paused = False
+
+        def teardown(self):
+            self.anchor.__exit__(None, None, None)
+
+        def expected_claim_error(self, i):
+            if self.paused:
+                return "paused"
+            if self.owed[i] == 0:
+                return "!address"
+            if self.owed[i] > self.balance:
+                return balance_error
+            return None
+
+        def pay(self, i):
+            self.balance -= self.owed[i]
+            self.paid[i] += self.owed[i]
+            self.owed[i] = 0
+
+        # ---------------------------------------------------------- #
+        # Owner
+        # ---------------------------------------------------------- #
+
+        @rule(i=user_indices, amount=amounts)
+        def add_address(self, i, amount):
+            with boa.env.prank(owner):
+                drop.add_address(users[i], amount)
+            self.owed[i] = amount
+
+        @rule(i=user_indices)
+        def remove_address(self, i):
+            with boa.env.prank(owner):
+                drop.remove_address(users[i])
+            self.owed[i] = 0
+
+        @precondition(lambda self: hasattr(drop, "add_bulk_addresses"))
+        @rule(entries=st.lists(st.tuples(user_indices, amounts), max_size=USERS))
+        def add_bulk_addresses(self, entries):
+            with boa.env.prank(owner):
+                drop.add_bulk_addresses(
+                    [users[i] for i, _ in entries], [amount for _, amount in entries]
+                )
+            for i, amount in entries:
+                self.owed[i] = amount
+
+        @rule(amount=amounts)
+        def fund(self, amount):
+            with boa.env.prank(owner):
+                token.transfer(drop.address, amount)
+            self.balance += amount
+            self.owner_balance -= amount
+
+        @rule()
+        def toggle_pause(self):
+            with boa.env.prank(owner):
+                if self.paused:
+                    drop.unpause()
+                else:
+                    drop.pause()
+            self.paused = not self.paused
+
+        @rule()
+        def withdraw_remaining(self):
+            with boa.env.prank(owner):
+                if self.balance == 0:
+                    with boa.reverts("!balance"):
+                        drop.withdraw_remaining(token.address)
+                    return
+                drop.withdraw_remaining(token.address)
+            self.owner_balance += self.balance
+            self.balance = 0
+
+        # ---------------------------------------------------------- #
+        # Claims
+        # ---------------------------------------------------------- #
+
+        @rule(i=user_indices)
+        def claim(self, i):
+            error = self.expected_claim_error(i)
+            with boa.env.prank(users[i]):
+                if error is not None:
+                    with reverts(error):
+                        drop.claim()
+                    return
+                drop.claim()
+            self.pay(i)
+
+        @rule(i=user_indices)
+        def claim_for(self, i):
+            error = self.expected_claim_error(i)
+            with boa.env.prank(owner):
+                if error is not None:
+                    with reverts(error):
+                        drop.claim_for(users[i])
+                    return
+                drop.claim_for(users[i])
+            self.pay(i)
+
+        @precondition(lambda self: hasattr(drop, "claim_for_many"))
+        @rule(batch=st.lists(user_indices, max_size=2 * USERS))
+        def claim_for_many(self, batch):
+            # Unclaimed entries are skipped; the batch fails as a whole if
+            # any payout exceeds what is left
+            owed, balance = list(self.owed), self.balance
+            for i in batch:
+                balance -= owed[i]
+                owed[i] = 0
+            if self.paused:
+                error = "paused"
+            elif balance < 0:
+                # whitelist.vy checks the balance for every contract
+                error = "!balance"
+            else:
+                error = None
+
+            with boa.env.prank(owner):
+                if error is not None:
+                    with reverts(error):
+                        drop.claim_for_many([users[i] for i in batch])
+                    return
+                drop.claim_for_many([users[i] for i in batch])
+            for i in batch:
+                self.pay(i)
+
+        @rule(i=user_indices, amount=amounts)
+        def stranger_add_address(self, i, amount):
+            with boa.env.prank(users[i]):
+                with boa.reverts("!owner"):
+                    drop.add_address(users[i], amount)
+
+        # ---------------------------------------------------------- #
+        # Invariants
+        # ---------------------------------------------------------- #
+
+        @invariant()
+        def conservation(self):
+            # Tokens only move between the owner, the contract and users
+            assert sum(
+                token_storage.mapping("balanceOf", holder) for holder in holders
+            ) == token_storage.read(token_storage.slot("total_supply"))
+
+        @invariant()
+        def solvency(self):
+            # The contract holds exactly what was funded minus what left it
+            assert token_storage.mapping("balanceOf", drop.address) == self.balance
+            assert token_storage.mapping("balanceOf", owner) == self.owner_balance
+            for i, user in enumerate(users):
+                assert token_storage.mapping("balanceOf", user) == self.paid[i]
+
+        @invariant()
+        def eligibility(self):
+            for i, user in enumerate(users):
+                assert storage.mapping(eligible, user) == self.owed[i]
+            assert storage.read(storage.slot("pausable", "paused")) == self.paused
+
+    return ClaimMachine
+
+
+def run_machine(deployment, **kwargs):
+    run_state_machine_as_test(
+        claim_machine(deployment),
+        settings=settings(
+            settings.default,
+            stateful_step_count=STEPS,
+            deadline=None,
+            suppress_health_check=[HealthCheck.too_slow],
+            **kwargs,
+        ),
+    )
+
+
+@pytest.mark.parametrize("name", CONTRACTS)
+def test_claim_machine(deployments, name):
+    """Random call sequences keep storage, balances and the model in sync"""
+    run_machine(deployments[name])
+
+
+def test_claim_machine_throughput(deployments):
+    """Sequences per minute of the state machine, written to stateful_report.json"""
+    start = time.perf_counter()
+    run_machine(
+        deployments["SquillDrop3"],
+        max_examples=BENCHMARK_EXAMPLES,
+        phases=[Phase.generate],
+        database=None,
+    )
+    elapsed = time.perf_counter() - start
+
+    per_minute = BENCHMARK_EXAMPLES * 60 / elapsed
+    print(
+        f"{BENCHMARK_EXAMPLES:,} sequences of up to {STEPS} steps in {elapsed:.1f}s, "
+        f"{per_minute:,.0f} per minute"
+    )
+    with open(REPORT_FILE, "w") as f:
+        json.dump(
+            {
+                "sequences": BENCHMARK_EXAMPLES,
+                "steps": STEPS,
+                "seconds": round(elapsed, 2),
+                "sequences_per_minute": round(per_minute),
+            },
+            f,
+            indent=2,
+        )
@@ -0,0 +1,176 @@
+import numpy as np
+import pytest
+from allocate import (
+    allocate,
+    eligible_mask,
+    excluded_addresses,
+    load_balances,
+    squid_weights,
+)
+from sweep import (
+    allocate_kwargs,
+    capped_shares,
+    component_matrix,
+    eligibility,
+    evaluate,
+)
+
+POOL_SQUID = 2_613_085_990_482_830_535_184_697
+LP_SUPPLY = 8_053_583_861_962_317_901_555
+
+
+@pytest.fixture(scope="module")
+def snapshot():
+    return load_balances("scripts/balance_data_18922260.json")
+
+
+def test_eligibility_matches_allocate(snapshot):
+    """Test that every scenario threshold counts the holders allocate would"""
+    addresses, columns = snapshot
+    excluded = excluded_addresses(addresses, columns)
+    weights = squid_weights(columns, POOL_SQUID, LP_SUPPLY)
+    thresholds = [0, 100, 1_000, 5_000]
+
+    eligible = eligibility(addresses, columns, POOL_SQUID, LP_SUPPLY, thresholds)
+    for threshold in thresholds:
+        mask = eligible_mask(
+            addresses, weights, threshold * 10**18 * LP_SUPPLY, excluded
+        )
+        assert eligible[threshold].sum() == mask.sum()
+
+
+def test_eligibility_excludes_threshold():
+    """Test that a holder at exactly the threshold is left out, like in allocate"""
+    addresses = ["0x" + "11" * 20, "0x" + "22" * 20]
+    columns = {
+        "squid": np.array([100 * 10**18, 101 * 10**18], dtype=object),
+        **{name: np.zeros(2, dtype=object) for name in ("lp", "gauge", "convex")},
+    }
+    eligible = eligibility(addresses, columns, 1, 1, [100])
+    assert eligible[100].tolist() == [False, True]
+
+
+def test_capped_shares():
+    """Test that capped shares add up to the budget and infeasible caps are NaN"""
+    weights = np.array([[1.0, 1.0], [1.0, 1.0], [8.0, 8.0]])
+    shares = capped_shares(weights, 100.0, np.array([50.0, np.inf]))
+    assert shares[:, 0].tolist() == [25.0, 25.0, 50.0]
+    assert shares[:, 1].tolist() == [10.0, 10.0, 80.0]
+
+    shares = capped_shares(weights, 100.0, np.array([30.0, np.inf]))
+    assert np.isnan(shares[:, 0]).all()
+    assert shares[:, 1].tolist() == [10.0, 10.0, 80.0]
+
+
+def test_evaluate_recipients(snapshot):
+    """Test that scenario recipient counts match the allocation's eligible holders"""
+    addresses, columns = snapshot
+    matrix = component_matrix(addresses, columns, POOL_SQUID, LP_SUPPLY)
+    eligible = eligibility(addresses, columns, POOL_SQUID, LP_SUPPLY, [0, 1_000])
+    scenarios = [
+        {
+            "squid": 1.0,
+            "lp": 1.0,
+            "gauge": 1.0,
+            "convex": 1.0,
+            "min_squid": t,
+            "cap": None,
+        }
+        for t in (0, 1_000)
+    ]
+
+    report = evaluate(matrix, eligible, scenarios, 1_776_000.0)
+
+    assert report["recipients"].tolist() == [eligible[0].sum(), eligible[1_000].sum()]
+
+
+def test_evaluate_infeasible(snapshot):
+    """Test that an infeasible scenario gets NaN metrics and the rest still run"""
+    addresses, columns = snapshot
+    matrix = component_matrix(addresses, columns, POOL_SQUID, LP_SUPPLY)
+    eligible = eligibility(addresses, columns, POOL_SQUID, LP_SUPPLY, [5_000])
+    scenarios = [
+        {
+            "squid": 1.0,
+            "lp": 1.0,
+            "gauge": 1.0,
+            "convex": 1.0,
+            "min_squid": 5_000,
+            "cap": cap,
+        }
+        for cap in (1.0, None)
+    ]
+
+    report = evaluate(matrix, eligible, scenarios, 1_776_000.0)
+
+    assert report.iloc[0, len(scenarios[0]) :].isna().all()
+    assert report["recipients"][1] == eligible[5_000].sum()
+
+
+@pytest.mark.parametrize(
+    "scenario",
+    [
+        {
+            "squid": 1.0,
+            "lp": 0.5,
+            "gauge": 2.0,
+            "convex": 1.5,
+            "min_squid": 100,
+            "cap": None,
+        },
+        {
+            "squid": 1.0,
+            "lp": 1.5,
+            "gauge": 1.0,
+            "convex": 0.5,
+            "min_squid": 0,
+            "cap": 25_000,
+        },
+    ],
+)
+def test_scenario_reproduced_by_allocate(snapshot, scenario):
+    """Test that allocate with a scenario's arguments gives the swept metrics"""
+    addresses, columns = snapshot
+    budget = 1_776_000
+    matrix = component_matrix(addresses, columns, POOL_SQUID, LP_SUPPLY)
+    eligible = eligibility(
+        addresses, columns, POOL_SQUID, LP_SUPPLY, [scenario["min_squid"]]
+    )
+    report = evaluate(matrix, eligible, [scenario], float(budget))
+
+    allocations = allocate(
+        addresses,
+        columns,
+        POOL_SQUID,
+        LP_SUPPLY,
+        budget * 10**18,
+        **allocate_kwargs(scenario),
+    )
+    amounts = np.array([amount for _, amount in allocations], dtype=float) / 1e18
+
+    # Holders whose share rounds to zero wei still get a row
+    assert len(allocations) == report["recipients"][0]
+    assert amounts[:10].sum() / budget == pytest.approx(report["top10_share"][0])
+    assert amounts[:100].sum() / budget == pytest.approx(report["top100_share"][0])
+
+
+def test_component_weights():
+    """Test that component weights scale each position in the exact weights"""
+    columns = {
+        "squid": np.array([4, 0, 0], dtype=object),
+        "lp": np.array([0, 4, 0], dtype=object),
+        "gauge": np.array([0, 0, 4], dtype=object),
+        "convex": np.array([0, 0, 4], dtype=object),
+    }
+    assert (
+        squid_weights(columns, 3, 2, {}).tolist()
+        == squid_weights(columns, 3, 2).tolist()
+    )
+
+    weights = squid_weights(columns, 3, 2, {"lp": 0.5, "gauge": 1.5, "convex": 0})
+    # Relative to the squid position: 4 * 2 = 8 squid, 4 * 3 LP value
+    assert weights[1] * 8 == weights[0] * 12 * 0.5
+    assert weights[2] * 8 == weights[0] * 12 * 1.5
+
+    with pytest.raises(ValueError, match="Negative"):
+        squid_weights(columns, 3, 2, {"lp": -1})
@@ -0,0 +1,118 @@
+import boa
+import pytest
+from compile_cache import load_partial
+from packing import deploy_tables, pack_records, split_tables, unpack_records
+
+
+@pytest.fixture(scope="module")
+def allocations(alice, bob):
+    others = [boa.env.generate_address() for _ in range(40)]
+    return [
+        [str(addr).lower(), (i + 1) * 10**17]
+        for i, addr in enumerate([alice, bob, *others])
+    ]
+
+
+@pytest.fixture(scope="module")
+def table_drop(owner, token, reward_amount, allocations):
+    # Small tables so lookups cross table boundaries
+    tables = deploy_tables(split_tables(allocations, per_table=16))
+    contract = load_partial("contracts/SquillDropTable.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address, tables)
+
+        # Fund contract
+        token.transfer(instance.address, reward_amount * 10)
+    return instance
+
+
+def test_pack_round_trip(allocations):
+    """Test that records unpack to the same allocations"""
+    assert unpack_records(pack_records(allocations)) == allocations
+
+    blobs = split_tables(allocations, per_table=16)
+    assert [len(blob) // 32 for blob in blobs] == [16, 16, 10]
+
+    rows = [row for blob in blobs for row in unpack_records(blob)]
+    assert rows == sorted(allocations, key=lambda row: int(row[0], 16))
+
+
+def test_pack_rejects_bad_input(alice):
+    """Test amount range and duplicate checks"""
+    with pytest.raises(ValueError):
+        pack_records([[str(alice), 2**96]])
+    with pytest.raises(ValueError):
+        split_tables([[str(alice), 1], [str(alice).lower(), 2]])
+
+
+def test_initial_state(table_drop, owner, token):
+    """Test initial contract state after deployment"""
+    assert table_drop.owner() == owner
+    assert table_drop.reward_token() == token.address
+    assert len(table_drop.tables()) == 3
+    assert not table_drop.paused()
+
+
+def test_pending_claim_amount(table_drop, allocations):
+    """Test that every packed record is found by the on-chain search"""
+    for addr, amount in allocations:
+        assert table_drop.pending_claim_amount(addr) == amount
+
+    # Addresses below, between and above the records are not found
+    assert table_drop.pending_claim_amount("0x" + "00" * 19 + "01") == 0
+    assert table_drop.pending_claim_amount("0x" + "ff" * 20) == 0
+    assert table_drop.pending_claim_amount(boa.env.generate_address()) == 0
+
+
+def test_successful_claim(table_drop, alice, token, allocations):
+    """Test successful token claim process"""
+    amount = allocations[0][1]
+    initial_contract_balance = token.balanceOf(table_drop.address)
+
+    with boa.env.prank(alice):
+        table_drop.claim()
+
+    assert token.balanceOf(alice) == amount
+    assert token.balanceOf(table_drop.address) == initial_contract_balance - amount
+    assert table_drop.pending_claim_amount(alice) == 0
+
+    # Claiming twice fails
+    with boa.env.prank(alice):
+        with boa.reverts("claimed"):
+            table_drop.claim()
+
+
+def test_ineligible_claim(table_drop):
+    """Test that addresses outside the table cannot claim"""
+    with boa.env.prank(boa.env.generate_address()):
+        with boa.reverts("!address"):
+            table_drop.claim()
+
+
+def test_claim_for(table_drop, owner, alice, bob, token, allocations):
+    """Test claiming on behalf of another address"""
+    with boa.env.prank(bob):
+        with boa.reverts("!owner"):
+            table_drop.claim_for(alice)
+
+    with boa.env.prank(owner):
+        table_drop.claim_for(alice)
+
+    assert token.balanceOf(alice) == allocations[0][1]
+    assert table_drop.pending_claim_amount(bob) == allocations[1][1]
+
+
+def test_paused_functionality(table_drop, owner, alice):
+    """Test pause and unpause functionality"""
+    with boa.env.prank(owner):
+        table_drop.pause()
+
+    with boa.env.prank(alice):
+        with boa.reverts("paused"):
+            table_drop.claim()
+
+    with boa.env.prank(owner):
+        table_drop.unpause()
+
+    with boa.env.prank(alice):
+        table_drop.claim()
@@ -0,0 +1,184 @@
+import threading
+
+import pytest
+from interactions import (
+    checkpoint_path,
+    get_contract_interactions_from_logs,
+    load_checkpoint,
+)
+from rpc import JsonRpcClient, RPCError
+from transfer_logs import (
+    TRANSFER_TOPIC,
+    ZERO_ADDRESS,
+    decode_transfer,
+    iter_transfers,
+    replay_balances,
+)
+
+TOKEN = "0x" + "aa" * 20
+OTHER = "0x" + "bb" * 20
+
+
+def holder(i):
+    return f"0x{i:040x}"
+
+
+def transfer_log(contract, block, sender, receiver, value):
+    return {
+        "address": contract,
+        "blockNumber": hex(block),
+        "topics": [
+            TRANSFER_TOPIC,
+            "0x" + sender[2:].rjust(64, "0"),
+            "0x" + receiver[2:].rjust(64, "0"),
+        ],
+        "data": hex(value),
+    }
+
+
+class Node:
+    """
+    JSON-RPC stand-in answering eth_getLogs from a list of logs.
+
+    Like public nodes, it refuses a range holding more than `max_results`
+    logs. Every range asked for is recorded.
+
+    Args:
+        logs (list): Logs as a node returns them
+        head (int): Block height reported by eth_blockNumber
+        max_results (int): Most logs one eth_getLogs answers with
+    """
+
+    def __init__(self, logs, head, max_results=100):
+        self.logs = logs
+        self.head = head
+        self.max_results = max_results
+        self.ranges = []
+        self.answered = []
+        self.lock = threading.Lock()
+
+    def __call__(self, payload):
+        responses = []
+        for request in payload:
+            response = {"jsonrpc": "2.0", "id": request["id"]}
+            try:
+                response["result"] = self.answer(request["method"], request["params"])
+            except RPCError as e:
+                response["error"] = {"code": e.code, "message": e.message}
+            responses.append(response)
+        return responses
+
+    def answer(self, method, params):
+        if method == "eth_blockNumber":
+            return hex(self.head)
+        if method == "eth_getLogs":
+            query = params[0]
+            start, end = int(query["fromBlock"], 16), int(query["toBlock"], 16)
+            with self.lock:
+                self.ranges.append((start, end))
+            logs = [
+                log
+                for log in self.logs
+                if log["address"] in query["address"]
+                and log["topics"][0] in query["topics"]
+                and start <= int(log["blockNumber"], 16) <= end
+            ]
+            if len(logs) > self.max_results:
+                message = f"query returned more than {self.max_results} results"
+                raise RPCError({"code": -32005, "message": message})
+            with self.lock:
+                self.answered.append((start, end))
+            return logs
+        raise NotImplementedError(method)
+
+
+def test_iter_transfers_splits_ranges():
+    """Test that refused ranges are halved and every transfer comes back once"""
+    logs = [
+        transfer_log(TOKEN, block, ZERO_ADDRESS, holder(block), block + 1)
+        for block in range(1_000)
+    ]
+    # A burst of activity in a few blocks
+    logs += [transfer_log(TOKEN, 500, holder(i), OTHER, 1) for i in range(90)]
+    node = Node(logs, head=999)
+
+    transfers = list(
+        iter_transfers(JsonRpcClient(transport=node), [TOKEN], 0, 999, chunk_size=400)
+    )
+
+    assert sorted(transfers) == sorted(decode_transfer(log) for log in logs)
+    # The chunk around the burst was refused and retried as halves
+    assert len(node.ranges) > len(node.answered)
+    # The answered ranges cover every block exactly once
+    answered = sorted(node.answered)
+    assert answered[0][0] == 0 and answered[-1][1] == 999
+    assert all(prev[1] + 1 == cur[0] for prev, cur in zip(answered, answered[1:]))
+
+    balances = replay_balances(transfers, {TOKEN: "token"})["token"]
+    assert balances[holder(999)] == 1_000
+    assert balances[OTHER] == 90
+
+
+def test_iter_transfers_errors():
+    """Test that a single block over the limit and other errors are raised"""
+    logs = [transfer_log(TOKEN, 7, holder(i), OTHER, 1) for i in range(20)]
+
+    with pytest.raises(RPCError, match="more than 10 results"):
+        list(
+            iter_transfers(
+                JsonRpcClient(transport=Node(logs, 9, max_results=10)), [TOKEN], 0, 9
+            )
+        )
+
+    def broken(payload):
+        return [
+            {
+                "jsonrpc": "2.0",
+                "id": r["id"],
+                "error": {"code": -32000, "message": "boom"},
+            }
+            for r in payload
+        ]
+
+    with pytest.raises(RPCError, match="boom"):
+        list(iter_transfers(JsonRpcClient(transport=broken), [TOKEN], 0, 9))
+
+
+def test_interactions_from_logs_checkpoint(tmp_path):
+    """Test that the logs backend resumes from its checkpoints"""
+    logs = [
+        transfer_log(contract, block, holder(block), OTHER, 1)
+        for block in range(500)
+        for contract in ([TOKEN, OTHER] if block % 2 else [TOKEN])
+    ]
+    node = Node(logs, head=499)
+    client = JsonRpcClient(transport=node)
+    contracts = [TOKEN, OTHER]
+
+    first = get_contract_interactions_from_logs(
+        contracts, client=client, checkpoint_dir=str(tmp_path)
+    )
+    assert first[holder(1)] == [TOKEN, OTHER]
+    assert first[holder(2)] == [TOKEN]
+    for contract in contracts:
+        checkpoint = load_checkpoint(
+            checkpoint_path(str(tmp_path), "fraxtal", contract)
+        )
+        assert checkpoint["last_block"] == 499
+        assert checkpoint["addresses"] == {a for a in first if contract in first[a]}
+
+    node.logs += [
+        transfer_log(OTHER, block, holder(block), OTHER, 1) for block in range(500, 600)
+    ]
+    node.head = 599
+    node.ranges.clear()
+
+    second = get_contract_interactions_from_logs(
+        contracts, client=client, checkpoint_dir=str(tmp_path)
+    )
+    assert min(start for start, _ in node.ranges) == 500 - 64
+    assert second[holder(2)] == [TOKEN]
+    assert second[holder(550)] == [OTHER]
+    assert set(second) == set(first) | {holder(block) for block in range(500, 600)}
+    checkpoint = load_checkpoint(checkpoint_path(str(tmp_path), "fraxtal", OTHER))
+    assert checkpoint["last_block"] == 599
@@ -0,0 +1,213 @@
+import glob
+import json
+
+import boa
+import pytest
+import verify_contract_addresses as verify
+from compile_cache import load_partial
+from eth_abi import decode, encode
+from helpers import load_deployment_info
+from rpc import JsonRpcClient
+from whitelist import Table, diff_tables, to_hex
+
+ENTRIES = 100
+BATCH_SIZE = 40
+
+
+class Node:
+    """In-process stand-in for a JSON-RPC node, answering from the boa env"""
+
+    def __init__(self):
+        self.round_trips = 0
+
+    def __call__(self, payload):
+        self.round_trips += 1
+        return [
+            {"jsonrpc": "2.0", "id": request["id"], "result": self.answer(**request)}
+            for request in payload
+        ]
+
+    def answer(self, method, params, **kwargs):
+        if method == "eth_chainId":
+            return hex(1)
+        if method == "eth_getCode":
+            return "0x" + boa.env.get_code(params[0]).hex()
+        if method == "eth_blockNumber":
+            return hex(boa.env.evm.patch.block_number)
+        if method == "eth_getStorageAt":
+            address, slot, _ = params
+            return hex(boa.env.evm.get_storage(address, int(slot, 16)))
+        if method == "eth_call" and params[0]["to"] == verify.MULTICALL3:
+            return "0x" + self.aggregate3(bytes.fromhex(params[0]["data"][2:])).hex()
+        raise NotImplementedError(method)
+
+    def aggregate3(self, calldata):
+        assert calldata[:4] == verify.AGGREGATE3_SELECTOR
+        (calls,) = decode(["(address,bool,bytes)[]"], calldata[4:])
+        results = [
+            (True, boa.env.raw_call(target, data=data).output)
+            for target, _, data in calls
+        ]
+        return encode(["(bool,bytes)[]"], [results])
+
+
+@pytest.fixture(scope="module")
+def whitelist():
+    return {
+        str(boa.env.generate_address()).lower(): (i + 1) * 10**18
+        for i in range(ENTRIES)
+    }
+
+
+def to_table(whitelist):
+    return Table.from_rows(
+        "expected",
+        [bytes.fromhex(addr[2:]) for addr in whitelist],
+        list(whitelist.values()),
+    )
+
+
+@pytest.fixture(scope="module")
+def deployed(owner, token, whitelist):
+    contract = load_partial("contracts/SquillDrop.vy")
+    with boa.env.prank(owner):
+        instance = contract.deploy(token.address)
+        for addr, amount in whitelist.items():
+            instance.add_address(addr, amount)
+        token._mint_for_testing(instance.address, ENTRIES**2 * 10**18)
+    return instance
+
+
+@pytest.fixture
+def node(monkeypatch):
+    monkeypatch.setattr(verify, "BATCH_SIZE", BATCH_SIZE)
+    monkeypatch.setattr(verify, "MULTICALL_SIZE", BATCH_SIZE)
+    return Node()
+
+
+@pytest.mark.parametrize("mode,round_trips", [("storage", 4), ("multicall", 2)])
+def test_extract_whitelist(deployed, whitelist, node, mode, round_trips):
+    """Test that every entry is read back in batched round trips"""
+    onchain, block = verify.extract_whitelist_from_contract(
+        JsonRpcClient(transport=node),
+        deployed.address,
+        to_table(whitelist),
+        mode,
+        source="contracts/SquillDrop.vy",
+    )
+
+    assert dict(zip(onchain.addresses(), onchain.amounts)) == whitelist
+    assert block == boa.env.evm.patch.block_number
+    # One eth_blockNumber, then the entries in batches
+    assert node.round_trips == round_trips
+
+
+@pytest.mark.parametrize("mode", ["storage", "multicall"])
+def test_extract_whitelist_discrepancies(deployed, owner, whitelist, node, mode):
+    """Test that claimed, changed and unknown entries show up in the comparison"""
+    claimed, changed = list(whitelist)[:2]
+    with boa.env.prank(owner):
+        deployed.claim_for(claimed)
+        deployed.add_address(changed, 1)
+    unknown = str(boa.env.generate_address()).lower()
+    expected = to_table({**whitelist, unknown: 1})
+
+    onchain, _ = verify.extract_whitelist_from_contract(
+        JsonRpcClient(transport=node),
+        deployed.address,
+        expected,
+        mode,
+        source="contracts/SquillDrop.vy",
+    )
+    missing, extra, mismatches = diff_tables(expected, onchain)
+
+    assert sorted(to_hex(key) for key in missing) == sorted([claimed, unknown])
+    assert len(extra) == 0
+    assert [(to_hex(key), a, b) for key, a, b in mismatches] == [
+        (changed, whitelist[changed], 1)
+    ]
+
+
+def test_storage_layout_of_source(owner, token, whitelist, node):
+    """Test that storage reads hash against the deployed contract's own layout"""
+    with boa.env.prank(owner):
+        lite = load_partial("contracts/SquillDropLite.vy").deploy(token.address)
+        for addr, amount in whitelist.items():
+            lite.add_address(addr, amount)
+    client = JsonRpcClient(transport=node)
+
+    onchain, _ = verify.extract_whitelist_from_contract(
+        client,
+        lite.address,
+        to_table(whitelist),
+        "storage",
+        source="contracts/SquillDropLite.vy",
+    )
+    assert dict(zip(onchain.addresses(), onchain.amounts)) == whitelist
+    assert node.round_trips == 4
+
+    # SquillDrop keeps the mapping in another slot, where nothing is stored
+    assert verify.eligible_slot("contracts/SquillDropLite.vy") != verify.eligible_slot(
+        "contracts/SquillDrop.vy"
+    )
+    values = verify.eligible_storage(
+        client, lite.address, list(whitelist), "latest", "contracts/SquillDrop.vy"
+    )
+    assert not any(values)
+
+
+@pytest.mark.parametrize("source", [None, "contracts/SquillDropTable.vy"])
+def test_unknown_layout_calls_contract(deployed, whitelist, node, source):
+    """Test that without a usable layout the entries are read by eth_call"""
+    onchain, _ = verify.extract_whitelist_from_contract(
+        JsonRpcClient(transport=node),
+        deployed.address,
+        to_table(whitelist),
+        "storage",
+        source=source,
+    )
+
+    assert dict(zip(onchain.addresses(), onchain.amounts)) == whitelist
+    # One eth_blockNumber and the multicall batches
+    assert node.round_trips == 2
+
+
+def test_deployment_source(tmp_path):
+    """Test that the source comes from the record or its Vyper output artifact"""
+    assert (
+        verify.deployment_source({"contract_source": "contracts/SquillDropLite.vy"})
+        == "contracts/SquillDropLite.vy"
+    )
+
+    (tmp_path / "artifacts").mkdir()
+    with open(tmp_path / "artifacts" / "output.json", "w") as f:
+        json.dump(
+            {"settings": {"outputSelection": {"contracts/SquillDrop3.vy": ["*"]}}}, f
+        )
+    info = {"artifacts": {"vyper_output": "artifacts/output.json"}}
+    assert verify.deployment_source(info, str(tmp_path)) == "contracts/SquillDrop3.vy"
+
+    info = {"artifacts": {"vyper_output": "artifacts/missing.json"}}
+    assert verify.deployment_source(info, str(tmp_path)) is None
+    assert verify.deployment_source({"artifacts": {"vyper_output": None}}) is None
+
+
+def test_check_deployment(deployed, node):
+    """Test that the wrong chain or an address without code fails the run"""
+    client = JsonRpcClient(transport=node)
+    verify.check_deployment(client, deployed.address, "ETHEREUM")
+
+    with pytest.raises(ValueError, match="serves chain 1"):
+        verify.check_deployment(client, deployed.address, "FRAXTAL")
+    with pytest.raises(ValueError, match="No contract"):
+        verify.check_deployment(client, str(boa.env.generate_address()), "ETHEREUM")
+
+
+def test_load_deployment_info():
+    """Test that deployment records load without unpickling boa objects"""
+    for path in glob.glob("deployment/*/*.yaml"):
+        info = load_deployment_info(path)
+        address = info["contract_address"]
+        assert isinstance(address, str)
+        assert path.split("_")[1] == address[:6].lower()
+        assert info["network"] in verify.CHAIN_IDS
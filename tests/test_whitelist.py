@@ -0,0 +1,131 @@
+import random
+import time
+
+import pytest
+from allocate import write_airdrop_json, write_airdrop_md
+from whitelist import (
+    diff_tables,
+    read_json_table,
+    read_markdown_table,
+    read_vyper_table,
+    to_hex,
+)
+
+ENTRIES = 100_000
+
+CONTRACT = """
+@internal
+def _whitelist():
+    \"\"\"
+    @notice Whitelist
+    \"\"\"
+{rows}
+
+@external
+def claim():
+    self.eligible_addresses[0x{unrelated}] = 1
+"""
+
+
+@pytest.fixture(scope="module")
+def allocations():
+    rng = random.Random(0)
+    return [
+        [f"0x{rng.getrandbits(160):040x}", rng.randrange(10**15, 10**23)]
+        for _ in range(ENTRIES)
+    ]
+
+
+def test_read_sources(tmp_path):
+    """Test that every source reads into the same table"""
+    allocations = [
+        ["0x" + "ab" * 20, 12_345_678 * 10**15],
+        # numpy keeps 20-byte keys without their trailing zero bytes
+        ["0x" + "cd" * 18 + "0000", 10**18],
+        ["0x" + "00" * 19 + "01", 1],
+    ]
+    write_airdrop_json(tmp_path / "airdrop.json", allocations)
+    write_airdrop_md(tmp_path / "airdrop.md", allocations)
+    (tmp_path / "Drop.vy").write_text(
+        CONTRACT.format(
+            rows="\n".join(
+                f"    self.eligible_addresses[{addr}] = {amount}"
+                for addr, amount in allocations
+            ),
+            unrelated="ef" * 20,
+        )
+    )
+
+    expected = dict(allocations)
+    for table in (
+        read_json_table(tmp_path / "airdrop.json"),
+        read_vyper_table(tmp_path / "Drop.vy"),
+    ):
+        assert dict(zip(table.addresses(), table.amounts)) == expected
+        assert table.tolerance == 0
+
+    table = read_markdown_table(tmp_path / "airdrop.md")
+    assert table.addresses() == sorted(expected)
+    assert table.tolerance == 5 * 10**16
+    diff = diff_tables(read_json_table(tmp_path / "airdrop.json"), table)
+    assert not any(len(kind) for kind in diff)
+
+
+def test_commented_and_duplicate_rows(tmp_path):
+    """Test that commented rows are skipped and repeated ones keep the last amount"""
+    path = tmp_path / "airdrop.json"
+    first, second = "0x" + "11" * 20, "0x" + "22" * 20
+    path.write_text(
+        f'[\n["{first}", "1"],\n//["{second}", "2"],\n["{first}", "3"],\n]\n'
+    )
+
+    table = read_json_table(path)
+    assert table.addresses() == [first]
+    assert list(table.amounts) == [3]
+    assert [to_hex(key) for key in table.duplicates] == [first]
+
+
+def test_markdown_precision(tmp_path):
+    """Test that whole-token tables get a whole-token tolerance"""
+    path = tmp_path / "airdrop.md"
+    path.write_text(
+        "| address | value |\n| --- | --- |\n"
+        f"| 0x{'11' * 20} | 56,939 |\n"
+        f"| 0x{'22' * 20} | 136.9 |\n"
+    )
+
+    table = read_markdown_table(path)
+    assert list(table.amounts) == [56_939 * 10**18, 1369 * 10**17]
+    assert table.tolerance == 5 * 10**17
+
+
+def test_diff_large_round(tmp_path, allocations):
+    """Test that a 100k-entry round is loaded and diffed in seconds"""
+    changed = [list(row) for row in allocations]
+    changed[10][1] += 10**17
+    changed[20][1] += 10**16  # within the markdown table's rounding
+    removed = changed.pop(30)
+    added = ["0x" + "ff" * 20, 1]
+    changed.append(added)
+
+    write_airdrop_json(tmp_path / "expected.json", allocations)
+    write_airdrop_json(tmp_path / "actual.json", changed)
+    write_airdrop_md(tmp_path / "actual.md", changed)
+
+    start = time.perf_counter()
+    expected = read_json_table(tmp_path / "expected.json")
+    exact = diff_tables(expected, read_json_table(tmp_path / "actual.json"))
+    rounded = diff_tables(expected, read_markdown_table(tmp_path / "actual.md"))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{ENTRIES:,} entries loaded and diffed against two sources in {elapsed:.2f}s"
+    )
+
+    for diff in (exact, rounded):
+        assert [to_hex(key) for key in diff.missing] == [removed[0]]
+        assert [to_hex(key) for key in diff.extra] == [added[0]]
+
+    assert sorted(to_hex(key) for key, _, _ in exact.mismatches) == sorted(
+        [allocations[10][0], allocations[20][0]]
+    )
+    assert [to_hex(key) for key, _, _ in rounded.mismatches] == [allocations[10][0]]
@@ -1,5 +1,6 @@
 import boa
 import pytest
+from compile_cache import load_partial
 
 
 def test_withdraw_remaining_success(survey, token, owner, reward_amount):
@@ -49,7 +50,7 @@ def test_withdraw_remaining_zero_balance(survey, token, owner):
 def test_withdraw_remaining_different_token(survey, token, owner):
     """Test withdrawing a different token than the reward token"""
     # Deploy another token
-    other_token = boa.load_partial("contracts/mocks/MockToken.vy")
+    other_token = load_partial("contracts/mocks/MockToken.vy")
     with boa.env.prank(owner):
         other = other_token.deploy("Other", "OTH", 18)
         # Don't fund the contract with this token